@@ -0,0 +1,146 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Asset References
+#-----------------------------------------------------------------------------------
+#
+#   Inverted index of all assets referenced inside the defaultproperties blocks of the project:
+#       asset -> classes and lines
+#   Indexed are asset literals like SoundCue'A_Foo.Bar' and Begin Object templates
+#   (Begin Object Class=StaticMeshComponent ...).
+#   The index is updated file by file by the FileIndexerThread and saved next to the classes cache.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import os
+import pickle
+import re
+import threading
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDECache as USCache
+
+# increase this if the format of the saved index changes
+ASSET_REFERENCES_VERSION = 1
+
+_defaultproperties_regex = re.compile(r"^[ \t]*defaultproperties\b", re.IGNORECASE | re.MULTILINE)
+# Class'Package.Group.Name'
+_asset_literal_regex = re.compile(r"\b(\w+)'([\w.]+)'")
+# Begin Object Class=X Name=Y or Begin Object Name=Y Class=X
+_begin_object_regex = re.compile(r"begin\s+object\b[^\n]*?\bclass\s*=\s*(\w+)", re.IGNORECASE)
+
+
+# returns the asset references inside the defaultproperties block of the given text:
+# [(asset, line number), ...]
+def extract_asset_references(text):
+    match = _defaultproperties_regex.search(text)
+    if not match:
+        return []
+    references = []
+    line_number = text.count('\n', 0, match.start()) + 1
+    for line in text[match.start():].split('\n'):
+        code = line.split('//')[0]
+        if "'" in code:
+            for m in _asset_literal_regex.finditer(code):
+                references.append((m.group(1) + "'" + m.group(2) + "'", line_number))
+        if "object" in code.lower():
+            m = _begin_object_regex.search(code)
+            if m:
+                references.append(("Begin Object Class=" + m.group(1), line_number))
+        line_number += 1
+    return references
+
+
+# asset -> classes and lines
+# updated from the indexer thread and read from the main thread, so every access is locked.
+class AssetReferenceIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # filename -> (mtime, class name, [(asset, line number), ...])
+        self._files = {}
+        # lowercase asset -> (asset, {filename: [line numbers]})
+        self._assets = {}
+        self.b_changed = False
+
+    def is_up_to_date(self, filename, mtime):
+        entry = self._files.get(filename)
+        return entry is not None and entry[0] == mtime
+
+    def files(self):
+        with self._lock:
+            return list(self._files.keys())
+
+    # re-index a file. text is the content of the file.
+    def update_file(self, filename, mtime, text):
+        class_name = os.path.basename(filename).split('.')[0]
+        references = extract_asset_references(text)
+        with self._lock:
+            self._remove_file(filename)
+            self._add_file(filename, (mtime, class_name, references))
+            self.b_changed = True
+
+    def remove_file(self, filename):
+        with self._lock:
+            self._remove_file(filename)
+
+    def _add_file(self, filename, entry):
+        self._files[filename] = entry
+        for asset, line_number in entry[2]:
+            item = self._assets.setdefault(asset.lower(), (asset, {}))
+            item[1].setdefault(filename, []).append(line_number)
+
+    def _remove_file(self, filename):
+        entry = self._files.pop(filename, None)
+        if entry is None:
+            return
+        for asset, line_number in entry[2]:
+            key = asset.lower()
+            if key in self._assets:
+                self._assets[key][1].pop(filename, None)
+                if not self._assets[key][1]:
+                    del self._assets[key]
+        self.b_changed = True
+
+    # returns all referenced assets with the number of classes referencing them: [(asset, number of classes), ...]
+    def assets(self):
+        with self._lock:
+            return sorted([(asset, len(files)) for asset, files in self._assets.values()], key=lambda a: a[0].lower())
+
+    # returns all references to asset: [(class name, filename, line number), ...]
+    def find(self, asset):
+        references = []
+        with self._lock:
+            entry = self._assets.get(asset.lower())
+            if entry is None:
+                return []
+            for filename, line_numbers in entry[1].items():
+                class_name = self._files[filename][1]
+                for line_number in line_numbers:
+                    references.append((class_name, filename, line_number))
+        return sorted(references)
+
+    def save(self, path):
+        USCache.save_index(self, path, lambda: pickle.dumps((ASSET_REFERENCES_VERSION, self._files), 2))
+
+    # loads the index from path. Returns False if there is no (compatible) index.
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                version, files = pickle.load(f)
+        except Exception as e:
+            print("couldn't load ", path, ": ", e)
+            return False
+        if version != ASSET_REFERENCES_VERSION:
+            return False
+        with self._lock:
+            self._files = {}
+            self._assets = {}
+            for filename, entry in files.items():
+                self._add_file(filename, entry)
+            self.b_changed = False
+        return True
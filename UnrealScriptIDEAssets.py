@@ -0,0 +1,198 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Assets
+#-----------------------------------------------------------------------------------
+#
+#   Reads the asset library (GameAssetDatabase.checkpoint) used for content assist
+#   in the defaultproperties block.
+#   The checkpoint file is memory mapped and tokenized record by record, the result is
+#   saved to a small cache file, so that it only has to be parsed again when the database changes.
+#   For auto-completion the assets are indexed by their class (see AssetIndex).
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import bisect
+import heapq
+import mmap
+import os
+import re
+import zlib
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDECache as USCache
+
+# increase this if the format of the assets cache changes
+ASSETS_CACHE_VERSION = 1
+
+# everything after the first line containing a '[Ghost]' tag can be ignored
+_ghost_regex = re.compile(b"ghost", re.IGNORECASE)
+# a record is a run of characters between null chars, newlines also end a record (and belong to it).
+# The first and last char of every record are garbage, only the captured part is kept.
+_record_regex = re.compile(b"[^\x00\n]([^\x00\n]*)(?:\n|[^\x00\n](?=\x00|\\Z))")
+# (ClassName, AssetName)
+_asset_regex = re.compile(b"\\b(\\w+) (\\w+(?:\\.\\w+)+)")
+
+
+# returns all assets inside the checkpoint file as a list of tuples:
+# [(ClassName, AssetName), ...]
+def read_asset_database(db_file):
+    with open(db_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            end = len(data)
+            ghost = _ghost_regex.search(data)
+            if ghost:
+                end = data.rfind(b"\n", 0, ghost.start()) + 1
+            records = _record_regex.findall(data, 0, end)
+        finally:
+            data.close()
+    return [(c.decode("utf-8", "ignore"), a.decode("utf-8", "ignore")) for c, a in _asset_regex.findall(b"".join(records))]
+
+
+# returns the file stamp that is used to check if the cache is still up to date
+def _file_stamp(path):
+    st = os.stat(path)
+    return "%d %d %d" % (ASSETS_CACHE_VERSION, st.st_size, int(st.st_mtime * 1000))
+
+
+# the cache file starts with a plain text header line (version size mtime),
+# followed by the zlib compressed asset list: all class names, a null char and then all asset names, one per line.
+def save_assets_cache(cache_file, stamp, assets):
+    body = ("\n".join([c for c, a in assets]) + "\x00" + "\n".join([a for c, a in assets])).encode("utf-8")
+    USCache.write_file_atomic(cache_file, stamp.encode("utf-8") + b"\n" + zlib.compress(body, 1))
+
+
+# returns the cached assets or None if the cache is missing or out of date.
+def load_assets_cache(cache_file, stamp):
+    if not os.path.exists(cache_file):
+        return None
+    with open(cache_file, 'rb') as f:
+        if f.readline().rstrip(b"\n") != stamp.encode("utf-8"):
+            return None
+        data = f.read()
+    try:
+        body = zlib.decompress(data).decode("utf-8")
+    except zlib.error:
+        return None
+    if body == "\x00":
+        return []
+    classes, names = body.split("\x00")
+    return list(zip(classes.split("\n"), names.split("\n")))
+
+
+# returns all assets of the database, either from the cache or by parsing the database.
+# Returns an empty list if there is no database.
+def load_asset_database(db_file, cache_file):
+    if not os.path.exists(db_file):
+        print("asset database not found: ", db_file)
+        return []
+    stamp = _file_stamp(db_file)
+    assets = load_assets_cache(cache_file, stamp)
+    if assets is not None:
+        return assets
+    print("asset database changed, parsing ", db_file)
+    assets = read_asset_database(db_file)
+    try:
+        save_assets_cache(cache_file, stamp, assets)
+    except (IOError, OSError) as e:
+        print("couldn't save the assets cache: ", e)
+    return assets
+
+
+# returns the length of the shortest part of path that fuzzy (the characters of a prefix in the right order) matches.
+# fuzzy is lazy, so the match at every start is the shortest one starting there.
+def tightest_span(fuzzy, path, first_char):
+    span = len(path) + 1
+    i = path.find(first_char)
+    while i != -1:
+        match = fuzzy.match(path, i)
+        if match is None:
+            break
+        span = min(span, match.end() - i)
+        i = path.find(first_char, i + 1)
+    return span
+
+
+# Asset list indexed by the lowercase asset class.
+# Inside every class bucket the assets are sorted by their normalized (lowercase) path,
+# a second list sorted by the asset name (last part of the path) is used for name prefix lookups.
+# Only the buckets of the requested classes are ever touched.
+class AssetIndex:
+    def __init__(self, assets):
+        # class name -> [(normalized path, class name, asset path), ...]
+        self._buckets = {}
+        # class name -> [(normalized asset name, index into bucket), ...]
+        self._names = {}
+        # class name -> (all normalized paths joined by newlines, start offset of every path)
+        # built on the first fuzzy lookup of a class.
+        self._joined = {}
+        for class_name, asset in assets:
+            self._buckets.setdefault(class_name.lower(), []).append((asset.lower(), class_name, asset))
+        for key, bucket in self._buckets.items():
+            bucket.sort()
+            names = [(path.rsplit('.', 1)[-1], i) for i, (path, c, a) in enumerate(bucket)]
+            names.sort()
+            self._names[key] = names
+
+    def __len__(self):
+        return sum([len(b) for b in self._buckets.values()])
+
+    def classes(self):
+        return list(self._buckets.keys())
+
+    # returns up to limit (ClassName, AssetName) tuples of the given classes matching prefix.
+    # Ranking: path prefix, asset name prefix, then fuzzy (subsequence) matches with the tightest match first.
+    def find(self, classes, prefix="", limit=200):
+        prefix = prefix.lower()
+        buckets = []
+        for c in set([c.lower() for c in classes]):
+            if c in self._buckets:
+                buckets.append(c)
+
+        if not prefix:
+            return [(c, a) for p, c, a in heapq.nsmallest(limit, [x for key in buckets for x in self._buckets[key][:limit]])]
+
+        results = {}
+        for key in buckets:
+            bucket = self._buckets[key]
+            # path prefix
+            i = bisect.bisect_left(bucket, (prefix,))
+            while i < len(bucket) and bucket[i][0].startswith(prefix):
+                results[bucket[i][0]] = (0, bucket[i][0], bucket[i][1], bucket[i][2])
+                i += 1
+            # asset name prefix
+            names = self._names[key]
+            i = bisect.bisect_left(names, (prefix,))
+            while i < len(names) and names[i][0].startswith(prefix):
+                entry = bucket[names[i][1]]
+                if entry[0] not in results:
+                    results[entry[0]] = (1, entry[0], entry[1], entry[2])
+                i += 1
+
+        # fuzzy: the characters of prefix in the right order, searched in one regex pass per bucket
+        if len(results) < limit:
+            fuzzy = re.compile("[^\\n]*?".join([re.escape(ch) for ch in prefix]))
+            for key in buckets:
+                bucket = self._buckets[key]
+                joined, offsets = self._get_joined(key)
+                for match in fuzzy.finditer(joined):
+                    path, class_name, asset = bucket[bisect.bisect_right(offsets, match.start()) - 1]
+                    if path not in results:
+                        results[path] = (2 + tightest_span(fuzzy, path, prefix[0]), path, class_name, asset)
+
+        return [(r[2], r[3]) for r in heapq.nsmallest(limit, results.values())]
+
+    def _get_joined(self, key):
+        if key not in self._joined:
+            offsets, pos = [], 0
+            for path, c, a in self._buckets[key]:
+                offsets.append(pos)
+                pos += len(path) + 1
+            self._joined[key] = ("\n".join([path for path, c, a in self._buckets[key]]), offsets)
+        return self._joined[key]
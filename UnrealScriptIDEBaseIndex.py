@@ -0,0 +1,151 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Base Index
+#-----------------------------------------------------------------------------------
+#
+#   A read-only index of the stock UDK classes (Core, Engine, UTGame, ...) and the InbuiltClasses,
+#   built once for a UDK version and shipped inside the BaseIndex folder of the plug-in.
+#   It uses the format of the classes cache, but all file names are relative:
+#       $SRC\Core\Classes\Object.uc     $INBUILT\Array.uc
+#   The classes of the base index are put under the project classes that weren't parsed yet.
+#   Every class is checked against the content hash of the local file before it's used (see ClassReference.check_source),
+#   classes that don't match get parsed locally as usual.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import os
+import re
+import threading
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDEData as USData
+    import UnrealScriptIDE.UnrealScriptIDEIndexFile as USIndexFile
+    import UnrealScriptIDE.UnrealScriptIDEParser as Parser
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDEData as USData
+    import UnrealScriptIDEIndexFile as USIndexFile
+    import UnrealScriptIDEParser as Parser
+    import UnrealScriptIDECache as USCache
+
+SRC_PREFIX = "$SRC\\"
+INBUILT_PREFIX = "$INBUILT\\"
+BASE_INDEX_EXTENSION = ".bin"
+
+# the packages that come with UDK
+DEFAULT_PACKAGES = ["Core", "Engine", "GameFramework", "GFxUI", "GFxUIEditor", "IpDrv", "OnlineSubsystemPC", "UDKBase",
+                    "UnrealEd", "UTEditor", "UTGame", "UTGameContent", "WinDrv", "XAudio2"]
+
+
+def base_index_folder():
+    return os.path.join(sublime.packages_path(), "UnrealScriptIDE", "BaseIndex")
+
+
+def inbuilt_classes_folder():
+    return os.path.join(sublime.packages_path(), "UnrealScriptIDE", "InbuiltClasses")
+
+
+# returns a function that turns local file names into the relative ones of the base index
+def relative_file_names(src_folder):
+    prefixes = [(src_folder.rstrip("\\/").lower() + "\\", SRC_PREFIX), (inbuilt_classes_folder().lower() + "\\", INBUILT_PREFIX)]
+
+    def map_file_name(file_name):
+        for prefix, replacement in prefixes:
+            if file_name.lower().startswith(prefix):
+                return replacement + file_name[len(prefix):]
+        return file_name
+    return map_file_name
+
+
+# returns a function that turns the relative file names of the base index into local ones
+def local_file_names(src_folder):
+    prefixes = [(SRC_PREFIX, src_folder.rstrip("\\/") + "\\"), (INBUILT_PREFIX, inbuilt_classes_folder() + "\\")]
+
+    def map_file_name(file_name):
+        for prefix, replacement in prefixes:
+            if file_name.startswith(prefix):
+                return replacement + file_name[len(prefix):]
+        return file_name
+    return map_file_name
+
+
+# returns a name for the base index of the UDK installation, e.g. UDK-2013-07
+def default_version_name(src_folder):
+    name = re.split(r"[\\/]", src_folder.rstrip("\\/")[:-len("Development\\Src")].rstrip("\\/"))[-1]
+    return re.sub(r"[^\w.-]", "_", name) or "UDK"
+
+
+# returns the base index that matches the local UDK installation (or None).
+# A base index matches if its Object class has the same content hash as the local Object.uc
+def find_base_index(src_folder):
+    folder = base_index_folder()
+    if not os.path.isdir(folder):
+        return None
+    object_stamp = USData.source_stamp(os.path.join(src_folder, "Core", "Classes", "Object.uc"))
+    if object_stamp is None:
+        return None
+    for f in sorted(os.listdir(folder)):
+        if not f.endswith(BASE_INDEX_EXTENSION):
+            continue
+        try:
+            base_index = USIndexFile.IndexFile(os.path.join(folder, f), "", local_file_names(src_folder))
+        except (USIndexFile.IndexFileError, IOError, OSError) as e:
+            print("can't use base index ", f, ": ", e)
+            continue
+        for c in base_index.read_classes(None):
+            if c.name().lower() == "object":
+                if c.source_stamp() is not None and c.source_stamp()[2] == object_stamp[2]:
+                    print("using base index ", f)
+                    return base_index
+                break
+        base_index.close()
+    return None
+
+
+# puts the members of the base index under all classes that weren't parsed yet.
+# They get checked against the local file before they are used.
+def apply_base_index(base_index, classes):
+    base_classes = {}
+    for c in base_index.read_classes(None):
+        if c.members_location() is not None:
+            base_classes[c.file_name().lower()] = c
+    num = 0
+    for c in classes:
+        base_class = base_classes.get(c.file_name().lower())
+        if base_class is not None and c.source_stamp() is None and not c.has_parsed():
+            c.set_members_location(base_class.members_location())
+            c.set_source_stamp(base_class.source_stamp())
+            num += 1
+    print("took ", num, " classes from the base index")
+
+
+# parses all classes of the given packages and the InbuiltClasses and writes them to the base index
+class BaseIndexBuilderThread(threading.Thread):
+    def __init__(self, collector, packages, path):
+        self.collector = collector
+        self.packages = [p.lower() for p in packages]
+        self.path = path
+        self.num_classes = 0
+        self.error = None
+        threading.Thread.__init__(self)
+
+    def run(self):
+        src_folder = self.collector.src_folder.rstrip("\\/").lower() + "\\"
+        inbuilt_folder = inbuilt_classes_folder().lower() + "\\"
+        classes = []
+        for c in list(self.collector._classes):
+            file_name = c.file_name().lower()
+            if file_name.startswith(inbuilt_folder) or (file_name.startswith(src_folder) and file_name[len(src_folder):].split("\\")[0] in self.packages):
+                if not c.has_parsed():
+                    Parser.ParserThread(self.collector, c.file_name(), 30, False).run()
+                classes.append(c)
+        try:
+            data = USIndexFile.build_index(classes, "", 1, True, relative_file_names(self.collector.src_folder))[0]
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            USCache.write_file_atomic(self.path, data)
+            self.num_classes = len(classes)
+        except (IOError, OSError) as e:
+            self.error = e
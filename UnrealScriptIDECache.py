@@ -0,0 +1,241 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Cache
+#-----------------------------------------------------------------------------------
+#
+#   A small least recently used cache and helpers for writing cache files.
+#   Used to keep per-file data (like the flattened completions of a file) bounded,
+#   the least recently used entries get evicted once the entry or byte budget is exceeded.
+#   Also remembers the last completion response of every view (see CompletionResponseCache).
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import os
+import sys
+import tempfile
+
+
+# estimates the memory used by a value. Only the containers themselves are counted,
+# the objects inside them are shared with the class index and therefore don't count.
+def estimate_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            if isinstance(item, (tuple, list)):
+                size += sys.getsizeof(item)
+    return size
+
+
+# least recently used cache with O(1) lookup, insertion and eviction.
+# Entries are kept in a doubly linked list, the most recently used entry is right after the root.
+#   max_entries:    maximum number of entries, 0 means unlimited
+#   max_bytes:      maximum estimated size of all entries, 0 means unlimited
+#   on_evict:       called with (key, value) whenever an entry gets evicted
+class LRUCache:
+    def __init__(self, max_entries=0, max_bytes=0, size_of=estimate_size, on_evict=None):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._size_of = size_of
+        self._on_evict = on_evict
+        # node: [previous, next, key, value, size]
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None, 0]
+        self._map = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._map)
+
+    def __contains__(self, key):
+        return key in self._map
+
+    def keys(self):
+        return list(self._map.keys())
+
+    def size_in_bytes(self):
+        return self._bytes
+
+    # changes the budget, evicts entries if the new budget is smaller.
+    def set_budget(self, max_entries=0, max_bytes=0):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._shrink()
+
+    # returns the value for key and marks it as most recently used.
+    def get(self, key, default=None):
+        node = self._map.get(key)
+        if node is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._unlink(node)
+        self._link_front(node)
+        return node[3]
+
+    # returns the value without counting it as a use.
+    def peek(self, key, default=None):
+        node = self._map.get(key)
+        if node is None:
+            return default
+        return node[3]
+
+    def put(self, key, value):
+        size = self._size_of(value)
+        node = self._map.get(key)
+        if node is not None:
+            self._unlink(node)
+            self._bytes -= node[4]
+            node[3], node[4] = value, size
+        else:
+            node = [None, None, key, value, size]
+            self._map[key] = node
+        self._bytes += size
+        self._link_front(node)
+        self._shrink()
+
+    def remove(self, key):
+        node = self._map.pop(key, None)
+        if node is not None:
+            self._unlink(node)
+            self._bytes -= node[4]
+            return node[3]
+        return None
+
+    def clear(self):
+        self._root[:] = [self._root, self._root, None, None, 0]
+        self._map = {}
+        self._bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._map), "bytes": self._bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _link_front(self, node):
+        root = self._root
+        first = root[1]
+        node[0], node[1] = root, first
+        first[0] = node
+        root[1] = node
+
+    def _unlink(self, node):
+        prev, next = node[0], node[1]
+        prev[1] = next
+        next[0] = prev
+
+    # evicts least recently used entries until the budget fits again.
+    # The most recently used entry is never evicted.
+    def _shrink(self):
+        while len(self._map) > 1 and ((self._max_entries and len(self._map) > self._max_entries) or
+                                      (self._max_bytes and self._bytes > self._max_bytes)):
+            node = self._root[0]
+            self._unlink(node)
+            del self._map[node[2]]
+            self._bytes -= node[4]
+            self.evictions += 1
+            if self._on_evict:
+                self._on_evict(node[2], node[3])
+
+
+# remembers the last completion response of every view.
+#   - if the view didn't change, the response is returned as it is.
+#   - if only the prefix grew (the user typed further characters of the word), the response gets filtered:
+#     completions that were filtered by the prefix are kept if they contain the new prefix,
+#     headers (no contents) and completions that weren't filtered (e.g. keywords) are always kept.
+# context is everything else the response depends on, e.g. the line left of the prefix and the completions generation.
+class CompletionResponseCache:
+    def __init__(self, max_views=16):
+        # view id -> [change count, view size, context, prefix, response, filter keys, state]
+        # the filter keys are the lowercase names of the completions, or None for completions that are always kept.
+        self._responses = LRUCache(max_views)
+        self.hits = 0
+        self.refinements = 0
+        self.misses = 0
+
+    # returns (response, state) or None.
+    # state is whatever was stored together with the response (e.g. the class the completions came from).
+    def get(self, view_id, change_count, size, context, prefix):
+        entry = self._responses.get(view_id)
+        if entry is None or entry[2] != context:
+            self.misses += 1
+            return None
+        if entry[0] == change_count and entry[3] == prefix:
+            self.hits += 1
+            return entry[4], entry[6]
+        # only the prefix grew
+        if entry[5] is not None and change_count > entry[0] and prefix.startswith(entry[3]) and size - entry[1] == len(prefix) - len(entry[3]):
+            self._refine(entry, prefix)
+            entry[0], entry[1] = change_count, size
+            self.refinements += 1
+            return entry[4], entry[6]
+        self.misses += 1
+        return None
+
+    # unfiltered: the completions of the response that weren't filtered by the prefix, or None if the response can't be refined
+    def put(self, view_id, change_count, size, context, prefix, response, unfiltered, state=None):
+        keys = None
+        if unfiltered is not None:
+            unfiltered = set(unfiltered)
+            completions = response[0] if isinstance(response, tuple) else response
+            keys = [None if c[1] == "" or c in unfiltered else c[0].split('\t')[0].lower() for c in completions]
+        self._responses.put(view_id, [change_count, size, context, prefix, response, keys, state])
+
+    def remove(self, view_id):
+        self._responses.remove(view_id)
+
+    def clear(self):
+        self._responses.clear()
+
+    def stats(self):
+        return {"views": len(self._responses), "hits": self.hits, "refinements": self.refinements, "misses": self.misses}
+
+    def _refine(self, entry, prefix):
+        response = entry[4]
+        completions = response[0] if isinstance(response, tuple) else response
+        word = prefix.lower()
+        kept = [i for i, key in enumerate(entry[5]) if key is None or word in key]
+        refined = [completions[i] for i in kept]
+        entry[3], entry[5] = prefix, [entry[5][i] for i in kept]
+        entry[4] = (refined, response[1]) if isinstance(response, tuple) else refined
+
+
+# replaces path with the (completely written) temp_path.
+# os.rename can't overwrite files on windows, and os.replace doesn't exist in Python 2.
+def replace_file(temp_path, path):
+    try:
+        os.replace(temp_path, path)
+    except AttributeError:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+
+
+# writes data to path without ever leaving a half written file behind.
+# Every write has its own temp file (next to path), so two threads never write into the same one.
+def write_file_atomic(path, data):
+    handle, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        replace_file(temp_path, path)
+    except (IOError, OSError):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# saves a file index (see FileIndexerThread) to path. snapshot() returns the data to write and is called while the lock
+# of the index is held. b_changed is reset together with it, so changes made while the index is written are saved the
+# next time. If the write fails, the index stays changed.
+def save_index(index, path, snapshot):
+    with index._lock:
+        data = snapshot()
+        index.b_changed = False
+    try:
+        write_file_atomic(path, data)
+    except (IOError, OSError):
+        index.b_changed = True
+        raise
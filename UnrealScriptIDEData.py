@@ -16,51 +16,43 @@ ST3 = int(sublime.version()) > 3000
 
 if ST3:
     basestring = (str, bytes)
-
-import re
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+    import UnrealScriptIDE.UnrealScriptIDEAssets as USAssets
+    import UnrealScriptIDE.UnrealScriptIDEPackages as USPackages
+    import UnrealScriptIDE.UnrealScriptIDEExpression as USExpression
+    import UnrealScriptIDE.UnrealScriptIDEPanel as USPanel
+else:
+    import UnrealScriptIDECache as USCache
+    import UnrealScriptIDEAssets as USAssets
+    import UnrealScriptIDEPackages as USPackages
+    import UnrealScriptIDEExpression as USExpression
+    import UnrealScriptIDEPanel as USPanel
+
+import hashlib
+import os
+import threading
 
 # if the helper panel is displayed, this is true
 # ! (TODO): use an event instead
 b_helper_panel_on = False
-output_view = None
+# the helper panel of every window and the formatted documentation of recently shown symbols
+panel_manager = USPanel.PanelManager()
 
 
 # prints the text to the "helper panel" (Actually the console)
 # ! (TODO): fire show_helper_panel
 def print_to_panel(view, text, b_overwrite=True, bLog=False):
-    global b_helper_panel_on, output_view
-
+    global b_helper_panel_on
     b_helper_panel_on = True
-    if not ST3:
-        if b_overwrite or not output_view:
-            # get_output_panel doesn't "get" the panel, it *creates* it, so we should only call get_output_panel once
-            panel = view.window().get_output_panel('UnrealScriptAutocomplete_panel')
-            output_view = panel
-        else:
-            panel = output_view
-        panel_edit = panel.begin_edit()
-        panel.insert(panel_edit, panel.size(), text)
-        panel.end_edit(panel_edit)
-    else:
-        if b_overwrite or not output_view:
-            panel = view.window().create_output_panel('UnrealScriptAutocomplete_panel')
-            output_view = panel
-        else:
-            panel = output_view
-        # panel.run_command('erase_view')
-        # print(text)
-        panel.run_command('append', {'characters': text})
-
-    if not b_overwrite:
-        panel.show(panel.size())
+    panel_manager.print_text(view, text, b_overwrite, bLog)
 
-    if bLog:
-        panel.set_syntax_file("Packages/UnrealScriptIDE/Log.tmLanguage")
-        panel.set_name("UnrealLog")
-    else:
-        panel.set_syntax_file(view.settings().get('syntax'))
 
-    view.window().run_command("show_panel", {"panel": "output.UnrealScriptAutocomplete_panel"})
+# shows the documentation of symbol in the helper panel (or a popup). render() returns the documentation,
+# it's only called the first time the symbol is shown.
+def show_documentation(view, symbol, render):
+    global b_helper_panel_on
+    if panel_manager.show_documentation(view, symbol, render):
+        b_helper_panel_on = True
 
 
 # base class for adding new auto-complete suggestions
@@ -70,14 +62,22 @@ class UnrealData:
     # At the beginning, search trough the whole source folder and fill this
     # These classes also contain their functions and variables if they were already parsed.
     _classes = []
+    # the same classes by lowercase name and by lowercase filename
+    _classes_by_name = {}
+    _classes_by_file = {}
+    # classes get added from many collector threads at the same time
+    _classes_lock = threading.Lock()
+
+    # all Src folders that are indexed, the first one is also used for the cache files (see src_folder).
+    # In multi-root mode (more than one Src folder), a class name that exists in several roots refers to the class of the first of them.
+    # The classes of the other roots are only found by their filename.
+    src_folders = []
 
     # stores all functions and variables to use as completions on a file
-    # ! TODO:   If it is fast enough, make use of the classes objects and abandon this, as it is redundant
-    #           instead save all class objects to be used on one file
-    # now: (filename, functions, variables)
-    _completions_for_file = []
-    # files that have already been parsed (and therefore are inside _completions_for_file)
-    _filenames = []
+    # filename -> (functions, variables)
+    # This is a bounded LRU cache, the budget is set from the settings on startup.
+    # Evicted entries are rebuilt from the (already parsed) classes, see load_completions_for_file.
+    _completions_for_file = USCache.LRUCache(64)
 
     # -------------
     # these store the current completions. Completions will be extracted based on those arrays.
@@ -89,6 +89,14 @@ class UnrealData:
 
     # the class we wanted to load completions from
     completion_class = None
+    # increased whenever the completions could have changed (classes parsed, another file activated, settings changed),
+    # so cached completion responses don't get used anymore.
+    _completions_generation = 0
+
+    # cached values of the settings, cleared when the settings change (see get_setting)
+    _settings_values = {}
+    b_observing_settings = False
+    _keyword_completions = None
 
     # inbuilt functions should always be present.
     _inbuilt_functions = []
@@ -97,18 +105,122 @@ class UnrealData:
     # will be loaded when used first, contains the asset library as a list of tuples:
     # [(ClassName, AssetName), ...]
     _assets = None
+    # the same assets, indexed by class for auto-completion
+    _asset_index = None
+    # the packages of the Content folder are read in the background (see load_assets_database)
+    b_scanning_packages = False
+    # asset completions were shown before all packages were scanned, they're shown again when it's done
+    b_wanted_assets = False
 
     # clear the completions for the current file.
     def clear(self):
         self._functions = []
         self._variables = []
+        self._completions_generation += 1
+
+    # returns the value of a setting. Settings are only loaded once, until they change.
+    def get_setting(self, key, default=None):
+        values = self._settings_values
+        if key not in values:
+            settings = sublime.load_settings('UnrealScriptIDE.sublime-settings')
+            if not self.b_observing_settings:
+                self.b_observing_settings = True
+                settings.add_on_change('UnrealScriptIDEData', self.on_settings_changed)
+            values[key] = settings.get(key, default)
+        return values[key]
+
+    def on_settings_changed(self):
+        self._settings_values = {}
+        self._keyword_completions = None
+        self._completions_generation += 1
+        self.set_completions_cache_budget(sublime.load_settings('UnrealScriptIDE.sublime-settings'))
+
+    # returns the keywords as completions
+    def get_keyword_completions(self):
+        if self._keyword_completions is None:
+            self._keyword_completions = [(item + "\tkeyword", item) for item in self.get_setting('unreal_keywords', [])]
+        return self._keyword_completions
 
     # adds the class to _classes
+    # In multi-root mode, classes with the same name from other roots are added too.
     def add_class(self, class_name, parent_class, description, file_name):
-        if self.get_class(class_name) is None:
-            c = ClassReference(class_name, parent_class, description, file_name, self)
-            self._classes.append(c)
-            return c
+        with self._classes_lock:
+            if self.get_class(class_name) is None or (len(self.src_folders) > 1 and self.get_class_from_filename(file_name) is None):
+                c = ClassReference(class_name, parent_class, description, file_name, self)
+                self._classes.append(c)
+                self._register_class(c)
+            else:
+                return None
+        self.class_changed(c)
+        return c
+
+    # replaces all classes, e.g. with the ones loaded from the cache
+    def set_classes(self, classes):
+        self._classes = classes
+        self._classes_by_name = {}
+        self._classes_by_file = {}
+        for c in classes:
+            self._register_class(c)
+        self._completions_generation += 1
+
+    # the class of the first root gets the name, no matter in which order the classes were added
+    def _register_class(self, c):
+        current = self._classes_by_name.get(c.name().lower())
+        if current is None or self.root_priority(c.file_name()) < self.root_priority(current.file_name()):
+            self._classes_by_name[c.name().lower()] = c
+        self._classes_by_file.setdefault(c.file_name().lower(), c)
+
+    def set_src_folders(self, src_folders):
+        self.src_folders = src_folders
+        self.src_folder = src_folders[0]
+
+    # returns the Src folder that contains file_name, or None
+    def root_of(self, file_name):
+        for root in self.src_folders:
+            if file_name.lower().startswith(root.rstrip("\\/").lower() + "\\"):
+                return root.rstrip("\\/")
+        return None
+
+    # the lower, the more important. Files outside of the Src folders (e.g. the InbuiltClasses) come last.
+    def root_priority(self, file_name):
+        root = self.root_of(file_name)
+        if root is None:
+            return len(self.src_folders)
+        return [r.rstrip("\\/") for r in self.src_folders].index(root)
+
+    # in multi-root mode, classes are looked up in the first root and identical files share their members,
+    # so a file name can point into another root than the one of active_file.
+    # Returns the same file inside the root of active_file, if it exists there with the same content.
+    def file_in_root_of(self, file_name, active_file):
+        if len(self.src_folders) < 2 or not active_file:
+            return file_name
+        root, target_root = self.root_of(file_name), self.root_of(active_file)
+        if root is None or target_root is None or root == target_root:
+            return file_name
+        local_file = target_root + file_name[len(root):]
+        stamp, local_stamp = source_stamp(file_name), source_stamp(local_file)
+        if stamp is not None and local_stamp is not None and stamp[2] == local_stamp[2]:
+            return local_file
+        return file_name
+
+    # returns the members (functions, variables, consts, structs) of another file with the same content, or None.
+    # Overwritten by the plug-in, which shares them between classes (see UnrealScriptIDEParseStore).
+    # if b_load is true, the members may also be loaded out of the shared parse store on the disk.
+    def shared_members(self, stamp, file_name, b_load=False):
+        return None
+
+    # offers the members of the (just parsed or loaded) class to other files with the same content.
+    # if b_save is true, they are also saved to the shared parse store on the disk.
+    def share_members(self, my_class, b_save=False):
+        pass
+
+    # gets called whenever a class was added or its content changed (e.g. to save it to the cache)
+    def class_changed(self, my_class):
+        pass
+
+    # gets called the first time the members of a class are needed in this session
+    def class_used(self, my_class):
+        pass
 
     # links all classes together
     def link_classes(self):
@@ -152,62 +264,52 @@ class UnrealData:
 
     # returns the type (class) of the object before the dot
     def get_class_from_context(self, line, from_class=None, local_vars=[]):
-        objs = line[:-1].split('.')
-        print(line)
-        print(objs, from_class.name() if from_class else "")
-        # we're lucky, it's just one object, easy.
-        if len(objs) == 1:
-            if line[-5:] == "self.":
-                active_file = sublime.active_window().active_view().file_name()
-                return self.get_class_from_filename(active_file)
-
-            if line[-6:] == "super.":
-                active_file = sublime.active_window().active_view().file_name()
-                return self.get_class_from_filename(active_file).get_parent()
-
-            # something like 'super(Actor).' or 'Actor(controller).'
-            if line[-2:] == ").":
-                if "super(" in line:
-                    return self.get_class(line.split('(')[-1][:-2])
-                else:
-                    # typecasting: something like Actor(controller)
-                    # or a function with return value
-                    obj = line.split('(')[0]
-                    if from_class:
-                        o = self.get_object(obj, from_class, b_second_type=True)
-                    else:
-                        o = self.get_object(obj, self, b_second_type=True)
-                    if o == "parsing...":
-                        return o
-                    t = self.get_object_type(o, from_class)
-                    if isinstance(t, basestring):
-                        return self.get_class_from_context(t, from_class, local_vars)
-                    return t
-            # a single object
+        return self.get_class_from_chain(USExpression.parse_context(line), from_class, local_vars)
+
+    # returns the type (class or struct) of an expression (see UnrealScriptIDEExpression), None or "parsing..."
+    # local_vars are only used for the first object of the chain.
+    def get_class_from_chain(self, expression, from_class=None, local_vars=[]):
+        c = from_class
+        for i, segment in enumerate(expression.segments):
+            if i == 0 and from_class is None:
+                c = self.get_class_of_first_segment(segment, local_vars)
+            # Foo.default.Bar, Foo.static.Bar, Foo.const.Bar
+            elif segment.name.lower() in ("default", "static", "const") and not segment.b_call:
+                continue
             else:
-                obj = line[:-1]
-                # print("a single object")
-                if from_class:
-                    o = self.get_object(obj, from_class, b_no_classes=True, b_second_type=True)
-                else:
-                    o = self.get_object(obj, self, b_no_classes=True, b_second_type=True, local_vars=local_vars)
+                o = self.get_object(segment.word(), c, b_no_classes=True, b_second_type=True)
                 if o == "parsing...":
                     return o
-                # print(o)
-                t = self.get_object_type(o, from_class)
-                if isinstance(t, basestring):
-                    return self.get_class_from_context(t, from_class, local_vars)
-                return t
-
-        # (= more than one dot)
-        else:
-            # find class of the first object
-            c = self.get_class_from_context(objs[0] + '.', from_class, local_vars=local_vars)
+                c = self.get_object_type(o, c)
             if c == "parsing...":
                 return c
-            if c:
-                # call itself with the found class and the other objects
-                return self.get_class_from_context(".".join(objs[1:]) + '.', c)
+            if c is None or isinstance(c, basestring):
+                return None
+        return c
+
+    def get_class_of_first_segment(self, segment, local_vars):
+        name = segment.name.lower()
+        if segment.b_class_literal:
+            return self.get_class(segment.name)
+        if name == "self" and not segment.b_call:
+            return self.get_class_from_filename(sublime.active_window().active_view().file_name())
+        if name == "super":
+            # super(Actor) or the parent class
+            if segment.b_call and segment.arguments.strip():
+                return self.get_class(segment.arguments.strip())
+            my_class = self.get_class_from_filename(sublime.active_window().active_view().file_name())
+            return my_class.get_parent() if my_class else None
+        if segment.b_call:
+            # typecasting: something like Actor(controller), or a function with return value
+            c = self.get_class(segment.name)
+            if c is not None and not segment.num_indexes:
+                return c
+            o = self.get_object(segment.word(), self, b_no_classes=True, b_second_type=True)
+        else:
+            o = self.get_object(segment.word(), self, b_no_classes=True, b_second_type=True, local_vars=local_vars)
+        if o == "parsing...":
+            return o
+        return self.get_object_type(o)
 
     # returns the objects type (its class)
     def get_object_type(self, obj, its_class=None):
@@ -235,10 +337,7 @@ class UnrealData:
 
     # returns the class with the given name:
     def get_class(self, name):
-        for _class in self._classes:
-            if _class.name().lower() == name.lower():
-                return _class
-        return None
+        return self._classes_by_name.get(name.lower())
 
     # returns the class with the given filename
     def get_class_from_filename(self, filename):
@@ -246,10 +345,7 @@ class UnrealData:
             return None
         if isinstance(filename, ClassReference):
             return filename
-        for _class in self._classes:
-            if _class.file_name().lower() == filename.lower():
-                return _class
-        return None
+        return self._classes_by_file.get(filename.lower())
 
     # returns the found function in _functions
     def get_function(self, name):
@@ -273,18 +369,10 @@ class UnrealData:
 # Completions
 # ==============================
 
-    # remove filename from _filenames
     # remove filename from _completions_for_file
     # remove completions from the class of this filename
     def remove_file(self, filename):
-        for f in self._filenames[:]:
-            if filename == f:
-                self._filenames.remove(f)
-                break
-        for c in self._completions_for_file[:]:
-            if filename == c[0]:
-                self._completions_for_file.remove(c)
-                break
+        self._completions_for_file.remove(filename)
         my_class = self.get_class_from_filename(filename)
         if my_class is not None:
             my_class.clear()
@@ -354,9 +442,13 @@ class UnrealData:
         if not b_no_assets and assets_filtering:
             # print("filter for :", assets_filtering)
             self.load_assets_database()
-            for asset in self._assets:
-                if any(a.lower() == asset[0].lower() for a in assets_filtering):
-                    autocomplete_list.append((asset[1] + '\t' + asset[0], asset[0]+"\'"+asset[1]+"\'"))
+            if self.b_scanning_packages:
+                self.b_wanted_assets = True
+                if not len(self._asset_index):
+                    autocomplete_list.append(("just a moment...", ""))
+            limit = self.get_setting('asset_completions_limit', 500)
+            for asset in self._asset_index.find(assets_filtering, word, limit):
+                autocomplete_list.append((asset[1] + '\t' + asset[0], asset[0]+"\'"+asset[1]+"\'"))
 
         if bNoStandardCompletions:
             return autocomplete_list, sublime.INHIBIT_WORD_COMPLETIONS | sublime.INHIBIT_EXPLICIT_COMPLETIONS
@@ -415,33 +507,87 @@ class UnrealData:
         """ loads all assets """
         if self._assets is not None:
             return
-        out = ""
         DBfile = self.src_folder[:-15] + "UDKGame\\Content\\GameAssetDatabase.checkpoint"
-        with open(DBfile, "rb") as f:
-            for line in f:
-                # a bit hacky, but all text after those '[Ghost]' tags can be ignored
-                if "ghost" in line.decode("utf-8", "ignore").lower():
-                    break
-                # split at null chars, ..
-                for l in line.decode("utf-8", "ignore").split('\x00'):
-                    # ... and strip away first and last char, because the file always contains garbage there
-                    out += l[1:-1]
-        self._assets = re.findall(r"\W?(\w+) ((?:\w+\.)+\w+)", out)
+        self._assets = USAssets.load_asset_database(DBfile, os.path.join(self.src_folder, 'assets_cache.obj'))
+
+        self._asset_index = USAssets.AssetIndex(self._assets)
+
+        # the asset database is often missing or out of date, read the packages directly in that case.
+        # That takes a while on a real Content folder, so it's done in the background.
+        settings = sublime.load_settings('UnrealScriptIDE.sublime-settings')
+        content_folder = self.src_folder[:-15] + "UDKGame\\Content"
+        if (not self._assets or settings.get('scan_content_packages')) and os.path.exists(content_folder):
+            self.b_scanning_packages = True
+            thread = USPackages.PackageScanThread([content_folder], os.path.join(self.src_folder, 'packages_cache.obj'))
+            self.start_job(thread, lambda: self.on_packages_scanned(thread))
+
+    # adds the assets of the scanned packages, shows the asset completions again if they were wanted in the meantime
+    def on_packages_scanned(self, thread):
+        known = set([a.lower() for c, a in self._assets])
+        for asset in thread.assets:
+            if asset[1].lower() not in known:
+                known.add(asset[1].lower())
+                self._assets.append(asset)
+        self._asset_index = USAssets.AssetIndex(self._assets)
+        self.b_scanning_packages = False
+        print("scanned the packages: ", len(self._assets), " assets")
+        if self.b_wanted_assets:
+            self.b_wanted_assets = False
+            window = sublime.active_window()
+            view = window.active_view() if window is not None else None
+            if view is not None:
+                window.run_command("hide_auto_complete")
+                sublime.set_timeout(lambda: view.run_command("auto_complete"), 0)
+
+    # sets the budget of the completions cache from the settings
+    def set_completions_cache_budget(self, settings):
+        self._completions_for_file.set_budget(settings.get('completions_cache_max_files', 64),
+                                              settings.get('completions_cache_max_kbytes', 0) * 1024)
 
     # saves all completions to a file.
-    # ! TODO: have a look at comment for _completions_for_file
     def save_completions_to_file(self, filename):
-        names = [x[0] for x in self._completions_for_file]
-        if filename not in names:
-            self._completions_for_file.append((filename, self._functions, self._variables))
+        if filename not in self._completions_for_file:
+            self._completions_for_file.put(filename, (self._functions, self._variables))
 
-    # loads all completions for a file
+    # loads all completions for a file.
+    # if they were evicted from the cache, rebuild them from the class index if the class and all its parents are parsed.
+    # returns False if the file needs to be parsed first.
     def load_completions_for_file(self, filename):
-        for c in self._completions_for_file:
-            if filename == c[0]:
-                self._functions = c[1]
-                self._variables = c[2]
-                break
+        c = self._completions_for_file.get(filename)
+        if c is None:
+            my_class = self.get_class_from_filename(filename)
+            if my_class is None:
+                return False
+            p = my_class
+            while p is not None:
+                if not p.has_parsed():
+                    return False
+                p = p.get_parent()
+            c = (self.get_functions_from_class(my_class), self.get_variables_from_class(my_class))
+            self._completions_for_file.put(filename, c)
+        self._functions, self._variables = c
+        self._completions_generation += 1
+        return True
+
+    # returns hits, misses and evictions of the completions cache
+    def completions_cache_stats(self):
+        return self._completions_for_file.stats()
+
+# returns (size, mtime in milliseconds, content hash) of the file, or None if it doesn't exist.
+# if old_stamp is given and size and mtime didn't change, the file isn't read again.
+def source_stamp(file_name, old_stamp=None):
+    try:
+        st = os.stat(file_name)
+    except OSError:
+        return None
+    size, mtime = st.st_size, int(st.st_mtime * 1000)
+    if old_stamp is not None and old_stamp[0] == size and old_stamp[1] == mtime:
+        return old_stamp
+    try:
+        with open(file_name, 'rb') as f:
+            return (size, mtime, hashlib.sha1(f.read()).hexdigest())
+    except IOError:
+        return None
 
 
 # -------------------------------------
@@ -451,9 +597,24 @@ class UnrealData:
 # These can create dynamic tool-tips and dynamic snippets based on their content
 # ___________________________________
 
+# creates the source check locks of the classes
+_source_check_locks_lock = threading.Lock()
+
+
 # stores classes
 # every class can also store all functions and variables that are inside this class
 class ClassReference:
+    # (index file, offset, length) of the members that weren't loaded out of the classes cache yet
+    _members_location = None
+    # (size, mtime, content hash) of the source file when it was parsed
+    _source_stamp = None
+    # members from the cache are only trusted after checking the source file (see check_source)
+    _b_source_checked = False
+    # held while the source file is checked, so no other thread trusts the members in the meantime
+    _source_check_lock = None
+    # true once the members were needed in this session (see UnrealData.class_used)
+    _b_used = False
+
     def __init__(self, class_name, parent_class, description, file_name, collector_reference):
         self._name = class_name
         self._description = description
@@ -509,9 +670,52 @@ class ClassReference:
         return self._parent_class_name
 
     def has_parsed(self):
+        if self._b_was_parsed and not self._b_source_checked:
+            if self._source_check_lock is None:
+                with _source_check_locks_lock:
+                    if self._source_check_lock is None:
+                        self._source_check_lock = threading.Lock()
+            # if another thread is checking the source, wait for its result
+            with self._source_check_lock:
+                if not self._b_source_checked:
+                    self.check_source()
+                    self._b_source_checked = True
         return self._b_was_parsed
 
-    def save_completions(self, functions, variables, consts, structs):
+    # checks if the source file was changed (e.g. outside of the editor) since the members were parsed.
+    # Only if size or mtime changed the file gets hashed. Stale members are dropped, so the class gets parsed again.
+    # The members are trusted (_b_source_checked) only after the check is done, see has_parsed.
+    def check_source(self):
+        if self._source_stamp is None:
+            return
+        stamp = source_stamp(self._file_name, self._source_stamp)
+        if stamp is None or stamp == self._source_stamp:
+            return
+        if stamp[0] == self._source_stamp[0] and stamp[2] == self._source_stamp[2]:
+            # only touched
+            self._source_stamp = stamp
+            self._collector_reference.class_changed(self)
+            return
+        print("changed outside of the editor, parse again: ", self._file_name)
+        self.clear()
+
+    def source_stamp(self):
+        return self._source_stamp
+
+    # the members get checked against the new stamp when they are needed first
+    def set_source_stamp(self, stamp):
+        self._source_stamp = stamp
+        self._b_source_checked = False
+
+    def save_completions(self, functions, variables, consts, structs, stamp=None):
+        self.set_members(functions, variables, consts, structs)
+        self._source_stamp = stamp
+        self._b_source_checked = True
+        self._collector_reference.class_changed(self)
+
+    # same as save_completions, but for members that were loaded out of the cache
+    def set_members(self, functions, variables, consts, structs):
+        self._members_location = None
         self._variables = variables
         self._functions = functions
         self._consts = consts
@@ -524,12 +728,39 @@ class ClassReference:
         self._consts = []
         self._structs = []
         self._b_was_parsed = False
+        self._members_location = None
+        self._source_stamp = None
+        self._collector_reference.class_changed(self)
+
+    # the members are loaded out of the classes cache when they are first needed
+    def set_members_location(self, location):
+        self._members_location = location
+        self._b_was_parsed = True
+
+    def members_location(self):
+        return self._members_location
+
+    # b_use is false if the members are only loaded in advance (e.g. by the warm-up)
+    def load_members(self, b_use=True):
+        if b_use and not self._b_used:
+            self._b_used = True
+            self._collector_reference.class_used(self)
+        location = self._members_location
+        if location is not None:
+            members = self._collector_reference.shared_members(self._source_stamp, self._file_name)
+            if members is not None:
+                self.set_members(*members)
+            else:
+                location[0].load_members_of(self)
+                self._collector_reference.share_members(self)
 
     # returns all _functions that were stored inside this class. To make sure it was parsed before, use has_parsed()
     def get_functions(self):
+        self.load_members()
         return self._functions
 
     def get_function(self, name):
+        self.load_members()
         for f in self._functions:
             if name.lower() == f.function_name().lower():
                 return f
@@ -539,9 +770,11 @@ class ClassReference:
         return None
 
     def get_variables(self):
+        self.load_members()
         return self._variables + self._consts + self._structs
 
     def get_variable(self, name):
+        self.load_members()
         for v in self._variables:
             if name.lower() == v.name().lower():
                 return v
@@ -566,19 +799,19 @@ class ClassReference:
         self._parent_class_name = parent_class_name
         self._description = description
         self.link_to_parent()
+        self._collector_reference.class_changed(self)
 
     def parse_me(self):
         view = sublime.active_window().active_view()
-        self._collector_reference.add_function_collector_thread(self._file_name)  # create a new thread to search for relevant functions for this class
-        self._collector_reference.handle_threads(self._collector_reference._collector_threads, view)  # display progress bar
+        self._collector_reference.add_function_collector_thread(self._file_name, lambda: self._collector_reference.on_class_parsed(view))  # create a new thread to search for relevant functions for this class
+        self._collector_reference.show_progress(view)  # display progress bar
 
     def insert_dynamic_snippet(self, view):
         self.create_dynamic_tooltip(view)
         view.run_command("insert_snippet", {"contents": (Object_Name % {"name": self._name})})
 
     def create_dynamic_tooltip(self, view):
-        documentation = self.description()
-        print_to_panel(view, documentation)
+        show_documentation(view, self, self.description)
 
 
 class Struct:
@@ -626,8 +859,7 @@ class Struct:
         view.run_command("insert_snippet", {"contents": (Object_Name % {"name": self._name})})
 
     def create_dynamic_tooltip(self, view):
-        documentation = self.description()
-        print_to_panel(view, documentation + self._struct_line)
+        show_documentation(view, self, lambda: self.description() + self._struct_line)
 
 
 # class to store a function / event
@@ -725,7 +957,7 @@ class Function:
 
     def create_dynamic_tooltip(self, view):
         # documentation = self.description() + self.function_modifiers() + ("function" if self._b_is_function == 1 else "event") + self.return_type() + self.function_name() + "(" + self.arguments() + ")"
-        print_to_panel(view, self.description())
+        show_documentation(view, self, self.description)
 
 
 # stores variables
@@ -785,10 +1017,13 @@ class Variable:
         view.run_command("insert_snippet", {"contents": (Object_Name % {"name": self._name})})
 
     def create_dynamic_tooltip(self, view):
+        show_documentation(view, self, self.tooltip)
+
+    def tooltip(self):
         documentation = self.description()
         if documentation.strip() == "":
             documentation = self.declaration()
-        print_to_panel(view, documentation)
+        return documentation
 
 
 # stores CONST
@@ -835,8 +1070,7 @@ class Const:
         view.run_command("insert_snippet", {"contents": (Object_Name % {"name": self._name})})
 
     def create_dynamic_tooltip(self, view):
-        documentation = "const " + self.name() + " = " + self.value() + ";" + self.comment()
-        print_to_panel(view, documentation)
+        show_documentation(view, self, lambda: "const " + self.name() + " = " + self.value() + ";" + self.comment())
 
 
 # --------------------------------
@@ -0,0 +1,166 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Expression
+#-----------------------------------------------------------------------------------
+#
+#   Finds out what's left of the dot that is being completed (or of the word that is being looked up), e.g.
+#       Health = Pawn(Controller.GetPawn(1, "a)")).Weapons[i].    ->    Pawn(...) . Weapons[] .
+#   The line is scanned backwards from the cursor once, up to the start of the expression.
+#   Arguments and indexes are skipped (also strings and names inside of them), the result is a chain of segments
+#   that is resolved by UnrealData.get_class_from_chain.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+_word_chars = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+_openers = {")": "(", "]": "["}
+
+
+# one object of the chain:
+#   Foo             name
+#   Foo(...)        a function call or a cast (b_call), arguments holds the text between the parentheses
+#   Foo[i][j]       num_indexes is 2
+#   super(Actor)    a call of super, the arguments are the class name
+#   class'Foo'      a class literal (b_class_literal), the name is the class
+class Segment:
+    def __init__(self, name, b_call=False, arguments="", num_indexes=0, b_class_literal=False):
+        self.name = name
+        self.b_call = b_call
+        self.arguments = arguments
+        self.num_indexes = num_indexes
+        self.b_class_literal = b_class_literal
+
+    def is_super(self):
+        return self.name.lower() == "super"
+
+    # the word as it is looked up by UnrealData.get_object: the name, with [] for every index
+    def word(self):
+        return self.name.lower() + "[]" * self.num_indexes
+
+    def text(self):
+        if self.b_class_literal:
+            return "class'" + self.name + "'"
+        if self.is_super() and self.b_call:
+            return self.name + "(" + self.arguments.strip() + ")" + "[]" * self.num_indexes
+        return self.name + ("()" if self.b_call else "") + "[]" * self.num_indexes
+
+    def __repr__(self):
+        return self.text()
+
+
+# the objects left of a dot, from left to right. Empty if there's nothing (or nothing that can be resolved) left of the dot.
+class Expression:
+    def __init__(self, segments):
+        self.segments = segments
+
+    def __len__(self):
+        return len(self.segments)
+
+    # e.g. pawn().weapons[].  (lower case, like the text the old parser returned)
+    def text(self):
+        if not self.segments:
+            return ""
+        return ".".join([s.text() for s in self.segments]).lower() + "."
+
+    def __repr__(self):
+        return "Expression(%s)" % self.text()
+
+
+# returns the Expression left of the member that is being completed, i.e. in front of the last dot of text.
+# The word right of that dot (the part that's already typed) is ignored.
+# If text doesn't end with a dot (and a word), the expression is empty.
+def parse_context(text, end=None):
+    i = len(text) if end is None else end
+    while i > 0 and text[i - 1] in _word_chars:
+        i -= 1
+    i = _skip_spaces(text, i)
+    if i == 0 or text[i - 1] != '.':
+        return Expression([])
+    segments = []
+    i -= 1
+    while True:
+        segment, i = _parse_segment(text, _skip_spaces(text, i))
+        if segment is None:
+            return Expression([])
+        segments.append(segment)
+        i = _skip_spaces(text, i)
+        if i > 0 and text[i - 1] == '.':
+            i -= 1
+            continue
+        break
+    segments.reverse()
+    return Expression(segments)
+
+
+# parses the segment that ends at i. Returns (segment, start of the segment) or (None, i)
+def _parse_segment(text, i):
+    b_call, arguments, num_indexes = False, "", 0
+    # class'Foo'
+    if i > 0 and text[i - 1] == "'":
+        start = text.rfind("'", 0, i - 1)
+        j = k = _skip_spaces(text, start)
+        while j > 0 and text[j - 1] in _word_chars:
+            j -= 1
+        if start == -1 or text[j:k].lower() != "class":
+            return None, i
+        return Segment(text[start + 1:i - 1].strip(), b_class_literal=True), j
+    # calls and indexes, from right to left: Foo(a)[1][2]
+    while i > 0 and text[i - 1] in _openers:
+        start = _matching_opener(text, i - 1)
+        if start == -1:
+            return None, i
+        if text[i - 1] == ']':
+            num_indexes += 1
+        else:
+            # Foo(a)(b) isn't possible in UnrealScript
+            if b_call or num_indexes:
+                return None, i
+            b_call, arguments = True, text[start + 1:i - 1]
+        i = _skip_spaces(text, start)
+    j = i
+    while j > 0 and text[j - 1] in _word_chars:
+        j -= 1
+    if j == i or text[j] in "0123456789":
+        return None, i
+    return Segment(text[j:i], b_call, arguments, num_indexes), j
+
+
+# returns the position of the opening parenthesis (or bracket) for the closing one at i, or -1.
+# Strings and names ("...", '...') inside are skipped.
+def _matching_opener(text, i):
+    closers = []
+    while i >= 0:
+        c = text[i]
+        if c in _openers:
+            closers.append(_openers[c])
+        elif c == "(" or c == "[":
+            if not closers or closers.pop() != c:
+                return -1
+            if not closers:
+                return i
+        elif c == '"' or c == "'":
+            i = _string_start(text, i)
+            if i == -1:
+                return -1
+        i -= 1
+    return -1
+
+
+# returns the position of the quote that starts the string (or name) ending at i, or -1
+def _string_start(text, i):
+    quote = text[i]
+    i -= 1
+    while i >= 0:
+        if text[i] == quote:
+            # an escaped quote, \" (the backslash isn't escaped itself)
+            num_backslashes = 0
+            while i - num_backslashes - 1 >= 0 and text[i - num_backslashes - 1] == "\\":
+                num_backslashes += 1
+            if num_backslashes % 2 == 0:
+                return i
+        i -= 1
+    return -1
+
+
+def _skip_spaces(text, i):
+    while i > 0 and text[i - 1] in " \t":
+        i -= 1
+    return i
@@ -5,6 +5,7 @@
 #   Adds the go to declaration command.
 #   This will take you to the declaration of the word located under your courser.
 #   In log files this will take you to the corresponding line.
+#   With b_peek the declaration is only shown in a popup (read out of the file, without opening it).
 #
 # (c) Florian Zinggeler
 #-----------------------------------------------------------------------------------
@@ -16,11 +17,21 @@ import os
 ST3 = int(sublime.version()) > 3000
 if ST3:
     import UnrealScriptIDE.UnrealScriptIDEMain as USMain
+    import UnrealScriptIDE.UnrealScriptIDEExpression as USExpression
+    import UnrealScriptIDE.UnrealScriptIDESource as USSource
+    import UnrealScriptIDE.UnrealScriptIDEData as USData
+    import UnrealScriptIDE.UnrealScriptIDELog as USLog
 else:
     import UnrealScriptIDEMain as USMain
+    import UnrealScriptIDEExpression as USExpression
+    import UnrealScriptIDESource as USSource
+    import UnrealScriptIDEData as USData
+    import UnrealScriptIDELog as USLog
 
 last_location = None
 current_location = None
+# line offsets of recently peeked files
+source_lines = USSource.SourceLines()
 
 
 def is_unreal_log_file():
@@ -32,6 +43,16 @@ def is_unreal_log_file():
     return False
 
 
+# in multi-root mode, the definition gets opened inside the Src folder of the active file if the file is the same there.
+def in_active_root(file_name, active_file):
+    collector = []
+    if USMain.evt_m() is not None:
+        USMain.evt_m().get_collector_reference(collector.append)
+    if collector:
+        return collector[0].file_in_root_of(file_name, active_file)
+    return file_name
+
+
 ####################################################
 # Go to Declaration
 # -----------------
@@ -43,12 +64,16 @@ def is_unreal_log_file():
 
 # opens the definition of the current selected word.
 #  - if b_new_start_point is true, the current cursor position will be stored as a return point.
+#  - if b_peek is true, the definition is shown in a popup instead. It has a link to open the file.
 class UnrealGotoDefinitionCommand(sublime_plugin.TextCommand):
-    def run(self, edit, b_new_start_point=False, line_number=-1, filename=""):
+    def run(self, edit, b_new_start_point=False, line_number=-1, filename="", b_peek=False):
         if USMain.is_unrealscript_file():
             # open the file at line line_number if specified (gets called after it was calculated by the main instance)
             if line_number != -1 and filename != "":
-                self.open_file(filename, line_number, b_new_start_point)
+                if b_peek:
+                    self.peek(in_active_root(filename, self.view.file_name()), line_number)
+                else:
+                    self.open_file(in_active_root(filename, self.view.file_name()), line_number, b_new_start_point)
                 return
 
             # get selected word
@@ -80,17 +105,22 @@ class UnrealGotoDefinitionCommand(sublime_plugin.TextCommand):
                 left_line = ""
             else:
                 # get relevant part of the line
-                left_line = USMain.get_relevant_text(line)
+                left_line = USExpression.parse_context(line).text()
                 # print left_line
 
             # calculate where to go inside the main instance of my plug-in.
             # Then, call this command again with a filename and a line number.
-            USMain.evt_m().go_to_definition(left_line, word, line, b_new_start_point)
+            USMain.evt_m().go_to_definition(left_line, word, line, b_new_start_point, b_peek)
 
         elif is_unreal_log_file():  # self.view.file_name()
             line = self.view.substr(self.view.line(self.view.sel()[0]))
+            # sections extracted out of a log (see UnrealScriptIDELog) don't have a file name
+            log_file = self.view.file_name() or self.view.settings().get('unreal_log_file')
+            file_name, line_number = USLog.find_reference(line)
             split_line = re.split(r"\(|\)", line)   # line.split("()")
-            if len(split_line) > 1:
+            if file_name is not None:
+                self.open_file(USLog.resolve_reference(file_name, log_file), line_number, True)
+            elif len(split_line) > 1:
                 self.open_file(split_line[0], split_line[1], True)
             else:
                 self.view.set_status('UnrealScriptGotoDefinition', '"' + line + '" not found!')
@@ -102,7 +132,7 @@ class UnrealGotoDefinitionCommand(sublime_plugin.TextCommand):
         window = sublime.active_window()
 
         # save position, if we either didn't save any before, or b_new_start_point is set to true
-        if last_location is None or b_new_start_point:
+        if (last_location is None or b_new_start_point) and active_file is not None:
             # Save current position so we can return to it
             row, col = self.view.rowcol(self.view.sel()[0].begin())
             last_location = "%s:%d" % (active_file, row + 1)
@@ -118,3 +148,35 @@ class UnrealGotoDefinitionCommand(sublime_plugin.TextCommand):
             current_location = file_name
         else:
             self.view.set_status('UnrealScriptGotoDefinition', '"' + file_name + '" does not exist!')
+
+    # shows the declaration at line_number of file_name (with its documentation and a few lines after it) in a popup.
+    # Without popups (Sublime Text 2), it's shown in the helper panel.
+    def peek(self, file_name, line_number):
+        num_lines = sublime.load_settings('UnrealScriptIDE.sublime-settings').get('peek_context_lines', 10)
+        first_line, lines = source_lines.declaration(file_name, int(line_number), num_lines)
+        if not lines:
+            self.view.set_status('UnrealScriptGotoDefinition', '"' + file_name + '" does not exist!')
+            return
+        if not hasattr(self.view, "show_popup"):
+            USData.print_to_panel(self.view, "%s:%d\n\n%s" % (file_name, int(line_number), "\n".join(lines)))
+            return
+        self.view.show_popup(peek_html(file_name, int(line_number), first_line, lines), 0, -1, 900, 500,
+                             lambda href: self.on_peek_navigate(href, file_name, line_number))
+
+    def on_peek_navigate(self, href, file_name, line_number):
+        if href == "open":
+            self.view.hide_popup()
+            self.open_file(file_name, line_number, True)
+
+
+# the popup of a peeked declaration: a link to open the file, then the lines with the declaration line highlighted
+def peek_html(file_name, line_number, first_line, lines):
+    import html
+    rows = []
+    for i, line in enumerate(lines):
+        text = html.escape(line.replace("\t", "    "), False).replace("  ", "&nbsp; ") or "&nbsp;"
+        if first_line + i == line_number:
+            text = "<b>" + text + "</b>"
+        rows.append(text)
+    return ('<body id="unrealscript-peek"><div><a href="open">%s:%d</a></div><div style="font-family: monospace">%s</div></body>'
+            % (html.escape(os.path.basename(file_name), False), line_number, "<br>".join(rows)))
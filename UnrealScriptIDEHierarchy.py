@@ -0,0 +1,290 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Hierarchy
+#-----------------------------------------------------------------------------------
+#
+#   The class hierarchy of the project with the functions every class declares, for 'Show Overrides' and 'Show Implementers':
+#       - class -> parent class and child classes (interfaces extend interfaces)
+#       - interface -> the classes that implement it (class Foo extends Bar implements(IBaz);)
+#       - function name -> the classes that declare it
+#   The declarations are read with a few regular expressions (no parser), so every file of the project is known
+#   without parsing a single class. Overrides are looked up in the declarations of the child classes.
+#   The index is updated file by file by the FileIndexerThread and saved next to the classes cache.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import os
+import pickle
+import re
+import threading
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+    import UnrealScriptIDE.UnrealScriptIDEOutline as USOutline
+else:
+    import UnrealScriptIDECache as USCache
+    import UnrealScriptIDEOutline as USOutline
+
+INDEX_FILE_NAME = 'hierarchy_index.obj'
+# increase this if the format of the saved index changes
+HIERARCHY_VERSION = 1
+
+# strings are kept, so // inside of them isn't a comment
+_comment_regex = re.compile(r"\"(?:\\.|[^\"\\\n])*\"|//[^\n]*|/\*.*?(?:\*/|\Z)", re.DOTALL)
+_not_newline_regex = re.compile(r"[^\n]")
+_header_regex = re.compile(r"\b(class|interface)\s+(\w+)([^;]*);", re.IGNORECASE)
+_extends_regex = re.compile(r"\bextends\s+(\w+)", re.IGNORECASE)
+_implements_regex = re.compile(r"\bimplements\s*\(([^)]*)\)", re.IGNORECASE)
+# [modifiers] function|event [return type] Name(
+_function_regex = re.compile(r"^[ \t]*(?:\w+(?:\([^)\n]*\))?[ \t]+)*?(function|event)[ \t]+(?:[\w.]+(?:<[^>\n]*>)?[ \t]+)?(\w+)[ \t]*\(",
+                             re.IGNORECASE | re.MULTILINE)
+
+
+# replaces the comments of text with spaces, so that positions and line numbers stay the same
+def strip_comments(text):
+    def blank(m):
+        token = m.group(0)
+        return token if token[0] == '"' else _not_newline_regex.sub(" ", token)
+    return _comment_regex.sub(blank, text)
+
+
+# returns (parent class, b_interface, [implemented interfaces], [(function name, state, line number, declaration), ...])
+def extract_hierarchy(text):
+    code = strip_comments(text)
+    parent, b_interface, interfaces = "", False, []
+    match = _header_regex.search(code)
+    if match:
+        b_interface = match.group(1).lower() == "interface"
+        extends = _extends_regex.search(match.group(3))
+        parent = extends.group(1) if extends else ""
+        for names in _implements_regex.findall(match.group(3)):
+            interfaces += [name.strip() for name in names.split(",") if name.strip()]
+    states = [(b.start, b.end, b.name) for b in USOutline.scan(code)[0] if b.kind == USOutline.STATE]
+    functions = []
+    for m in _function_regex.finditer(code):
+        state = ""
+        for begin, end, name in states:
+            if begin <= m.start(2) < end:
+                state = name
+        line_number = code.count('\n', 0, m.start(2)) + 1
+        line_end = code.find('\n', m.start(2))
+        declaration = code[code.rfind('\n', 0, m.start(2)) + 1:line_end if line_end != -1 else len(code)].strip()
+        functions.append((m.group(2), state, line_number, declaration))
+    return parent, b_interface, interfaces, functions
+
+
+class HierarchyIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # filename -> (mtime, class name, parent class, b_interface, interfaces, functions)
+        self._files = {}
+        # all of these are lower case
+        # class -> filename
+        self._classes = {}
+        # class -> child classes (and interfaces)
+        self._children = {}
+        # interface -> classes that implement it directly
+        self._implementers = {}
+        # function name -> classes that declare it
+        self._declarers = {}
+        self.b_changed = False
+
+    # ==============================
+    # File index interface (see FileIndexerThread)
+    # ==============================
+
+    def is_up_to_date(self, filename, mtime):
+        entry = self._files.get(filename)
+        return entry is not None and entry[0] == mtime
+
+    def files(self):
+        with self._lock:
+            return list(self._files.keys())
+
+    def update_file(self, filename, mtime, text):
+        class_name = os.path.basename(filename).split('.')[0]
+        parent, b_interface, interfaces, functions = extract_hierarchy(text)
+        with self._lock:
+            self._remove_file(filename)
+            self._add_file(filename, (mtime, class_name, parent, b_interface, interfaces, functions))
+            self.b_changed = True
+
+    def remove_file(self, filename):
+        with self._lock:
+            if filename in self._files:
+                self._remove_file(filename)
+                self.b_changed = True
+
+    def _add_file(self, filename, entry):
+        mtime, class_name, parent, b_interface, interfaces, functions = entry
+        key = class_name.lower()
+        self._files[filename] = entry
+        self._classes[key] = filename
+        if parent:
+            self._children.setdefault(parent.lower(), set()).add(key)
+        for interface in interfaces:
+            self._implementers.setdefault(interface.lower(), set()).add(key)
+        for name, state, line_number, declaration in functions:
+            self._declarers.setdefault(name.lower(), set()).add(key)
+
+    def _remove_file(self, filename):
+        entry = self._files.pop(filename, None)
+        if entry is None:
+            return
+        mtime, class_name, parent, b_interface, interfaces, functions = entry
+        key = class_name.lower()
+        if self._classes.get(key) == filename:
+            del self._classes[key]
+        for table, names in ((self._children, [parent] if parent else []), (self._implementers, interfaces),
+                             (self._declarers, [f[0] for f in functions])):
+            for name in names:
+                classes = table.get(name.lower())
+                if classes is not None:
+                    classes.discard(key)
+                    if not classes:
+                        del table[name.lower()]
+
+    def save(self, path):
+        USCache.save_index(self, path, lambda: pickle.dumps((HIERARCHY_VERSION, self._files), 2))
+
+    # loads the index from path. Returns False if there is no (compatible) index.
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                version, files = pickle.load(f)
+        except Exception as e:
+            print("couldn't load ", path, ": ", e)
+            return False
+        if version != HIERARCHY_VERSION:
+            return False
+        with self._lock:
+            self.__init__()
+            for filename, entry in files.items():
+                self._add_file(filename, entry)
+        return True
+
+    # ==============================
+    # Queries
+    # all of them return declarations as (class name, file name, line number, state, declaration)
+    # ==============================
+
+    def _entry(self, class_name):
+        filename = self._classes.get(class_name.lower())
+        return self._files[filename] if filename is not None else None
+
+    # returns true if a class of the project declares a function with that name
+    def is_function(self, name):
+        return name.lower() in self._declarers
+
+    # returns true if class_name is an interface
+    def is_interface(self, class_name):
+        with self._lock:
+            entry = self._entry(class_name)
+        return entry is not None and entry[3]
+
+    # the parent classes of class_name, the direct parent first (lower case)
+    def _ancestors(self, class_name):
+        ancestors = []
+        entry = self._entry(class_name)
+        while entry is not None and entry[2] and entry[2].lower() not in ancestors:
+            ancestors.append(entry[2].lower())
+            entry = self._entry(entry[2])
+        return ancestors
+
+    # all child classes of class_name with their depth below it: [(class, depth), ...] (lower case)
+    def _descendants(self, class_name):
+        descendants = []
+        level = [class_name.lower()]
+        depth = 0
+        seen = set(level)
+        while level:
+            depth += 1
+            next_level = []
+            for c in level:
+                for child in sorted(self._children.get(c, ())):
+                    if child not in seen:
+                        seen.add(child)
+                        descendants.append((child, depth))
+                        next_level.append(child)
+            level = next_level
+        return descendants
+
+    # the declarations of function in class_name (in the class and in its states)
+    def _declarations(self, class_name, function):
+        entry = self._entry(class_name)
+        if entry is None:
+            return []
+        key = function.lower()
+        return [(entry[1], self._classes[class_name.lower()], line_number, state, declaration)
+                for name, state, line_number, declaration in entry[5] if name.lower() == key]
+
+    # returns the declaration of function that class_name overrides, i.e. the one of the nearest parent class, or None
+    def overridden(self, class_name, function):
+        with self._lock:
+            declarers = self._declarers.get(function.lower(), ())
+            for ancestor in self._ancestors(class_name):
+                if ancestor in declarers:
+                    return self._declarations(ancestor, function)[0]
+        return None
+
+    # returns (base class, [(declaration, depth below the base), ...]):
+    # the base class is class_name if it declares function, else the nearest parent class that does.
+    # The declarations are the ones of the base class and of all of its child classes that override function.
+    def overrides(self, class_name, function):
+        with self._lock:
+            declarers = self._declarers.get(function.lower(), set())
+            base = class_name.lower()
+            if base not in declarers:
+                base = None
+                for ancestor in self._ancestors(class_name):
+                    if ancestor in declarers:
+                        base = ancestor
+                        break
+                if base is None:
+                    return None, []
+            result = [(d, 0) for d in self._declarations(base, function)]
+            for child, depth in self._descendants(base):
+                if child in declarers:
+                    result += [(d, depth) for d in self._declarations(child, function)]
+            return self._entry(base)[1], result
+
+    # returns all classes that implement interface: directly, through a parent class or through an interface
+    # that extends interface. [(class name, file name, b_direct), ...]
+    def implementers(self, interface):
+        with self._lock:
+            interfaces = [interface.lower()] + [c for c, depth in self._descendants(interface) if self._entry(c) and self._entry(c)[3]]
+            direct = set()
+            for i in interfaces:
+                direct |= self._implementers.get(i, set())
+            classes = set(direct)
+            for c in direct:
+                classes |= set([child for child, depth in self._descendants(c)])
+            result = []
+            for c in classes:
+                entry = self._entry(c)
+                if entry is not None:
+                    result.append((entry[1], self._classes[c], c in direct))
+        result.sort(key=lambda r: (not r[2], r[0].lower()))
+        return result
+
+    # returns the implementations of the function of interface: for every class implementing it, the declaration
+    # of the class itself or of its nearest parent class. [(declaration, b_inherited), ...]
+    def implementations(self, interface, function):
+        result = []
+        for class_name, filename, b_direct in self.implementers(interface):
+            with self._lock:
+                declarations = self._declarations(class_name, function)
+                b_inherited = not declarations
+                if b_inherited:
+                    declarers = self._declarers.get(function.lower(), ())
+                    for ancestor in self._ancestors(class_name):
+                        if ancestor in declarers:
+                            declarations = self._declarations(ancestor, function)
+                            break
+            if not b_inherited or b_direct:
+                result += [(d, b_inherited) for d in declarations[:1]]
+        return result
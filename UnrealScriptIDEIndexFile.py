@@ -0,0 +1,647 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Index File
+#-----------------------------------------------------------------------------------
+#
+#   Reads and writes the classes cache (all classes with their functions, variables, consts and structs).
+#   Replaces pickling the ClassReference objects, which also pickled the plug-in instance and
+#   the whole parent / child graph and could silently load objects of an older plug-in version.
+#
+#   Layout (all numbers are little endian uint32):
+#       header:             magic, format version, flags, generation, plug-in version, Src root, length of the classes section
+#       classes section:    string table + one flat record per class (optionally zlib compressed)
+#       members section:    one block per parsed class (every block optionally zlib compressed)
+#   A members block contains its own string table and one flat record per member.
+#   Links between classes are not stored, they are rebuilt after loading (see UnrealData.link_classes).
+#   The file is memory mapped and the members of a class are only decoded when they are first used.
+#   Changes are appended to a journal and only from time to time merged into the index (see ClassesCache).
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import array
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDEData as USData
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+    import queue
+else:
+    import UnrealScriptIDEData as USData
+    import UnrealScriptIDECache as USCache
+    import Queue as queue
+
+# the current classes cache and the old pickled one (gets migrated)
+CACHE_FILE_NAME = "classes_index.bin"
+LEGACY_CACHE_FILE_NAME = "classes_cache.obj"
+
+MAGIC = b"USIDX\x00\x00\x00"
+# increase this if the layout changes. Files of another version get rebuilt.
+FORMAT_VERSION = 3
+# increase this with every release that changes what the parser extracts.
+PLUGIN_VERSION = "1.3.0"
+
+FLAG_COMPRESSED = 1
+
+# class record: name, parent class name, description, file name, was parsed, members offset, members length,
+#               source size, source mtime (low, high), source hash
+CLASS_RECORD_WIDTH = 11
+# member record: kind, name, a, b, c, flag, line number, file name, description, owner
+MEMBER_RECORD_WIDTH = 10
+KIND_FUNCTION, KIND_VARIABLE, KIND_CONST, KIND_STRUCT, KIND_STRUCT_VARIABLE = range(5)
+NO_OWNER = 0xFFFFFFFF
+
+
+class IndexFileError(Exception):
+    pass
+
+
+def _to_bytes(text):
+    if isinstance(text, bytes):
+        return text
+    return text.encode("utf-8", "replace")
+
+
+def _to_text(data):
+    if ST3:
+        return data.decode("utf-8", "replace")
+    return data
+
+
+def _uint32_array(values=None):
+    a = array.array('I')
+    if a.itemsize != 4:
+        a = array.array('L')
+    if values:
+        a.extend(values)
+    return a
+
+
+def _array_to_bytes(a):
+    if sys.byteorder == 'big':
+        a = array.array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes() if ST3 else a.tostring()
+
+
+def _array_from_bytes(data, count):
+    a = _uint32_array()
+    data = data[:count * a.itemsize]
+    if ST3:
+        a.frombytes(data)
+    else:
+        a.fromstring(data)
+    if sys.byteorder == 'big':
+        a.byteswap()
+    return a
+
+
+# collects strings and hands out their index, every string is only stored once.
+class StringTable:
+    def __init__(self):
+        self._index = {}
+        self._strings = []
+
+    def add(self, text):
+        if text is None:
+            text = ""
+        i = self._index.get(text)
+        if i is None:
+            i = len(self._strings)
+            self._index[text] = i
+            self._strings.append(text)
+        return i
+
+    # count, offsets (count + 1), utf-8 blob
+    def to_bytes(self):
+        encoded = [_to_bytes(s) for s in self._strings]
+        offsets, pos = [], 0
+        for e in encoded:
+            offsets.append(pos)
+            pos += len(e)
+        offsets.append(pos)
+        return struct.pack("<I", len(encoded)) + _array_to_bytes(_uint32_array(offsets)) + b"".join(encoded)
+
+
+# returns the list of strings and the position after the string table
+def read_string_table(data, pos=0):
+    count = struct.unpack_from("<I", data, pos)[0]
+    pos += 4
+    offsets = _array_from_bytes(data[pos:pos + (count + 1) * 4], count + 1)
+    pos += (count + 1) * 4
+    blob = data[pos:pos + offsets[-1]]
+    strings = [_to_text(blob[offsets[i]:offsets[i + 1]]) for i in range(count)]
+    return strings, pos + offsets[-1]
+
+
+def _pack_string(text):
+    data = _to_bytes(text)
+    return struct.pack("<I", len(data)) + data
+
+
+def _unpack_string(data, pos):
+    length = struct.unpack_from("<I", data, pos)[0]
+    return _to_text(data[pos + 4:pos + 4 + length]), pos + 4 + length
+
+
+# ==============================
+# Members
+# ==============================
+
+# returns the serialized members of a parsed class.
+# map_file_name can be used to change the stored file names (e.g. to make them relative).
+def encode_members(my_class, map_file_name=None):
+    # saving the class doesn't mean it's used (see UnrealData.class_used)
+    my_class.load_members(False)
+    strings = StringTable()
+    records = []
+
+    def add(kind, name, a, b, c, flag, line_number, file_name, description, owner=NO_OWNER):
+        if map_file_name is not None:
+            file_name = map_file_name(file_name)
+        records.extend([kind, strings.add(name), strings.add(a), strings.add(b), strings.add(c), flag,
+                        line_number, strings.add(file_name), strings.add(description), owner])
+
+    for f in my_class._functions:
+        add(KIND_FUNCTION, f._function_name, f._function_modifiers, f._return_type, f._arguments, 1 if f._b_is_function else 0,
+            f._line_number, f._file_name, f._description)
+    for v in my_class._variables:
+        add(KIND_VARIABLE, v._name, "\n".join(v._variable_modifiers), v._comment, "", 0, v._line_number, v._file_name, v._description)
+    for c in my_class._consts:
+        add(KIND_CONST, c._name, c._value, c._comment, "", 0, c._line_number, c._file_name, c._description)
+    for s in my_class._structs:
+        owner = len(records) // MEMBER_RECORD_WIDTH
+        add(KIND_STRUCT, s._name, s._struct_line, "", "", 0, s._line_number, s._file_name, s._description)
+        for v in s.get_variables():
+            add(KIND_STRUCT_VARIABLE, v._name, "\n".join(v._variable_modifiers), v._comment, "", 0, v._line_number, v._file_name, v._description, owner)
+
+    return strings.to_bytes() + struct.pack("<I", len(records) // MEMBER_RECORD_WIDTH) + _array_to_bytes(_uint32_array(records))
+
+
+def _split_modifiers(text):
+    if text == "":
+        return []
+    return text.split("\n")
+
+
+# returns (functions, variables, consts, structs) out of a serialized members block
+# map_file_name is applied to all file names (the opposite of the one given to encode_members).
+def decode_members(data, map_file_name=None):
+    strings, pos = read_string_table(data)
+    if map_file_name is not None:
+        file_names = {}
+    count = struct.unpack_from("<I", data, pos)[0]
+    records = _array_from_bytes(data[pos + 4:], count * MEMBER_RECORD_WIDTH)
+    functions, variables, consts, structs = [], [], [], []
+    # struct record index -> (struct, its variables)
+    struct_owners = {}
+    for i in range(count):
+        kind, name, a, b, c, flag, line_number, file_name, description, owner = records[i * MEMBER_RECORD_WIDTH:(i + 1) * MEMBER_RECORD_WIDTH]
+        if map_file_name is not None and file_name not in file_names:
+            file_names[file_name] = True
+            strings[file_name] = map_file_name(strings[file_name])
+        if kind == KIND_FUNCTION:
+            functions.append(USData.Function(strings[a], strings[b], strings[name], strings[c], line_number, strings[file_name], strings[description], flag))
+        elif kind == KIND_VARIABLE:
+            variables.append(USData.Variable(_split_modifiers(strings[a]), strings[name], strings[b], line_number, strings[file_name], strings[description]))
+        elif kind == KIND_CONST:
+            consts.append(USData.Const(strings[name], strings[a], strings[b], line_number, strings[file_name], strings[description]))
+        elif kind == KIND_STRUCT:
+            s = USData.Struct(strings[name], strings[a], line_number, strings[file_name], strings[description])
+            structs.append(s)
+            struct_owners[i] = (s, [])
+        elif kind == KIND_STRUCT_VARIABLE and owner in struct_owners:
+            struct_owners[owner][1].append(USData.Variable(_split_modifiers(strings[a]), strings[name], strings[b], line_number, strings[file_name], strings[description]))
+    for s, struct_variables in struct_owners.values():
+        if struct_variables:
+            s.save_variables(struct_variables)
+    return functions, variables, consts, structs
+
+
+# the source stamp as record fields: size, mtime (low, high), hash
+def _pack_stamp(stamp, strings):
+    if stamp is None:
+        return [0, 0, 0, strings.add("")]
+    return [stamp[0] & 0xFFFFFFFF, stamp[1] & 0xFFFFFFFF, (stamp[1] >> 32) & 0xFFFFFFFF, strings.add(stamp[2])]
+
+
+def _unpack_stamp(size, mtime_low, mtime_high, stamp_hash):
+    if stamp_hash == "":
+        return None
+    return (size, mtime_low | (mtime_high << 32), stamp_hash)
+
+
+def _compress_block(data, b_compress):
+    if b_compress:
+        return zlib.compress(data, 1)
+    return data
+
+
+def _decompress_block(data, b_compress):
+    if b_compress:
+        return zlib.decompress(data)
+    return data
+
+
+# ==============================
+# Index file
+# ==============================
+
+# returns the content of the index file for all classes and where the members of every parsed class are:
+# (data, [(class, offset, length), ...])
+# Classes whose members weren't loaded yet are copied over from their index file without decoding them.
+def build_index(classes, src_root, generation, b_compress=True, map_file_name=None):
+    strings = StringTable()
+    records = []
+    blocks = []
+    locations = []
+    members_length = 0
+    for c in classes:
+        block = None
+        if c.has_parsed():
+            with _mapping_lock:
+                location = c.members_location()
+                if location is not None and location[0].is_compressed() == b_compress and not location[0].maps_file_names() and map_file_name is None:
+                    block = location[0].members_block(location[1], location[2])
+            if block is None:
+                block = _compress_block(encode_members(c, map_file_name), b_compress)
+            offset, length = members_length, len(block)
+            blocks.append(block)
+            locations.append((c, offset, length))
+            members_length += length
+        else:
+            offset, length = 0, 0
+        file_name = c.file_name() if map_file_name is None else map_file_name(c.file_name())
+        records.extend([strings.add(c.name()), strings.add(c.parent_class()), strings.add(c.description()), strings.add(file_name),
+                        1 if block is not None else 0, offset, length])
+        records.extend(_pack_stamp(c.source_stamp(), strings))
+
+    classes_section = strings.to_bytes() + struct.pack("<II", len(classes), CLASS_RECORD_WIDTH) + _array_to_bytes(_uint32_array(records))
+    classes_section = _compress_block(classes_section, b_compress)
+
+    header = MAGIC + struct.pack("<III", FORMAT_VERSION, FLAG_COMPRESSED if b_compress else 0, generation)
+    header += _pack_string(PLUGIN_VERSION) + _pack_string(src_root) + struct.pack("<I", len(classes_section))
+    return header + classes_section + b"".join(blocks), locations
+
+
+# reads the header. Throws an IndexFileError if the file is not compatible.
+# returns (flags, generation, position of the classes section, length of the classes section)
+def read_header(data, src_root):
+    if data[:len(MAGIC)] != MAGIC:
+        raise IndexFileError("not a classes cache")
+    version, flags, generation = struct.unpack_from("<III", data, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise IndexFileError("format version %d, expected %d" % (version, FORMAT_VERSION))
+    plugin_version, pos = _unpack_string(data, len(MAGIC) + 12)
+    if plugin_version != PLUGIN_VERSION:
+        raise IndexFileError("written by plug-in version %s" % plugin_version)
+    root, pos = _unpack_string(data, pos)
+    if root.lower() != src_root.lower():
+        raise IndexFileError("written for another Src folder: %s" % root)
+    length = struct.unpack_from("<I", data, pos)[0]
+    return flags, generation, pos + 4, length
+
+
+# held while members get read out of a mapping and while a mapping gets replaced
+_mapping_lock = threading.RLock()
+
+
+# the memory mapped classes cache.
+# Only the classes section gets read at startup, the members of a class are decoded
+# out of the mapping the first time they are needed (see ClassReference.load_members).
+class IndexFile:
+    # map_file_name is applied to all file names that are read (see build_index)
+    def __init__(self, path, src_root, map_file_name=None):
+        self._path = path
+        self._src_root = src_root
+        self._map_file_name = map_file_name
+        self._file = None
+        self._data = None
+        self.reopen()
+
+    def reopen(self):
+        self._file = open(self._path, 'rb')
+        try:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                raise IndexFileError("empty classes cache")
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                self._flags, self._generation, self._classes_start, self._classes_length = read_header(self._data, self._src_root)
+            except (struct.error, ValueError) as e:
+                raise IndexFileError("corrupt classes cache: %s" % e)
+        except Exception:
+            self.close()
+            raise
+        self._members_start = self._classes_start + self._classes_length
+
+    def close(self):
+        with _mapping_lock:
+            if self._data is not None:
+                self._data.close()
+                self._data = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def is_compressed(self):
+        return bool(self._flags & FLAG_COMPRESSED)
+
+    def generation(self):
+        return self._generation
+
+    def maps_file_names(self):
+        return self._map_file_name is not None
+
+    # returns all classes in the file, linked to collector (but not to each other).
+    # if b_lazy is False, the members of all classes get decoded right away.
+    def read_classes(self, collector, b_lazy=True):
+        try:
+            section = _decompress_block(self._data[self._classes_start:self._members_start], self.is_compressed())
+            strings, pos = read_string_table(section)
+            count, width = struct.unpack_from("<II", section, pos)
+            records = _array_from_bytes(section[pos + 8:], count * width)
+            classes = []
+            for i in range(count):
+                name, parent, description, file_name, b_parsed, offset, length, size, mtime_low, mtime_high, stamp_hash = records[i * width:i * width + CLASS_RECORD_WIDTH]
+                file_name = strings[file_name] if self._map_file_name is None else self._map_file_name(strings[file_name])
+                c = USData.ClassReference(strings[name], strings[parent], strings[description], file_name, collector)
+                c.set_source_stamp(_unpack_stamp(size, mtime_low, mtime_high, strings[stamp_hash]))
+                if b_parsed:
+                    if b_lazy:
+                        c.set_members_location((self, offset, length))
+                    else:
+                        c.set_members(*self.load_members(offset, length))
+                classes.append(c)
+            return classes
+        except (struct.error, zlib.error, IndexError, ValueError) as e:
+            raise IndexFileError("corrupt classes cache: %s" % e)
+
+    # the raw (maybe compressed) members block
+    def members_block(self, offset, length):
+        return self._data[self._members_start + offset:self._members_start + offset + length]
+
+    # returns (functions, variables, consts, structs) of the members block
+    def load_members(self, offset, length):
+        return decode_members(_decompress_block(self.members_block(offset, length), self.is_compressed()), self._map_file_name)
+
+    # decodes the members of my_class, if they weren't loaded yet.
+    # The location is read under the lock, as the mapping could have been replaced in the meantime.
+    def load_members_of(self, my_class):
+        with _mapping_lock:
+            location = my_class.members_location()
+            if location is None:
+                return
+            members = location[0].load_members(location[1], location[2])
+        my_class.set_members(*members)
+
+
+# ==============================
+# Journal
+# ==============================
+#
+#   Changed classes are appended to the journal instead of rewriting the whole index:
+#       header:     magic, format version, generation of the index it belongs to
+#       records:    length, crc32, class record (name, parent class, description, file name, source stamp, was parsed, members block)
+#   When loading, the records are applied on top of the index. A torn record at the end (crash while writing)
+#   fails its checksum and is ignored together with everything after it.
+#   A journal of another generation belongs to an older index and is ignored as well.
+
+JOURNAL_FILE_NAME = "classes_journal.bin"
+JOURNAL_MAGIC = b"USJRN\x00\x00\x00"
+
+
+def journal_header(generation):
+    return JOURNAL_MAGIC + struct.pack("<II", FORMAT_VERSION, generation)
+
+
+def encode_class(my_class):
+    data = _pack_string(my_class.name()) + _pack_string(my_class.parent_class())
+    data += _pack_string(my_class.description()) + _pack_string(my_class.file_name())
+    stamp = my_class.source_stamp() or (0, 0, "")
+    data += struct.pack("<III", stamp[0] & 0xFFFFFFFF, stamp[1] & 0xFFFFFFFF, (stamp[1] >> 32) & 0xFFFFFFFF) + _pack_string(stamp[2])
+    if my_class.has_parsed():
+        return data + struct.pack("<I", 1) + encode_members(my_class)
+    return data + struct.pack("<I", 0)
+
+
+def decode_class(data, collector):
+    name, pos = _unpack_string(data, 0)
+    parent, pos = _unpack_string(data, pos)
+    description, pos = _unpack_string(data, pos)
+    file_name, pos = _unpack_string(data, pos)
+    size, mtime_low, mtime_high = struct.unpack_from("<III", data, pos)
+    stamp_hash, pos = _unpack_string(data, pos + 12)
+    c = USData.ClassReference(name, parent, description, file_name, collector)
+    c.set_source_stamp(_unpack_stamp(size, mtime_low, mtime_high, stamp_hash))
+    if struct.unpack_from("<I", data, pos)[0]:
+        c.set_members(*decode_members(data[pos + 4:]))
+    return c
+
+
+def _frame(payload):
+    return struct.pack("<II", len(payload), zlib.crc32(payload) & 0xFFFFFFFF) + payload
+
+
+# appends the class records to the journal and makes sure they are on the disk
+def append_journal(path, generation, payloads):
+    if not os.path.exists(path):
+        USCache.write_file_atomic(path, journal_header(generation))
+    with open(path, 'ab') as f:
+        f.write(b"".join([_frame(p) for p in payloads]))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# returns all intact class records of the journal, if it belongs to the given generation:
+# (records, False if the journal is cut off or belongs to another generation)
+def read_journal(path, generation):
+    if not os.path.exists(path):
+        return [], True
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(JOURNAL_MAGIC) + 8] != journal_header(generation):
+        return [], False
+    payloads = []
+    pos = len(JOURNAL_MAGIC) + 8
+    while pos + 8 <= len(data):
+        length, crc = struct.unpack_from("<II", data, pos)
+        payload = data[pos + 8:pos + 8 + length]
+        if len(payload) != length or zlib.crc32(payload) & 0xFFFFFFFF != crc:
+            print("classes journal is cut off, ignoring the rest")
+            return payloads, False
+        payloads.append(payload)
+        pos += 8 + length
+    return payloads, pos == len(data)
+
+
+# ==============================
+# Classes cache
+# ==============================
+
+# runs the jobs of the classes cache one after another, so the files are never written concurrently
+class CacheWriterThread(threading.Thread):
+    def __init__(self, jobs):
+        self.jobs = jobs
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                job()
+            except Exception as e:
+                print("couldn't save the classes cache: ", e)
+
+
+# keeps the classes cache of a Src folder up to date:
+#   - changed classes are collected and saved after SAVE_DELAY_MS without further changes
+#   - a few changed classes are appended to the journal
+#   - if the journal got too long (or there is no index yet) the index gets rewritten in the background (compaction)
+# All files are written by the CacheWriterThread and replaced atomically.
+class ClassesCache:
+    SAVE_DELAY_MS = 2000
+    MAX_JOURNAL_RECORDS = 300
+
+    # src_root identifies the indexed Src folders (all of them in multi-root mode), the cache is only used for the same ones.
+    def __init__(self, src_folder, collector, src_root=None):
+        self._src_root = src_root or src_folder
+        self._collector = collector
+        self._path = os.path.join(src_folder, CACHE_FILE_NAME)
+        self._journal_path = os.path.join(src_folder, JOURNAL_FILE_NAME)
+        self._index_file = None
+        # lowercase filename -> class, changed since the last save. Classes change inside the parser threads.
+        self._changed = {}
+        self._lock = threading.Lock()
+        self._b_compact = True
+        self._journal_records = 0
+        self._save_requests = 0
+        # only used by the writer thread
+        self._generation = 0
+        self._jobs = queue.Queue()
+        self._writer = None
+
+    # loads all classes out of the index and applies the journal.
+    # Throws an IndexFileError if there is no compatible cache.
+    def load(self):
+        self.close()
+        self._index_file = IndexFile(self._path, self._src_root)
+        classes = self._index_file.read_classes(self._collector)
+        self._generation = self._index_file.generation()
+
+        payloads, b_intact = read_journal(self._journal_path, self._generation)
+        if payloads:
+            positions = {}
+            for i, c in enumerate(classes):
+                positions[c.file_name().lower()] = i
+            for payload in payloads:
+                try:
+                    c = decode_class(payload, self._collector)
+                except (struct.error, zlib.error, IndexError, ValueError) as e:
+                    raise IndexFileError("corrupt classes journal: %s" % e)
+                i = positions.get(c.file_name().lower())
+                if i is None:
+                    positions[c.file_name().lower()] = len(classes)
+                    classes.append(c)
+                else:
+                    classes[i] = c
+        with self._lock:
+            self._changed = {}
+        self._journal_records = len(payloads)
+        # new records can't be appended behind a broken journal
+        self._b_compact = not b_intact
+        return classes
+
+    def close(self):
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+
+    # all classes are parsed anew, the next save rewrites the index
+    def reset(self):
+        with self._lock:
+            self._changed = {}
+        self._b_compact = True
+
+    def class_changed(self, my_class):
+        with self._lock:
+            self._changed[my_class.file_name().lower()] = my_class
+
+    # saves the changes after SAVE_DELAY_MS, unless there are new requests in the meantime.
+    def schedule_save(self):
+        self._save_requests += 1
+        request = self._save_requests
+        sublime.set_timeout(lambda: self._on_save_timer(request), self.SAVE_DELAY_MS)
+
+    def _on_save_timer(self, request):
+        if request == self._save_requests:
+            self.save()
+
+    # hands the changed classes to the writer thread
+    def save(self):
+        with self._lock:
+            changed = list(self._changed.values())
+            self._changed = {}
+        if self._b_compact or self._index_file is None or self._journal_records + len(changed) > self.MAX_JOURNAL_RECORDS:
+            self._b_compact = False
+            self._journal_records = 0
+            self._start_job(self._compact_job(list(self._collector._classes)))
+        elif changed:
+            self._journal_records += len(changed)
+            payloads = [encode_class(c) for c in changed]
+            self._start_job(lambda: append_journal(self._journal_path, self._generation, payloads))
+
+    def _start_job(self, job):
+        self._jobs.put(job)
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = CacheWriterThread(self._jobs)
+            self._writer.start()
+
+    # rewrites the index with all classes and starts a new, empty journal
+    def _compact_job(self, classes):
+        def job():
+            generation = self._generation + 1
+            data, locations = build_index(classes, self._src_root, generation)
+            temp_path = self._path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # the mapping is replaced on the main thread, as the classes get loaded from there
+            done = threading.Event()
+            result = []
+            sublime.set_timeout(lambda: self._replace_index(temp_path, locations, result, done), 0)
+            done.wait()
+            if result:
+                self._generation = generation
+                USCache.write_file_atomic(self._journal_path, journal_header(generation))
+        return job
+
+    def _replace_index(self, temp_path, locations, result, done):
+        try:
+            with _mapping_lock:
+                # a mapped file can't be replaced on Windows
+                old_index = self._index_file
+                if old_index is not None:
+                    old_index.close()
+                try:
+                    USCache.replace_file(temp_path, self._path)
+                    self._index_file = IndexFile(self._path, self._src_root)
+                except (IndexFileError, IOError, OSError) as e:
+                    print("couldn't replace the classes cache: ", e)
+                    if old_index is not None:
+                        old_index.reopen()
+                    return
+                # classes that still weren't loaded now load their members out of the new file
+                for c, offset, length in locations:
+                    if c.members_location() is not None:
+                        c.set_members_location((self._index_file, offset, length))
+                result.append(True)
+        finally:
+            done.set()
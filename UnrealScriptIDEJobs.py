@@ -0,0 +1,124 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Jobs
+#-----------------------------------------------------------------------------------
+#
+#   Keeps track of the background threads (parser threads, class collectors, ...).
+#   A finished thread posts an event to a queue that is dispatched on the main thread, where the callbacks of the
+#   thread and of its group are called. Nothing polls the threads: while jobs are running, only the progress
+#   indicator in the status bar is updated (every 100 ms), and when there are no jobs, nothing runs at all.
+#
+#   Jobs belong to groups, e.g. the threads parsing a file and all of its parent classes.
+#   Threads started from inside a job join the group of that job.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import threading
+
+PROGRESS_INTERVAL = 100
+
+
+# the callback of a group is called once all of its jobs are done
+class JobGroup:
+    def __init__(self, on_done=None):
+        self.on_done = on_done
+        self.num_running = 0
+
+
+class JobQueue:
+    def __init__(self, status_key="UnrealScriptAutocomplete", status_message="UnrealScriptAutocomplete is Parsing"):
+        self._lock = threading.Lock()
+        self._running = []
+        # callbacks of finished jobs, waiting for the main thread
+        self._events = []
+        self._b_dispatch_scheduled = False
+        # called on the main thread whenever the last job is done
+        self.on_idle = None
+        self._status_key = status_key
+        self._status_message = status_message
+        self._progress_view = None
+        self._progress_step = 0
+        self._b_animating = False
+
+    # starts the thread. on_done is called on the main thread when it's done.
+    # If group is None, the thread joins the group of the job that starts it (if any).
+    def start(self, thread, group=None, on_done=None):
+        if group is None:
+            group = getattr(threading.current_thread(), "job_group", None)
+        thread.job_group = group
+        run = thread.run
+
+        def run_job():
+            try:
+                run()
+            finally:
+                self._finished(thread, on_done)
+
+        thread.run = run_job
+        with self._lock:
+            self._running.append(thread)
+            if group is not None:
+                group.num_running += 1
+        thread.start()
+        return thread
+
+    def new_group(self, on_done=None):
+        return JobGroup(on_done)
+
+    # returns the threads that are still running
+    def running(self):
+        with self._lock:
+            return list(self._running)
+
+    def is_idle(self):
+        with self._lock:
+            return not self._running
+
+    # called by the finished thread
+    def _finished(self, thread, on_done):
+        with self._lock:
+            self._running.remove(thread)
+            if on_done is not None:
+                self._events.append(on_done)
+            group = thread.job_group
+            if group is not None:
+                group.num_running -= 1
+                if group.num_running == 0 and group.on_done is not None:
+                    self._events.append(group.on_done)
+            if not self._running and self.on_idle is not None and self.on_idle not in self._events:
+                # before the callbacks of the group
+                self._events.insert(0, self.on_idle)
+            if not self._events or self._b_dispatch_scheduled:
+                return
+            self._b_dispatch_scheduled = True
+        sublime.set_timeout(self._dispatch, 0)
+
+    # calls the callbacks of all finished jobs, on the main thread
+    def _dispatch(self):
+        with self._lock:
+            events, self._events = self._events, []
+            self._b_dispatch_scheduled = False
+        for callback in events:
+            try:
+                callback()
+            except Exception as e:
+                print("UnrealScriptIDE: job callback failed: ", e)
+
+    # animates a little activity indicator in the status bar of view while jobs are running
+    def show_progress(self, view):
+        self._progress_view = view
+        if not self._b_animating and not self.is_idle():
+            self._b_animating = True
+            self._animate()
+
+    def _animate(self):
+        view = self._progress_view
+        if self.is_idle():
+            self._b_animating = False
+            view.erase_status(self._status_key)
+            return
+        before = 7 - abs(7 - self._progress_step % 14)
+        after = 7 - before
+        self._progress_step += 1
+        view.set_status(self._status_key, '%s [%s=%s]' % (self._status_message, ' ' * before, ' ' * after))
+        sublime.set_timeout(self._animate, PROGRESS_INTERVAL)
@@ -0,0 +1,337 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Log
+#-----------------------------------------------------------------------------------
+#
+#   Navigation in large logs (Launch.log, build logs) without opening them:
+#       - the log is memory mapped and indexed in one pass: errors, warnings and file(line) references
+#       - 'UnrealScriptIDE: Open Log' lists them in a quick panel. A reference opens the source file,
+#         everything else opens the lines around it as a small extracted view.
+#   If the log grows (the game is still running), only the new part is indexed.
+#   The log isn't kept open, so it can still be written to.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import sublime_plugin
+import array
+import mmap
+import os
+import re
+import threading
+import time
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDEData as USData
+    import UnrealScriptIDE.UnrealScriptIDEPanel as USPanel
+    from UnrealScriptIDE.UnrealBuildSystem import show_quick_panel
+else:
+    import UnrealScriptIDEData as USData
+    import UnrealScriptIDEPanel as USPanel
+    from UnrealBuildSystem import show_quick_panel
+
+ERROR = 0
+WARNING = 1
+REFERENCE = 2
+KIND_NAMES = ["Error", "Warning", "Reference"]
+# at most this many entries are shown in the quick panel
+MAX_PANEL_ENTRIES = 5000
+# the start of the log that is compared to find out if it was replaced (it starts with the date and time)
+_HEAD_BYTES = 256
+
+# finds the lines that might be entries, they're checked with the regular expressions below
+_candidate_regex = re.compile(br"Error|Warning|Critical|\.uci?\(\d")
+_kind_regex = re.compile(r"\b(?:Script)?(?:(Error|Critical)|(Warning))\b")
+# C:\UDK\Development\Src\MyGame\Classes\MyPawn.uc(12) or MyPawn.uc(12)
+_reference_regex = re.compile(r"([A-Za-z]:[\\/][^:()\"<>|*?\r\n]*?\.uci?|[^\s:()\"<>|*?]+\.uci?)\((\d+)\)")
+
+
+# returns (kind, file name, line number) of a line of the log, or None if it's not an entry.
+# File name and line number are None if the line doesn't reference a file.
+def parse_line(line):
+    reference = _reference_regex.search(line)
+    kind = _kind_regex.search(line)
+    if kind is not None:
+        kind = ERROR if kind.group(1) else WARNING
+    elif reference is not None:
+        kind = REFERENCE
+    else:
+        return None
+    if reference is None:
+        return kind, None, None
+    return kind, reference.group(1), int(reference.group(2))
+
+
+# returns the file name and line number of the first file(line) reference in line, or (None, None)
+def find_reference(line):
+    reference = _reference_regex.search(line)
+    if reference is None:
+        return None, None
+    return reference.group(1), int(reference.group(2))
+
+
+# calls function with the memory mapped log, returns None if it can't be read
+def _with_log(path, function):
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return function(b"")
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (IOError, OSError, ValueError) as e:
+        print("couldn't read ", path, ": ", e)
+        return None
+    try:
+        return function(data)
+    finally:
+        data.close()
+
+
+class LogIndex:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        # the entries: offset of the line, line number and kind
+        self._offsets = array.array('L')
+        self._line_numbers = array.array('L')
+        self._kinds = array.array('b')
+        # entry -> (file name, line number) of the ones that reference a file
+        self._references = {}
+        # (size, mtime) of the indexed part, the offset up to which the log is indexed and the line number there
+        self._stamp = None
+        self._indexed = 0
+        self._indexed_lines = 1
+        # the first bytes and the inode of the indexed log, if they change the log was replaced
+        self._head = b""
+        self._inode = None
+        self.num_errors = 0
+        self.num_warnings = 0
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def is_up_to_date(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return self._stamp == (st.st_size, st.st_mtime)
+
+    # indexes the log, or only the part that was added since it was indexed last.
+    # Returns false if the log can't be read.
+    def update(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        with self._lock:
+            if st.st_size < self._indexed or st.st_ino != self._inode:
+                # the log was started over
+                self._clear()
+                self._inode = st.st_ino
+            stamp = (st.st_size, st.st_mtime)
+            if _with_log(self.path, self._scan) is None:
+                return False
+            self._stamp = stamp
+        return True
+
+    # indexes data from where it was indexed last up to its last complete line.
+    # If data doesn't start like the indexed log did, or the indexed part doesn't end with a line break anymore,
+    # the log was replaced (e.g. by a new session that has written more already) and it's indexed from the start.
+    def _scan(self, data):
+        if self._indexed and (data[:len(self._head)] != self._head or data[self._indexed - 1:self._indexed] != b"\n"):
+            inode = self._inode
+            self._clear()
+            self._inode = inode
+        if len(self._head) < _HEAD_BYTES:
+            self._head = data[:_HEAD_BYTES]
+        begin = self._indexed
+        end = data.rfind(b"\n", begin) + 1
+        if end <= begin:
+            return True
+        line_number = self._indexed_lines
+        position = begin
+        next_line = begin
+        for m in _candidate_regex.finditer(data, begin, end):
+            start = m.start()
+            if start < next_line:
+                continue
+            line_number += data[position:start].count(b"\n")
+            position = start
+            line_start = max(data.rfind(b"\n", begin, start) + 1, begin)
+            next_line = data.find(b"\n", start, end) + 1
+            entry = parse_line(data[line_start:next_line].decode('utf-8', 'replace'))
+            if entry is None:
+                continue
+            kind, file_name, file_line = entry
+            if file_name is not None:
+                self._references[len(self._offsets)] = (file_name, file_line)
+            self._offsets.append(line_start)
+            self._line_numbers.append(line_number)
+            self._kinds.append(kind)
+            if kind == ERROR:
+                self.num_errors += 1
+            elif kind == WARNING:
+                self.num_warnings += 1
+        self._indexed_lines = line_number + data[position:end].count(b"\n")
+        self._indexed = end
+        return True
+
+    # returns (kind, line number, file name, file line) of entry i, file name and file line are None if it doesn't reference a file
+    def entry(self, i):
+        file_name, file_line = self._references.get(i, (None, None))
+        return self._kinds[i], self._line_numbers[i], file_name, file_line
+
+    # returns the lines of the first num entries
+    def entry_lines(self, num):
+        def read(data):
+            lines = []
+            for offset in self._offsets[:num]:
+                end = data.find(b"\n", offset)
+                lines.append(data[offset:end if end != -1 else len(data)].decode('utf-8', 'replace').strip())
+            return lines
+        return _with_log(self.path, read) or []
+
+    # returns (line number of the first line, text) of the lines around entry i: num_lines before and after it
+    def section(self, i, num_lines):
+        offset = self._offsets[i]
+
+        def read(data):
+            begin = offset
+            for n in range(num_lines):
+                if begin <= 0:
+                    break
+                begin = data.rfind(b"\n", 0, begin - 1) + 1
+            end = offset
+            for n in range(num_lines + 1):
+                end = data.find(b"\n", end) + 1
+                if end == 0:
+                    end = len(data)
+                    break
+            text = data[begin:end].decode('utf-8', 'replace').replace("\r\n", "\n")
+            return self._line_numbers[i] - data[begin:offset].count(b"\n"), text
+        return _with_log(self.path, read)
+
+
+# the indexes of the logs that were opened, by path
+log_indexes = {}
+
+
+def get_log_index(path):
+    index = log_indexes.get(path)
+    if index is None:
+        index = log_indexes[path] = LogIndex(path)
+    return index
+
+
+# indexes a log in the background, then calls on_done(index, seconds) on the main thread (or on_done(None, 0) if it can't be read).
+class LogIndexerThread(threading.Thread):
+    def __init__(self, index, on_done):
+        self.index = index
+        self.on_done = on_done
+        threading.Thread.__init__(self)
+
+    def run(self):
+        start = time.time()
+        index = self.index if self.index.update() else None
+        duration = time.time() - start
+        sublime.set_timeout(lambda: self.on_done(index, duration), 0)
+
+
+# returns Launch.log of the UDK installation of the Src folder, or ""
+def default_log_file(window):
+    for folder in window.folders():
+        if folder.rstrip("\\/").lower().endswith("development\\src"):
+            return os.path.join(folder.rstrip("\\/")[:-15], "UDKGame", "Logs", "Launch.log")
+    return ""
+
+
+# lists the errors, warnings and file references of a log in a quick panel, without opening the log.
+# The log of the active view is used if it is one, otherwise the path of the log is asked for (Launch.log by default).
+class UnrealOpenLogCommand(sublime_plugin.WindowCommand):
+    last_log_file = ""
+
+    def run(self, path=""):
+        view = self.window.active_view()
+        if not path and view is not None and view.file_name() and "UnrealScriptIDE/Log.tmLanguage" in (view.settings().get('syntax') or ""):
+            path = view.file_name()
+        if path:
+            self.on_path_entered(path)
+            return
+        path = UnrealOpenLogCommand.last_log_file or default_log_file(self.window)
+        self.window.show_input_panel("Log file:", path, self.on_path_entered, None, None)
+
+    def on_path_entered(self, path):
+        path = path.strip()
+        if not os.path.isfile(path):
+            sublime.status_message("UnrealScriptIDE: " + path + " doesn't exist.")
+            return
+        UnrealOpenLogCommand.last_log_file = path
+        index = get_log_index(path)
+        if index.is_up_to_date():
+            self.show_entries(index, 0.0)
+            return
+        sublime.status_message("UnrealScriptIDE: indexing " + os.path.basename(path) + "...")
+        LogIndexerThread(index, self.show_entries).start()
+
+    def show_entries(self, index, duration):
+        if index is None:
+            sublime.status_message("UnrealScriptIDE: couldn't read the log.")
+            return
+        if not len(index):
+            sublime.status_message("UnrealScriptIDE: no errors, warnings or references in " + os.path.basename(index.path) + ".")
+            return
+        self.index = index
+        lines = index.entry_lines(MAX_PANEL_ENTRIES)
+        items = []
+        for i, line in enumerate(lines):
+            kind, line_number, file_name, file_line = index.entry(i)
+            label = "%s(%d)" % (os.path.basename(file_name), file_line) if file_name is not None else KIND_NAMES[kind]
+            items.append(["%s  line %d" % (label, line_number), line[:200]])
+        print("indexed %s in %.2f seconds: %d errors, %d warnings, %d entries" % (index.path, duration, index.num_errors, index.num_warnings, len(index)))
+        sublime.status_message("UnrealScriptIDE: %d errors, %d warnings%s" % (index.num_errors, index.num_warnings,
+                               " (showing the first %d entries)" % len(items) if len(items) < len(index) else ""))
+        show_quick_panel(items, self.on_entry_selected)
+
+    def on_entry_selected(self, i):
+        if i == -1:
+            return
+        kind, line_number, file_name, file_line = self.index.entry(i)
+        if file_name is not None:
+            file_name = resolve_reference(file_name, self.index.path)
+            if os.path.exists(file_name):
+                self.window.open_file("%s:%d:0" % (file_name, file_line), sublime.ENCODED_POSITION)
+                return
+        open_section(self.window, self.index, i)
+
+
+# returns the path of a file referenced in a log, relative paths are relative to the log
+def resolve_reference(file_name, log_path):
+    if os.path.exists(file_name) or not log_path:
+        return file_name
+    return os.path.normpath(os.path.join(os.path.dirname(log_path), file_name))
+
+
+# opens the lines around entry i of the log as a new (read only) view, with the cursor on the entry
+def open_section(window, index, i):
+    num_lines = sublime.load_settings('UnrealScriptIDE.sublime-settings').get('log_section_lines', 50)
+    section = index.section(i, num_lines)
+    if section is None:
+        sublime.status_message("UnrealScriptIDE: couldn't read the log.")
+        return
+    first_line, text = section
+    view = window.new_file()
+    view.set_scratch(True)
+    view.set_name("%s (lines %d-%d)" % (os.path.basename(index.path), first_line, first_line + text.count("\n")))
+    view.set_syntax_file(USPanel.LOG_SYNTAX)
+    # relative references are relative to the log (see UnrealGotoDefinitionCommand)
+    view.settings().set('unreal_log_file', index.path)
+    USData.panel_manager.replace(view, 0, 0, text)
+    view.set_read_only(True)
+    point = view.text_point(index.entry(i)[1] - first_line, 0)
+    view.sel().clear()
+    view.sel().add(sublime.Region(point))
+    view.show_at_center(point)
@@ -21,9 +21,41 @@ ST3 = int(sublime.version()) > 3000
 if ST3:
     import UnrealScriptIDE.UnrealScriptIDEData as USData
     import UnrealScriptIDE.UnrealScriptIDEParser as Parser
+    import UnrealScriptIDE.UnrealScriptIDEAssetReferences as USAssetReferences
+    import UnrealScriptIDE.UnrealScriptIDEIndexFile as USIndexFile
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+    import UnrealScriptIDE.UnrealScriptIDEBaseIndex as USBaseIndex
+    import UnrealScriptIDE.UnrealScriptIDESymbolStore as USSymbolStore
+    import UnrealScriptIDE.UnrealScriptIDESymbolIndex as USSymbolIndex
+    import UnrealScriptIDE.UnrealScriptIDEReferences as USReferences
+    import UnrealScriptIDE.UnrealScriptIDEHierarchy as USHierarchy
+    import UnrealScriptIDE.UnrealScriptIDETextIndex as USTextIndex
+    import UnrealScriptIDE.UnrealScriptIDEParseStore as USParseStore
+    import UnrealScriptIDE.UnrealScriptIDEOutline as USOutline
+    import UnrealScriptIDE.UnrealScriptIDEScope as USScope
+    import UnrealScriptIDE.UnrealScriptIDEExpression as USExpression
+    import UnrealScriptIDE.UnrealScriptIDEJobs as USJobs
+    import UnrealScriptIDE.UnrealScriptIDEWarmup as USWarmup
+    import queue
 else:
     import UnrealScriptIDEData as USData
     import UnrealScriptIDEParser as Parser
+    import UnrealScriptIDEAssetReferences as USAssetReferences
+    import UnrealScriptIDEIndexFile as USIndexFile
+    import UnrealScriptIDECache as USCache
+    import UnrealScriptIDEBaseIndex as USBaseIndex
+    import UnrealScriptIDESymbolStore as USSymbolStore
+    import UnrealScriptIDESymbolIndex as USSymbolIndex
+    import UnrealScriptIDEReferences as USReferences
+    import UnrealScriptIDEHierarchy as USHierarchy
+    import UnrealScriptIDETextIndex as USTextIndex
+    import UnrealScriptIDEParseStore as USParseStore
+    import UnrealScriptIDEOutline as USOutline
+    import UnrealScriptIDEScope as USScope
+    import UnrealScriptIDEExpression as USExpression
+    import UnrealScriptIDEJobs as USJobs
+    import UnrealScriptIDEWarmup as USWarmup
+    import Queue as queue
 
 
 # get the event manager
@@ -42,48 +74,6 @@ def is_unrealscript_file():
     return False
 
 
-# returns the code fragment that is actually relevant for auto-completion / go to declaration.
-# e.g. a single statement
-#   something = other + function(a, b).foo. returns function().foo.
-#   # I have no idea how this works, sorry.
-def get_relevant_text(text):
-    left_line = text.lstrip().lower()
-    i = 0
-    obj_string = ""
-    for c in left_line[::-1]:
-        obj_string += c
-        if c == ')':
-            i += 1
-        elif c == '(':
-            i -= 1
-        if (c == ' ' or c == ',' or c == '\t') and i == 0:
-            return get_rid_of_arguments(obj_string[-2::-1])
-        elif c == '(' and i == -1:
-            return get_rid_of_arguments(obj_string[-2::-1])
-    obj_string = obj_string[::-1].lstrip()
-    return get_rid_of_arguments(obj_string)
-
-
-# gets rid of function arguments: foo(a.ssdd, asd.eef.sd()).go(sd, ds()) -> foo().go()
-def get_rid_of_arguments(text):
-    i, start, end = 0, 0, 0
-    result = ""
-    for j, c in enumerate(text):
-        if c == '(':
-            if i == 0:
-                start = j
-                result += text[end:start]
-            i += 1
-        elif c == ')':
-            i -= 1
-            if i == 0:
-                end = j + 1
-                result += '()'
-    if result == "":
-        return text
-    return result + text[end:]
-
-
 ####################################################
 # Auto Completion and Go to declaration
 # ---------------------------
@@ -101,8 +91,8 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
     # During this time, no other threads shall be created and this will be True.
     b_still_parsing_classes = True
 
-    # active threads
-    _collector_threads = []
+    # running background threads (see UnrealScriptIDEJobs)
+    _jobs = USJobs.JobQueue()
     # will be true when the parsing happened to parse the current file.
     b_built_for_current_file = False
     # will be set to true just after auto-completion
@@ -111,16 +101,54 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
     b_wanted_to_autocomplete = False
     # if it needs to parse before go to definition, this is true.
     b_wanted_to_go_to_definition = False
+    # the postponed go to definition only shows the declaration in a popup
+    b_peek = False
 
     # the line number at which the help panel was displayed last
     help_panel_line_number = -1
 
+    # the last completion response of every view (see on_query_completions)
+    _completion_responses = USCache.CompletionResponseCache()
+    _unfiltered_completions = None
+    # view id -> outline of functions, states, defaultproperties, ... (see UnrealScriptIDEOutline)
+    _outlines = USCache.LRUCache(32)
+
     # the path to the src folder. This is used to save and load the cache files.
+    # In multi-root mode this is the first of the src_folders.
     src_folder = ""
 
     # if true, the parser will rebuild all files.
     b_rebuild_cache = False
 
+    # indexes that are updated file by file (by a FileIndexerThread)
+    # asset -> classes and lines that reference it inside their defaultproperties
+    _asset_references = USAssetReferences.AssetReferenceIndex()
+    # optional SQLite store of all symbols for project wide queries (see UnrealScriptIDESymbolStore)
+    _symbol_store = None
+    # every class, function, variable, ... of the project for the fuzzy 'Go to Symbol in Project' (see UnrealScriptIDESymbolIndex)
+    _symbol_index = USSymbolIndex.SymbolIndex()
+    # name -> where it's used in the code of the project, for 'Find References' (see UnrealScriptIDEReferences)
+    _references = USReferences.ReferenceIndex()
+    # parent and child classes, interfaces and the functions every class declares, for overrides and implementers (see UnrealScriptIDEHierarchy)
+    _hierarchy = USHierarchy.HierarchyIndex()
+    # trigram -> source files that contain it, for 'Search in Source' (see UnrealScriptIDETextIndex)
+    _text_index = USTextIndex.TextIndex()
+    # updates the file indexes in the background, see index_files
+    _file_indexer = None
+    # the file indexes are loaded from their cache files once, after all classes were collected.
+    b_file_indexes_loaded = False
+
+    # the classes cache (memory mapped index + journal), the members of the classes are loaded out of it when needed.
+    _classes_cache = None
+    # prebuilt index of the stock UDK classes, see UnrealScriptIDEBaseIndex
+    _base_index = None
+    b_base_index_searched = False
+    # parse results by content hash, shared between the Src folders and with other projects (see UnrealScriptIDEParseStore)
+    _parse_store = None
+    # the classes used in the last sessions, they're prefetched at startup (see UnrealScriptIDEWarmup)
+    _warmup = USWarmup.WarmupProfile()
+    b_warmup_started = False
+
     # ! (TODO): clear completions for current file
     # def on_close(self, view):
     #     pass
@@ -132,6 +160,7 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
             filename = view.file_name()
             if filename:
                 self.remove_file(filename)
+                self.index_files([filename])
                 if ST3:
                     self.on_activated_async(view)
                 else:
@@ -165,195 +194,183 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
                 evt_m().rebuild_cache += self.on_rebuild_cache
                 evt_m().get_class_reference += self.on_get_classes_reference
                 evt_m().get_and_open_object += self.get_and_open_object
+                evt_m().get_collector_reference += self.on_get_collector_reference
+
+                self.set_completions_cache_budget(sublime.load_settings('UnrealScriptIDE.sublime-settings'))
+                if self._parse_store is None:
+                    b_shared = sublime.load_settings('UnrealScriptIDE.sublime-settings').get('shared_parse_store', True)
+                    self._parse_store = USParseStore.ParseStore(USParseStore.store_folder() if b_shared else None)
 
                 view.set_status('UnrealScriptAutocomplete', "startup: start parsing classes...")
                 print("startup: start parsing classes...")
+                self._jobs.on_idle = self.on_jobs_finished
                 open_folder_arr = window.folders()   # Gets all opened folders in the Sublime Text editor.
-                self._collector_threads.append(Parser.ClassesCollectorThread(self, "", 30, open_folder_arr, True))
-                self._collector_threads[-1].start()
-                self.handle_threads(self._collector_threads, view)  # display progress bar
+                # all class collector threads join this group
+                classes_collected = self._jobs.new_group(lambda: self.on_classes_collected(view))
+                self._jobs.start(Parser.ClassesCollectorThread(self, "", 30, open_folder_arr, True), classes_collected)
+                self._jobs.show_progress(view)  # display progress bar
                 return
 
             file_name = view.file_name()
             # wait for the classes threads to be completed, then parse the current file.
             if not self.b_still_parsing_classes and file_name is not None:
+                # if the file was parsed before, load its completions (rebuilt from the classes if they were evicted)
+                if self.load_completions_for_file(file_name):
+                    print("already parsed, load completions for file: ", file_name)
+
                 # if the file wasn't parsed before, parse it now.
-                if file_name not in self._filenames:
+                elif not self.is_parsing_file(file_name):
                     print("start parsing file: ", file_name)
-                    self._filenames.append(file_name)
-                    self.add_function_collector_thread(file_name)  # create a new thread to search for relevant functions for the active file
-                    self.handle_threads(self._collector_threads, view)  # display progress bar
-
-                else:
-                    print("already parsed, load completions for file: ", file_name)
-                    self.load_completions_for_file(file_name)
+                    self.add_function_collector_thread(file_name, lambda: self.on_file_parsed(view))  # create a new thread to search for relevant functions for the active file
+                    self._jobs.show_progress(view)  # display progress bar
 
     def on_activated_async(self, view):
         self.on_activated(view,True)
 
     # This function is called when auto-complete pop-up box is displayed.
     # Used to get context sensitive suggestions
+    # The last response of every view is cached. It's reused while the view and the completions didn't change,
+    # and filtered if only the prefix grew since.
     def on_query_completions(self, view, prefix, locations, _async=False):
         if is_unrealscript_file():
             selection_region = view.sel()[0]
             line = view.line(selection_region)
-            left_line_region = sublime.Region(line.begin(), selection_region.end())
-
-            line_contents = view.substr(left_line_region)
-            split_lines = line_contents.split()
-
-            # if on a class declaration line
-            if len(split_lines) >= 1 and "class" == split_lines[0].lower():
-                # only get classes:
-                if len(split_lines) >= 3 and "extends" == split_lines[2].lower():
-                    return self.get_autocomplete_list(prefix, False, True, True, bNoStandardCompletions=True)
-                # only keywords
-                return [(item + "\tkeyword", item) for item in self.get_keywords()]
-
-            # if is in defaultproperties, only get variables:
-            line_number = 1000000
-            defaultproperties_region = view.find('defaultproperties', 0, sublime.IGNORECASE)
-            if defaultproperties_region:
-                # if "MyAsset = ", and MyAsset is an asset type (Texture2D, SoundCue, ...)
-                # set b_no_assets=False
-                b_no_assets = True
-                assets_filtering = None
-                match = re.match(r"(\w+)[ \t]*=", line_contents.strip().lower())
-                if match:
-                    var = match.group(1)
-                    o = self.get_object(var, self)
-                    if o:
-                        type_ = o.type()
-                        if type_:
-                            class_ = self.get_object(type_, self, b_no_functions=True, b_no_variables=True)
-                            if class_:
-                                assets_filtering = class_.all_child_classes()
-                            else:
-                                assets_filtering = [type_]
-                            b_no_assets = False
-
-                line_number, col = view.rowcol(defaultproperties_region.a)
-                row, col = view.rowcol(selection_region.begin())
-                if row > line_number:
-                    # below defaultproperties
-                    # if declaring begin object block
-                    if line_contents.strip().lower() == "begin object class=":
-                        return self.get_autocomplete_list(prefix, b_no_functions=True, b_no_variables=True, bNoStandardCompletions=True)
-
-                    # if inside a begin object block, get object oriented completions
-                    # find_all(pattern, <flags>, <format>, <extractions>)
-                    result = []
-                    begin_objects = view.find_all(r"begin\sobject\sclass\s?=\s?(\w+)\sname\s?=\s?\w+|begin\sobject\sname\s?=\s?\w+\sclass\s?=\s?(\w+)|begin\sobject\sname\s?=\s?\w+", sublime.IGNORECASE, "\\1\\2", result)
-                    end_objects = view.find_all(r"end object", sublime.IGNORECASE)
-                    if begin_objects and end_objects:
-                        regions = zip([view.rowcol(r.a)[0] for r in begin_objects], [view.rowcol(r.a)[0] for r in end_objects])
-                        for i, p in enumerate(regions):
-                            if p[0] < row < p[1]:
-                                print("in region: ", p, result[i])
-                                c = self.get_class(result[i])
-                                if not c:
-                                    c = "type not found"
-                                    print("nothing found for: ", result[i])
-                                    break
-                                if c.has_parsed():
-                                    return self.get_autocomplete_list(prefix, True, True, False, c, bNoStandardCompletions=True, b_no_assets=b_no_assets, assets_filtering=assets_filtering)
-                                else:
-                                    c.parse_me()
-                                    self.b_wanted_to_autocomplete = True
-                                    return [("just a moment...", ""), ("", "")]
-
-                    return self.get_autocomplete_list(prefix, True, True, bNoStandardCompletions=True, b_no_assets=b_no_assets, assets_filtering=assets_filtering)
-
-            # no defaultproperties found or above defaults:
-
-            # on a variable declaration line:
-            if len(split_lines) > 0 and (any([x == split_lines[0].lower() for x in ["var", "local", "param"]]) or "var(" in split_lines[0].lower()):
-                # not an array
-                if len(split_lines) > 1 and not "array" in split_lines[1].lower():
-                    if any(line_contents[-1] == c for c in ["<", "|"]):
-                        return [(item + "\tmetadata tag", item) for item in self.get_metadata_tags()]
-
-            # check if inside a function, get parameters and local variables:
-            local_vars = []
-            super_txt = ""
-            if len(split_lines) > 0:
-                region = sublime.Region(0, locations[0])
-                contents = view.substr(region)
-                # reverse by lines:
-                rev_content = reversed(contents.split('\n'))
-                f_reg = re.compile(r"([a-zA-Z0-9()\s]*?)function[\s]+((coerce)\s*)?([a-zA-z0-9<>_]*?)[\s]*([a-zA-z0-9_-]+)([\s]*\(+)(.*)((\s*\))+)[\s]*(const)?[\s]*;?[\s]*(\/\/.*)?")
-                e_reg = re.compile(r"([a-zA-Z0-9()\s]*?)event[\s]+((coerce)\s*)?([a-zA-z0-9<>_]*?)[\s]*([a-zA-z0-9_-]+)([\s]*\(+)(.*)((\s*\))+)[\s]*(const)?[\s]*;?[\s]*(\/\/.*)?")
-                line_number = view.rowcol(locations[0])[0]
-                for line in rev_content:
-                    # Yes I know this is bad, actually it's very bad. But I don't want to refract the parser again.
-                    # ########
-                    if "local" in line:  # get possible lines containing variables
-                        # 1: vartype, 2: name, 3: documentation
-                        var_doc_line = line.split('//')
-                        if len(var_doc_line) < 2:
-                            var_doc_line = line.split('/**')
-                        var_line = var_doc_line[0].split()
-                        if var_line and "local" not in var_line[0]:
-                            continue
-                        elif not var_line:
-                            continue
-
-                        doc_line = ''
-                        if len(var_doc_line) > 1:
-                            doc_line = var_doc_line[1].rstrip()
-
-                        var_names = []
-                        var_names.append(var_line.pop().rstrip('\n\r\t ;'))     # get the right most variable
-                        for v in var_line:
-                            if "," in var_line[-1]:     # if there are multiple variable names in one line separated by ',' , get them.
-                                var_names.append(var_line.pop().rstrip('\n\r\t ,'))
-                            else:
-                                break
-                        for name in var_names:
-                            if "<" in name or ">" in name:
-                                name = re.sub(r'\<.*?\>', '', name)
-                            local_vars.append(USData.Variable(var_line, name, doc_line, line_number, ""))
-                    # ########
-                    line_number -= 1
-
-                    match_f, match_e = f_reg.match(line), e_reg.match(line)
-
-                    if match_f or match_e:
-                        match = match_f if match_f else match_e
-                        if match.group(5):
-                            try:
-                                super_txt = "super." + match.group(5) + "(" + ", ".join([x.split()[-1] for x in match.group(7).split(',')]) + ")"
-                            except IndexError:
-                                super_txt = "super." + match.group(5) + "()"
-                        if match.group(7):
-                            for param in match.group(7).split(','):
-                                local_vars.append(USData.Variable(["param"] + param.strip().split()[:-1], param.split()[-1], "blajsn", line_number, ""))
-                                print(local_vars[-1].name(), local_vars[-1].var_modifiers())
-                        break
-
-            # check if wants object oriented completions
-            if len(line_contents) > 0 and line_contents[-1] == '.':
-                left_line = get_relevant_text(line_contents)
-                if '.' != left_line[-1]:
-                    left_line = ".".join(left_line.split('.')[:-1]) + '.'
-                # print("object.* :  ", left_line)
-
-                c = self.get_class_from_context(left_line, local_vars=local_vars)
+            left_text = view.substr(sublime.Region(line.begin(), selection_region.end() - len(prefix)))
+            context = (line.begin(), left_text, self._completions_generation)
+            change_count, size = view.change_count(), view.size()
+            cached = self._completion_responses.get(view.id(), change_count, size, context, prefix)
+            if cached is not None:
+                self.completion_class = cached[1]
+                return cached[0]
+
+            self._unfiltered_completions = None
+            response = self.query_completions(view, prefix, locations)
+            # don't keep placeholders like "just a moment..."
+            if response is not None and not self.b_wanted_to_autocomplete:
+                self._completion_responses.put(view.id(), change_count, size, context, prefix, response, self._unfiltered_completions, self.completion_class)
+            return response
+
+    # returns the up to date outline of the view
+    def get_outline(self, view):
+        outline = self._outlines.get(view.id())
+        if outline is None:
+            outline = USOutline.Outline()
+            self._outlines.put(view.id(), outline)
+        outline.refresh(lambda begin, end: view.substr(sublime.Region(begin, end)), view.change_count(), view.size())
+        return outline
+
+    # computes the completions for on_query_completions.
+    # Responses that can be filtered when the prefix grows set _unfiltered_completions to the completions that weren't filtered by the prefix.
+    def query_completions(self, view, prefix, locations):
+        selection_region = view.sel()[0]
+        line = view.line(selection_region)
+        left_line_region = sublime.Region(line.begin(), selection_region.end())
+
+        line_contents = view.substr(left_line_region)
+        split_lines = line_contents.split()
+
+        # if on a class declaration line
+        if len(split_lines) >= 1 and "class" == split_lines[0].lower():
+            # only get classes:
+            if len(split_lines) >= 3 and "extends" == split_lines[2].lower():
+                self._unfiltered_completions = []
+                return self.get_autocomplete_list(prefix, False, True, True, bNoStandardCompletions=True)
+            # only keywords
+            self._unfiltered_completions = self.get_keyword_completions()
+            return self.get_keyword_completions()
+
+        point = selection_region.begin()
+        outline = self.get_outline(view)
+        # no UnrealScript completions inside of C++ code
+        if outline.block_at(point, USOutline.CPPTEXT) is not None:
+            self._unfiltered_completions = []
+            return []
+
+        # if is in defaultproperties, only get variables:
+        defaultproperties = outline.block_at(point, USOutline.DEFAULTPROPERTIES)
+        if defaultproperties is not None and point > defaultproperties.body_start:
+            # if "MyAsset = ", and MyAsset is an asset type (Texture2D, SoundCue, ...)
+            # set b_no_assets=False
+            b_no_assets = True
+            assets_filtering = None
+            match = re.match(r"(\w+)[ \t]*=", line_contents.strip().lower())
+            if match:
+                var = match.group(1)
+                o = self.get_object(var, self)
+                if o:
+                    type_ = o.type()
+                    if type_:
+                        class_ = self.get_object(type_, self, b_no_functions=True, b_no_variables=True)
+                        if class_:
+                            assets_filtering = class_.all_child_classes()
+                        else:
+                            assets_filtering = [type_]
+                        b_no_assets = False
+
+            # if declaring begin object block
+            if line_contents.strip().lower() == "begin object class=":
+                self._unfiltered_completions = []
+                return self.get_autocomplete_list(prefix, b_no_functions=True, b_no_variables=True, bNoStandardCompletions=True)
+
+            # if inside a begin object block (between the Begin Object and the End Object line), get object oriented completions
+            begin_object = outline.block_at(point, USOutline.OBJECT)
+            row = view.rowcol(point)[0]
+            if begin_object is not None and view.rowcol(begin_object.start)[0] < row < view.rowcol(begin_object.end)[0]:
+                print("in object: ", begin_object.name)
+                c = self.get_class(begin_object.class_name)
                 if not c:
-                    c = "type not found"
-                    print("nothing found for: ", left_line)
-                if c != "parsing...":
-                    return self.get_autocomplete_list(prefix, True, False, False, c, bNoStandardCompletions=True)
+                    print("nothing found for: ", begin_object.name)
+                elif c.has_parsed():
+                    # asset completions are ranked and limited, they can't be filtered afterwards
+                    self._unfiltered_completions = [] if b_no_assets else None
+                    return self.get_autocomplete_list(prefix, True, True, False, c, bNoStandardCompletions=True, b_no_assets=b_no_assets, assets_filtering=assets_filtering)
                 else:
+                    c.parse_me()
                     self.b_wanted_to_autocomplete = True
                     return [("just a moment...", ""), ("", "")]
 
-            # get standard completions
+            self._unfiltered_completions = [] if b_no_assets else None
+            return self.get_autocomplete_list(prefix, True, True, bNoStandardCompletions=True, b_no_assets=b_no_assets, assets_filtering=assets_filtering)
+
+        # no defaultproperties found or above defaults:
+
+        # on a variable declaration line:
+        if len(split_lines) > 0 and (any([x == split_lines[0].lower() for x in ["var", "local", "param"]]) or "var(" in split_lines[0].lower()):
+            # not an array
+            if len(split_lines) > 1 and not "array" in split_lines[1].lower():
+                if any(line_contents[-1] == c for c in ["<", "|"]):
+                    return [(item + "\tmetadata tag", item) for item in self.get_metadata_tags()]
+
+        # check if inside a function, get parameters and local variables:
+        local_vars = []
+        super_txt = ""
+        function = outline.block_at(locations[0], USOutline.FUNCTION)
+        if len(split_lines) > 0 and function is not None:
+            scope = USScope.scope_of(function, lambda begin, end: view.substr(sublime.Region(begin, end)))
+            local_vars = scope.variables()
+            super_txt = scope.super_call()
+
+        # check if wants object oriented completions
+        if len(line_contents) > 0 and line_contents[-1] == '.':
+            expression = USExpression.parse_context(line_contents)
+            c = self.get_class_from_chain(expression, local_vars=local_vars) if expression else None
+            if not c:
+                c = "type not found"
+                print("nothing found for: ", line_contents)
+            if c != "parsing...":
+                self._unfiltered_completions = []
+                return self.get_autocomplete_list(prefix, True, False, False, c, bNoStandardCompletions=True)
             else:
-                compl_default = [view.extract_completions(prefix)]
-                compl_default = [(item + "\tbuffer", item) for sublist in compl_default for item in sublist]       # format
-                keywords = [(item + "\tkeyword", item) for item in self.get_keywords()]
-                return self.get_autocomplete_list(prefix, local_vars=local_vars) + keywords + compl_default + [(super_txt, super_txt)]
+                self.b_wanted_to_autocomplete = True
+                return [("just a moment...", ""), ("", "")]
+
+        # get standard completions
+        else:
+            compl_default = [view.extract_completions(prefix)]
+            compl_default = [(item + "\tbuffer", item) for sublist in compl_default for item in sublist]       # format
+            keywords = self.get_keyword_completions()
+            self._unfiltered_completions = [(local.name() + '\t' + local.var_modifiers(), local.name()) for local in local_vars] + keywords + compl_default + [(super_txt, super_txt)]
+            return self.get_autocomplete_list(prefix, local_vars=local_vars) + keywords + compl_default + [(super_txt, super_txt)]
 
     # called right before auto completion.
     def on_query_context(self, view, key, operator, operand, match_all):
@@ -365,6 +382,11 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
 
     # remove auto completion and insert dynamic snippet instead, just after auto completion
     def on_modified(self, view, _async=False):
+        if not _async:
+            # the outline needs to know where the edit happened, while the cursor is still there
+            outline = self._outlines.peek(view.id())
+            if outline is not None:
+                outline.edited(view.change_count(), view.size(), [r.b for r in view.sel()])
         if ST3 and not _async:
             return
         if is_unrealscript_file():
@@ -412,7 +434,7 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
                 o.insert_dynamic_snippet(view)
 
     # go to the definition of the object below the cursor
-    def on_go_to_definition(self, left_line, word, full_line, b_new_start_point):
+    def on_go_to_definition(self, left_line, word, full_line, b_new_start_point, b_peek=False):
         window = sublime.active_window()
         # print("on_go_to_definition: full_line:\t", full_line, "\t left_line:\t'" + left_line + "'\t Word:\t", word)
 
@@ -421,12 +443,12 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
         if "function" in full_line or "event" in full_line or left_line[-6:] == "super.":
             # try opening a class, if it fails, its a declaration (or super.)
             #                      if it doesn't, it's the return type
-            if not self.get_and_open_object(word, self, window, b_new_start_point, False, True, True):
+            if not self.get_and_open_object(word, self, window, b_new_start_point, False, True, True, b_peek=b_peek):
                 # open parent declaration
                 active_file = window.active_view().file_name()
                 c = self.get_class_from_filename(active_file).get_parent()
                 # c = self.get_class(self.get_class_from_filename(active_file).parent_class())
-                self.get_and_open_object(word, c, window, b_new_start_point, True)
+                self.get_and_open_object(word, c, window, b_new_start_point, True, b_peek=b_peek)
 
         # just a single object or self.
         elif left_line == "" or left_line[-5:] == "self.":
@@ -434,14 +456,14 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
                 # open parent class
                 active_file = window.active_view().file_name()
                 c = self.get_class_from_filename(active_file).parent_class()
-                self.get_and_open_object(c, self, window, b_new_start_point)
+                self.get_and_open_object(c, self, window, b_new_start_point, b_peek=b_peek)
             elif word == "self":
                 # open the the declaration of the current file
                 active_file = window.active_view().file_name()
-                self.get_and_open_object(self.get_class_from_filename(active_file).name(), self, window, b_new_start_point)
+                self.get_and_open_object(self.get_class_from_filename(active_file).name(), self, window, b_new_start_point, b_peek=b_peek)
             else:
                 # open the declaration of the object
-                self.get_and_open_object(word, self, window, b_new_start_point)
+                self.get_and_open_object(word, self, window, b_new_start_point, b_peek=b_peek)
 
         # a dot before the object
         elif left_line != "" and left_line[-1] == '.':
@@ -451,120 +473,346 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
                 print("still parsing...")
                 self.b_wanted_to_go_to_definition = True
                 self.b_new_start_point = b_new_start_point
+                self.b_peek = b_peek
             else:
-                self.get_and_open_object(word, c, window, b_new_start_point, True)
+                self.get_and_open_object(word, c, window, b_new_start_point, True, b_peek=b_peek)
         else:
             print("case not handled!!!", left_line)
 
     # gets the object out of out_of and if found opens it
     # ! TODO: if there is a variable and a class, ask which to open.
-    def get_and_open_object(self, word, out_of, window, b_new_start_point, b_no_classes=False, b_no_functions=False, b_no_variables=False):
+    # if b_peek is true, the declaration is only shown in a popup (see UnrealGotoDefinitionCommand.peek)
+    def get_and_open_object(self, word, out_of, window, b_new_start_point, b_no_classes=False, b_no_functions=False, b_no_variables=False, b_peek=False):
         o = self.get_object(word, out_of, b_no_classes, b_no_functions, b_no_variables)
         # print("object ", o)
         if o is not None and o != "parsing...":
-            window.run_command("unreal_goto_definition", {"b_new_start_point": b_new_start_point, "line_number": o.line_number(), "filename": o.file_name()})
+            window.run_command("unreal_goto_definition", {"b_new_start_point": b_new_start_point, "line_number": o.line_number(), "filename": o.file_name(), "b_peek": b_peek})
             return True
         elif o == "parsing...":
             window.active_view().set_status('UnrealScriptAutocomplete', "just a moment...")
             self.b_wanted_to_go_to_definition = True
             self.b_new_start_point = b_new_start_point
+            self.b_peek = b_peek
         else:
             window.active_view().set_status('UnrealScriptAutocomplete', word + " not found in current file and all parent classes!")
         return False
 
+    # updates the file indexes for the given files in the background (one file indexer thread at a time)
+    def index_files(self, filenames, b_remove_missing=False):
+        if self._file_indexer is None:
+            self._file_indexer = Parser.FileIndexer(self)
+        self._file_indexer.index_files(filenames, b_remove_missing)
+
+    # returns all indexes that are updated file by file, together with the name of their cache file
+    def file_indexes(self):
+        indexes = [(self._asset_references, 'asset_references.obj'), (self._symbol_index, USSymbolIndex.INDEX_FILE_NAME),
+                   (self._references, USReferences.INDEX_FILE_NAME), (self._hierarchy, USHierarchy.INDEX_FILE_NAME),
+                   (self._text_index, USTextIndex.INDEX_FILE_NAME)]
+        if self.get_symbol_store() is not None:
+            indexes.append((self._symbol_store, USSymbolStore.STORE_FILE_NAME))
+        return indexes
+
+    def load_file_indexes(self):
+        for index, cache_name in self.file_indexes():
+            index.load(os.path.join(self.src_folder, cache_name))
+
+    def save_file_indexes(self):
+        if os.path.exists(self.src_folder):
+            for index, cache_name in self.file_indexes():
+                if index.b_changed:
+                    try:
+                        index.save(os.path.join(self.src_folder, cache_name))
+                    except (IOError, OSError) as e:
+                        print("couldn't save ", cache_name, ": ", e)
+
+    # returns the symbol store, or None if it's turned off or sqlite3 isn't available
+    def get_symbol_store(self):
+        if self._symbol_store is None and USSymbolStore.is_available() and os.path.exists(self.src_folder):
+            if sublime.load_settings('UnrealScriptIDE.sublime-settings').get('symbol_store', False):
+                try:
+                    self._symbol_store = USSymbolStore.SymbolStore(os.path.join(self.src_folder, USSymbolStore.STORE_FILE_NAME))
+                except USSymbolStore.sqlite3.Error as e:
+                    print("couldn't open the symbol store: ", e)
+        return self._symbol_store
+
+    def get_asset_references(self):
+        return self._asset_references
+
+    def get_symbol_index(self):
+        return self._symbol_index
+
+    def get_hierarchy(self):
+        return self._hierarchy
+
+    def get_text_index(self):
+        return self._text_index
+
+    # returns the references to the word under the cursor of view: (word, [(class name, file name, line number, column, member, b_certain), ...]),
+    # the certain ones first, or (word, "parsing...") if a class needs to be parsed first.
+    # The declaration of the word is looked up like for go to declaration. Then its occurrences are checked:
+    #   - local variables and parameters are only used inside of their function.
+    #   - classes are certain everywhere.
+    #   - Name (or self.Name) is certain inside of the class of the declaration, its parent classes and its child classes,
+    #     and refers to something else in every other class.
+    #   - Other.Name is certain if no other classes declare a member with that name, else it might be it.
+    def find_references(self, view):
+        region_word = view.word(view.sel()[0])
+        word = view.substr(region_word).strip()
+        if not re.match(r"^[A-Za-z_]\w*$", word):
+            return word, []
+        point = region_word.begin()
+        left_line = view.substr(sublime.Region(view.line(point).begin(), point)).rstrip()
+        b_after_dot = left_line.endswith('.')
+        file_name = view.file_name()
+        references = self._references.find(word)
+
+        function = self.get_outline(view).block_at(point, USOutline.FUNCTION)
+        if function is not None and not b_after_dot:
+            scope = USScope.scope_of(function, lambda begin, end: view.substr(sublime.Region(begin, end)))
+            if word.lower() in [v.name().lower() for v in scope.variables()]:
+                first_line, last_line = view.rowcol(function.start)[0] + 1, view.rowcol(function.end)[0] + 1
+                return word, [r[:5] + (True,) for r in references if r[1] == file_name and first_line <= r[2] <= last_line]
+
+        if b_after_dot:
+            c = self.get_class_from_context(left_line)
+            o = self.get_object(word, c, True) if c is not None and c != "parsing..." else c
+        else:
+            o = self.get_object(word, self)
+        if o == "parsing...":
+            return word, o
+        if isinstance(o, USData.ClassReference):
+            return word, [r[:5] + (True,) for r in references]
+        owner = self.get_class_from_filename(o.file_name()) if o is not None else None
+        if owner is None:
+            # not found: every occurrence might be it
+            return word, [r[:5] + (False,) for r in references]
+
+        family = set([name.lower() for name in owner.all_child_classes()])
+        # only functions can be overridden, so a function of a parent class can be the same one
+        parent = owner.get_parent() if isinstance(o, USData.Function) else None
+        while parent is not None:
+            family.add(parent.name().lower())
+            parent = parent.get_parent()
+        b_unique = self._symbol_index.classes_declaring(word) <= family
+        results = []
+        for class_name, filename, line_number, column, member, b_qualified in references:
+            if b_qualified:
+                results.append((class_name, filename, line_number, column, member, b_unique))
+            elif class_name.lower() in family:
+                results.append((class_name, filename, line_number, column, member, True))
+        results.sort(key=lambda r: not r[5])
+        return word, results
+
     # creates a thread to parse the given file_name and all its parent classes
-    def add_function_collector_thread(self, file_name):
-        self._collector_threads.append(Parser.ParserThread(self, file_name, 30))
-        self._collector_threads[-1].start()
-
-    # animates an activity bar.
-    # serves as an event for when all threads are done
-    def handle_threads(self, threads, view, i=0, dir=1):
-        # remove finished threads
-        for thread in threads:
-            if not thread.isAlive():
-                threads.remove(thread)
-
-        if len(threads):
-            # This animates a little activity indicator in the status area
-            before = i % 8
-            after = (7) - before
-            if not after:
-                dir = -1
-            if not before:
-                dir = 1
-            i += dir
-            view.set_status('UnrealScriptAutocomplete', 'UnrealScriptAutocomplete is Parsing [%s=%s]' % (' ' * before, ' ' * after))
-
-            sublime.set_timeout(lambda: self.handle_threads(threads, view, i, dir), 100)
+    # parses file_name (and its parent classes) in the background.
+    # on_done is called on the main thread once all of them are parsed. Parser threads that parse the parent classes
+    # join the group of the thread that started them.
+    def add_function_collector_thread(self, file_name, on_done=None):
+        group = self._jobs.new_group(on_done) if on_done is not None else None
+        self._jobs.start(Parser.ParserThread(self, file_name, 30), group)
+
+    # runs a thread as a job, on_done is called on the main thread when it's done
+    def start_job(self, thread, on_done=None):
+        return self._jobs.start(thread, on_done=on_done)
+
+    # displays the activity indicator in view while jobs are running
+    def show_progress(self, view):
+        self._jobs.show_progress(view)
+
+    # returns true if there is a running thread parsing file_name
+    def is_parsing_file(self, file_name):
+        for thread in self._jobs.running():
+            if isinstance(thread, Parser.ParserThread) and thread.filename == file_name:
+                return True
+        return False
+
+    # called on the main thread whenever all jobs are done
+    def on_jobs_finished(self):
+        self.save_classes_to_cache()
+        self.save_warmup_profile()
+
+    # all classes were collected (or loaded out of the cache) at startup
+    def on_classes_collected(self, view):
+        view.erase_status('UnrealScriptAutocomplete')
+        print("finished parsing classes, start parsing current file")
+        self.b_still_parsing_classes = False
+        self.apply_base_index()
+        self.link_classes()
+        if not self.b_file_indexes_loaded:
+            self.b_file_indexes_loaded = True
+            self.load_file_indexes()
+        self.index_files([c.file_name() for c in self._classes], True)
+        self.validate_classes()
+        self.start_warmup()
+        if ST3:
+            self.on_activated_async(view)
+        else:
+            self.on_activated(view)
+
+    # loads (or parses) the classes that were used most in the last sessions in the background
+    def start_warmup(self):
+        if self.b_warmup_started:
             return
+        self.b_warmup_started = True
+        settings = sublime.load_settings('UnrealScriptIDE.sublime-settings')
+        num_classes = settings.get('warmup_classes', 30)
+        if not num_classes or not os.path.exists(self.src_folder):
+            return
+        self._warmup.load(os.path.join(self.src_folder, USWarmup.PROFILE_FILE_NAME))
+        thread = USWarmup.WarmupThread(self, self._warmup, num_classes, settings.get('warmup_budget_seconds', 5.0),
+                                       lambda file_name: Parser.ParserThread(self, file_name, 30, False).run())
+        self.start_job(thread, lambda: self.on_warmup_finished(thread))
+
+    def on_warmup_finished(self, thread):
+        print("warm-up: loaded %d and parsed %d classes in %.2f s" % (thread.num_loaded, thread.num_parsed, thread.duration))
+
+    def class_used(self, my_class):
+        self._warmup.touch(my_class.name())
+
+    # saves the classes used in this session and reports how many of the prefetched classes were used
+    def save_warmup_profile(self):
+        if self._warmup.b_changed and self.b_warmup_started and os.path.exists(self.src_folder):
+            try:
+                self._warmup.save(os.path.join(self.src_folder, USWarmup.PROFILE_FILE_NAME))
+            except (IOError, OSError) as e:
+                print("couldn't save the warm-up profile: ", e)
+                return
+            hits, num_prefetched = self._warmup.hits()
+            if num_prefetched:
+                print("warm-up profile: %d of %d prefetched classes were used (%d%%)" % (hits, num_prefetched, 100 * hits // num_prefetched))
+
+    # the file of view and its parent classes were parsed: keep the completions for later use
+    def on_file_parsed(self, view):
+        if self.b_built_for_current_file:
+            self.b_built_for_current_file = False
+            self._functions, self._variables = self.get_completions_from_class(view.file_name())
+            self._completions_generation += 1
+            self.save_completions_to_file(view.file_name())
+        evt_m().parsing_finished()
+
+    # a class that was needed for auto-completion or go to declaration (see ClassReference.parse_me) was parsed
+    def on_class_parsed(self, view):
+        if self.b_wanted_to_go_to_definition:
+            print("wanted to go to definition!")
+            self.b_wanted_to_go_to_definition = False
+            sublime.active_window().run_command("unreal_goto_definition", {"b_new_start_point": self.b_new_start_point, "b_peek": self.b_peek})
+        elif self.b_wanted_to_autocomplete:
+            print("wanted to auto-complete!")
+            self.b_wanted_to_autocomplete = False
+            sublime.active_window().run_command("hide_auto_complete")
+            sublime.set_timeout(lambda: view.run_command("auto_complete"), 0)
         else:
-            self.save_classes_to_cache()
-            view.erase_status('UnrealScriptAutocomplete')
-            if self.b_still_parsing_classes:
-                print("finished parsing classes, start parsing current file")
-                self.b_still_parsing_classes = False
-                # self.save_classes_to_cache()
-                self.link_classes()
-                if ST3:
-                    self.on_activated_async(view)
-                else:
-                    self.on_activated(view)
-            else:
-                if self.b_wanted_to_go_to_definition:
-                    print("wanted to go to definition!")
-                    self.b_wanted_to_go_to_definition = False
-                    sublime.active_window().run_command("unreal_goto_definition", {"b_new_start_point": self.b_new_start_point})
-                elif self.b_wanted_to_autocomplete:
-                    print("wanted to auto-complete!")
-                    self.b_wanted_to_autocomplete = False
-                    sublime.active_window().run_command("hide_auto_complete")
-                    sublime.set_timeout(lambda: view.run_command("auto_complete"), 0)
-                else:
-                    # finished and keep functions for later use
-                    if self.b_built_for_current_file:
-                        self.b_built_for_current_file = False
-                        self._functions, self._variables = self.get_completions_from_class(view.file_name())
-                        self.save_completions_to_file(view.file_name())
-                    evt_m().parsing_finished()
+            evt_m().parsing_finished()
 
     # reset all and start from anew
     def clear_all(self, view):
         self.b_first_time = True
         self.b_rebuild_cache = True
         self.clear()
-        self._completions_for_file = []
-        self._filenames = []
+        self._completions_for_file.clear()
+        USData.panel_manager.clear()
+        self._asset_references = USAssetReferences.AssetReferenceIndex()
+        self._symbol_index = USSymbolIndex.SymbolIndex()
+        self._references = USReferences.ReferenceIndex()
+        self._hierarchy = USHierarchy.HierarchyIndex()
+        self._text_index = USTextIndex.TextIndex()
+        self.b_file_indexes_loaded = True
         for c in self._classes:
             c.clear()
-        self._classes = []
+        self.set_classes([])
+        if self._classes_cache is not None:
+            self._classes_cache.reset()
         self.b_still_parsing_classes = True
         if ST3:
             self.on_activated_async(view)
         else:
             self.on_activated(view)
 
-    # save the _classes array to a cache file in the src folder
+    # checks the source files of all classes that were loaded out of the cache in the background.
+    # Stale classes get parsed again when they are needed. The checks are jobs, so the caches are only saved when they're done.
+    def validate_classes(self, num_threads=4):
+        classes = queue.Queue()
+        for c in self._classes:
+            classes.put(c)
+        validators = self._jobs.new_group()
+        for i in range(num_threads):
+            self._jobs.start(Parser.SourceValidatorThread(classes), validators)
+
+    # takes the stock classes that weren't parsed yet out of the prebuilt base index (if there is one for this UDK version)
+    def apply_base_index(self):
+        if not sublime.load_settings('UnrealScriptIDE.sublime-settings').get('use_base_index', True):
+            return
+        if not self.b_base_index_searched:
+            self.b_base_index_searched = True
+            self._base_index = USBaseIndex.find_base_index(self.src_folder)
+        if self._base_index is not None:
+            USBaseIndex.apply_base_index(self._base_index, self._classes)
+
+    # returns the classes cache of the src folder
+    def get_classes_cache(self):
+        if self._classes_cache is None:
+            self._classes_cache = USIndexFile.ClassesCache(self.src_folder, self, ";".join(self.src_folders))
+        return self._classes_cache
+
+    def shared_members(self, stamp, file_name, b_load=False):
+        if stamp is None or self._parse_store is None:
+            return None
+        return self._parse_store.get(stamp[2], file_name, b_load)
+
+    def share_members(self, my_class, b_save=False):
+        stamp = my_class.source_stamp()
+        if stamp is not None and self._parse_store is not None:
+            members = self._parse_store.put(stamp[2], my_class, b_save)
+            if members[0] is not my_class._functions:
+                my_class.set_members(*members)
+
+    def class_changed(self, my_class):
+        self._completions_generation += 1
+        # the documentation of the class is rendered again. Classes change on the parser threads,
+        # the documents are only touched on the main thread.
+        sublime.set_timeout(lambda: USData.panel_manager.forget(my_class), 0)
+        if self._classes_cache is not None:
+            self._classes_cache.class_changed(my_class)
+
+    # save the changed classes to the classes cache in the src folder.
+    # This only schedules a save, the cache gets written in the background once the parsing calms down.
     def save_classes_to_cache(self):
         if os.path.exists(self.src_folder):
-            if ST3:
-                with open(os.path.join(self.src_folder, 'classes_cache.obj'), 'wb') as cache_file:
-                    pickle.dump(self._classes, cache_file)
-            else:
-                with open(os.path.join(self.src_folder, 'classes_cache.obj'), 'w') as cache_file:
-                    pickle.dump(self._classes, cache_file)
+            self.get_classes_cache().schedule_save()
 
-    # loads the _classes from the cache file
+    # loads the _classes from the cache file. An old pickled cache gets converted first.
+    # returns False if there is no compatible cache, then all classes need to be parsed again.
     def load_classes_from_cache(self):
-        if os.path.exists(self.src_folder):
-            if ST3:
-                with open(os.path.join(self.src_folder, 'classes_cache.obj'), 'rb') as cache_file:
-                    self._classes = pickle.load(cache_file)
-            else:
-                with open(os.path.join(self.src_folder, 'classes_cache.obj'), 'r') as cache_file:
-                    self._classes = pickle.load(cache_file)
-            for c in self._classes:
-                c.set_collector_reference(self)
+        path = os.path.join(self.src_folder, USIndexFile.CACHE_FILE_NAME)
+        if not os.path.exists(path) and not self.migrate_legacy_cache():
+            return False
+        try:
+            self.set_classes(self.get_classes_cache().load())
+        except (USIndexFile.IndexFileError, IOError, OSError) as e:
+            print("classes cache can't be used, rebuilding it: ", e)
+            self.get_classes_cache().reset()
+            return False
+        return True
+
+    # converts the pickled classes cache of older versions to the new format
+    def migrate_legacy_cache(self):
+        legacy_path = os.path.join(self.src_folder, USIndexFile.LEGACY_CACHE_FILE_NAME)
+        if not os.path.exists(legacy_path):
+            return False
+        print("converting the old classes cache")
+        try:
+            with open(legacy_path, 'rb' if ST3 else 'r') as cache_file:
+                classes = pickle.load(cache_file)
+            data = USIndexFile.build_index(classes, self.src_folder, 1)[0]
+            USCache.write_file_atomic(os.path.join(self.src_folder, USIndexFile.CACHE_FILE_NAME), data)
+        except Exception as e:
+            print("couldn't convert the old classes cache: ", e)
+            return False
+        try:
+            os.remove(legacy_path)
+        except OSError:
+            pass
+        return True
 
     def on_rebuild_cache(self, view):
         print("rebuild cache")
@@ -573,13 +821,14 @@ class UnrealScriptIDEMain(USData.UnrealData, sublime_plugin.EventListener):
     def on_get_classes_reference(self, callback):
         callback(self.get_object("Object", self, b_no_functions=True, b_no_variables=True))
 
+    def on_get_collector_reference(self, callback):
+        callback(self)
+
     def get_keywords(self):
-        settings = sublime.load_settings('UnrealScriptIDE.sublime-settings')
-        return settings.get('unreal_keywords')
+        return self.get_setting('unreal_keywords')
 
     def get_metadata_tags(self):
-        settings = sublime.load_settings('UnrealScriptIDE.sublime-settings')
-        return settings.get('metadata_tags')
+        return self.get_setting('metadata_tags')
 
 
 # this deletes the cache file and clears every completion, so that it can then rebuild the classes.
@@ -592,12 +841,40 @@ class UnrealRebuildCacheCommand(sublime_plugin.TextCommand):
                 for f in open_folder_arr:
                     if "Development\\Src" in f:
                         # if we saved the classes to a cache before, delete it.
-                        if os.path.exists(os.path.join(f, "classes_cache.obj")):
+                        if os.path.exists(os.path.join(f, USIndexFile.CACHE_FILE_NAME)) or os.path.exists(os.path.join(f, USIndexFile.LEGACY_CACHE_FILE_NAME)):
                             evt_m().rebuild_cache(self.view)
         else:
             print("no UnrealScript file, try again with a .uc file focused")
 
 
+# parses all stock UDK classes and the InbuiltClasses and saves them as base index for this UDK version.
+# Other projects using the same UDK version then don't need to parse them anymore.
+class UnrealBuildBaseIndexCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        collector = []
+        if evt_m() is not None:
+            evt_m().get_collector_reference(collector.append)
+        if not collector or collector[0].b_still_parsing_classes:
+            sublime.status_message("UnrealScriptIDE: wait until all classes are collected.")
+            return
+        self.collector = collector[0]
+        self.view.window().show_input_panel("UDK version:", USBaseIndex.default_version_name(self.collector.src_folder), self.on_done, None, None)
+
+    def on_done(self, name):
+        path = os.path.join(USBaseIndex.base_index_folder(), name + USBaseIndex.BASE_INDEX_EXTENSION)
+        packages = sublime.load_settings('UnrealScriptIDE.sublime-settings').get('base_index_packages', USBaseIndex.DEFAULT_PACKAGES)
+        self._thread = USBaseIndex.BaseIndexBuilderThread(self.collector, packages, path)
+        self.view.set_status('UnrealScriptBaseIndex', 'UnrealScriptIDE is building the base index...')
+        self.collector.start_job(self._thread, self.on_finished)
+
+    def on_finished(self):
+        self.view.erase_status('UnrealScriptBaseIndex')
+        if self._thread.error is not None:
+            sublime.error_message("UnrealScriptIDE: couldn't write the base index:\n" + str(self._thread.error))
+        else:
+            sublime.status_message("UnrealScriptIDE: base index with %d classes saved to %s" % (self._thread.num_classes, self._thread.path))
+
+
 ########################################################
 #Event
 #-----
@@ -638,6 +915,7 @@ class EventManager():
         self.rebuild_cache = Event()
         self.get_class_reference = Event()
         self.get_and_open_object = Event()
+        self.get_collector_reference = Event()
 
 
 class ReplaceRegionCommand(sublime_plugin.TextCommand):
@@ -0,0 +1,340 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Navigation
+#-----------------------------------------------------------------------------------
+#
+#   Project wide navigation commands that are answered by the indexes of the main instance:
+#       - find asset references (which classes reference an asset in their defaultproperties)
+#       - search symbols in the symbol store (e.g. *Damage* or type:SoundCue)
+#       - go to any symbol of the project, matched fuzzy while typing (tkdmg -> TakeDamage)
+#       - find the references to the symbol under the cursor
+#       - show the overrides of a function and the classes implementing an interface (out of the hierarchy index, nothing is parsed)
+#       - search the text of all source files, narrowed down by the trigram index
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import sublime_plugin
+import os
+import re
+
+ST3 = int(sublime.version()) > 3000
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDEMain as USMain
+    import UnrealScriptIDE.UnrealScriptIDEOutline as USOutline
+    import UnrealScriptIDE.UnrealScriptIDETextIndex as USTextIndex
+    import UnrealScriptIDE.UnrealScriptIDEData as USData
+    from UnrealScriptIDE.UnrealBuildSystem import show_quick_panel
+else:
+    import UnrealScriptIDEMain as USMain
+    import UnrealScriptIDEOutline as USOutline
+    import UnrealScriptIDETextIndex as USTextIndex
+    import UnrealScriptIDEData as USData
+    from UnrealBuildSystem import show_quick_panel
+
+
+# returns the main instance of the plug-in or None if it hasn't started yet.
+def get_collector():
+    collector = []
+    if USMain.evt_m() is not None:
+        USMain.evt_m().get_collector_reference(collector.append)
+    if not collector:
+        sublime.status_message("UnrealScriptIDE: open an UnrealScript file first.")
+        return None
+    return collector[0]
+
+
+# opens filename at line_number and saves the current position as the new start point.
+def open_location(view, filename, line_number):
+    view.window().run_command("unreal_goto_definition", {"b_new_start_point": True, "line_number": line_number, "filename": filename})
+
+
+# shows all classes that reference the asset under the cursor.
+# If there is no asset under the cursor, shows all referenced assets first.
+class UnrealFindAssetReferencesCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        collector = get_collector()
+        if collector is None:
+            return
+        self.index = collector.get_asset_references()
+        asset = self.asset_under_cursor()
+        if asset and self.index.find(asset):
+            self.show_references(asset)
+        else:
+            self.show_assets()
+
+    # returns something like SoundCue'A_Foo.Bar' if the cursor is on it.
+    def asset_under_cursor(self):
+        point = self.view.sel()[0].begin()
+        line = self.view.line(point)
+        column = point - line.begin()
+        for m in re.finditer(r"\b(\w+)'([\w.]+)'", self.view.substr(line)):
+            if m.start() <= column <= m.end():
+                return m.group(0)
+        return None
+
+    def show_assets(self):
+        self.assets = self.index.assets()
+        if not self.assets:
+            sublime.status_message("UnrealScriptIDE: no asset references indexed yet.")
+            return
+        show_quick_panel([[asset, "referenced by %d class%s" % (num, "" if num == 1 else "es")] for asset, num in self.assets], self.on_asset_selected)
+
+    def on_asset_selected(self, index):
+        if index != -1:
+            self.show_references(self.assets[index][0])
+
+    def show_references(self, asset):
+        self.references = self.index.find(asset)
+        show_quick_panel([[class_name + " (line %d)" % line_number, filename] for class_name, filename, line_number in self.references], self.on_reference_selected)
+
+    def on_reference_selected(self, index):
+        if index != -1:
+            class_name, filename, line_number = self.references[index]
+            open_location(self.view, filename, line_number)
+
+
+# searches the symbol store of the whole project:
+#   words           functions, variables, consts and structs whose name contains words starting like that (damage -> TakeDamage)
+#   *Damage*        names matching the pattern
+#   type:SoundCue   everything of that type
+#   doc:words       members whose documentation contains the words
+class UnrealSearchSymbolsCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        collector = get_collector()
+        if collector is None:
+            return
+        self.store = collector.get_symbol_store()
+        if self.store is None:
+            sublime.status_message("UnrealScriptIDE: the symbol store is turned off (setting 'symbol_store') or sqlite3 isn't available.")
+            return
+        self.view.window().show_input_panel("Search symbols (words, *pattern*, type:Name or doc:words):", "", self.on_done, None, None)
+
+    def on_done(self, text):
+        text = text.strip()
+        if text.lower().startswith("type:"):
+            self.symbols = self.store.find_by_type(text[5:].strip())
+        elif text.lower().startswith("doc:"):
+            self.symbols = self.store.find_in_docs(text[4:].strip())
+        else:
+            self.symbols = self.store.find_symbols(text)
+        if not self.symbols:
+            sublime.status_message("UnrealScriptIDE: nothing found for " + text)
+            return
+        show_quick_panel([[class_name + "." + name + "  (" + kind + ")", declaration.strip()] for class_name, kind, name, type_name, declaration, filename, line_number in self.symbols],
+                         self.on_symbol_selected)
+
+    def on_symbol_selected(self, index):
+        if index != -1:
+            symbol = self.symbols[index]
+            open_location(self.view, symbol[5], symbol[6])
+
+
+# shows where the symbol under the cursor is used in the project (see UnrealScriptIDEMain.find_references).
+# References that might belong to another declaration with the same name are marked with a ?.
+class UnrealFindReferencesCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        collector = get_collector()
+        if collector is None:
+            return
+        word, self.references = collector.find_references(self.view)
+        if self.references == "parsing...":
+            sublime.status_message("UnrealScriptIDE: just a moment, parsing the classes of " + word + "...")
+            return
+        if not self.references:
+            sublime.status_message("UnrealScriptIDE: no references to " + word + " found.")
+            return
+        num_certain = len([r for r in self.references if r[5]])
+        sublime.status_message("UnrealScriptIDE: %d references to %s (%d might be to another %s)" % (len(self.references), word, len(self.references) - num_certain, word))
+        show_quick_panel([["%s%s.%s  (line %d)" % ("" if b_certain else "? ", class_name, member, line_number), filename]
+                          for class_name, filename, line_number, column, member, b_certain in self.references], self.on_reference_selected)
+
+    def on_reference_selected(self, index):
+        if index != -1:
+            class_name, filename, line_number, column, member, b_certain = self.references[index]
+            open_location(self.view, filename, line_number)
+
+
+# returns the class name of the file of view
+def class_of_view(view):
+    return os.path.basename(view.file_name() or "").split('.')[0]
+
+
+# lists the declarations of the function under the cursor (or of the function the cursor is in):
+# the declaration it overrides, the one of the base class and the overrides in all of its child classes.
+# Inside of an interface, the implementations of the function are listed instead.
+class UnrealShowOverridesCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        collector = get_collector()
+        if collector is None:
+            return
+        hierarchy = collector.get_hierarchy()
+        class_name = class_of_view(self.view)
+        function = self.function_at_cursor(collector, hierarchy)
+        if function is None:
+            sublime.status_message("UnrealScriptIDE: the cursor isn't on a function.")
+            return
+        items, self.locations = [], []
+        if hierarchy.is_interface(class_name):
+            for (c, filename, line_number, state, declaration), b_inherited in hierarchy.implementations(class_name, function):
+                items.append(["%s.%s%s" % (c, function, "  (inherited)" if b_inherited else ""), declaration])
+                self.locations.append((filename, line_number))
+        else:
+            base, declarations = hierarchy.overrides(class_name, function)
+            overridden = hierarchy.overridden(base, function) if base is not None else None
+            if overridden is not None:
+                items.append(["overrides %s.%s" % (overridden[0], function), overridden[4]])
+                self.locations.append((overridden[1], overridden[2]))
+            for (c, filename, line_number, state, declaration), depth in declarations:
+                items.append(["%s%s.%s%s" % ("    " * depth, c, state + "." if state else "", function), declaration])
+                self.locations.append((filename, line_number))
+        if not items:
+            sublime.status_message("UnrealScriptIDE: no declarations of " + function + " found.")
+            return
+        show_quick_panel(items, self.on_declaration_selected)
+
+    # the word under the cursor if it's a function, else the function the cursor is in
+    def function_at_cursor(self, collector, hierarchy):
+        point = self.view.sel()[0].begin()
+        word = self.view.substr(self.view.word(point)).strip()
+        if re.match(r"^\w+$", word) and hierarchy.is_function(word):
+            return word
+        function = collector.get_outline(self.view).block_at(point, USOutline.FUNCTION)
+        return function.name if function is not None else None
+
+    def on_declaration_selected(self, index):
+        if index != -1:
+            open_location(self.view, self.locations[index][0], self.locations[index][1])
+
+
+# lists all classes that implement the interface under the cursor (or the interface of the file):
+# the ones that implement it directly first, then their child classes.
+class UnrealShowImplementersCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        collector = get_collector()
+        if collector is None:
+            return
+        hierarchy = collector.get_hierarchy()
+        interface = self.view.substr(self.view.word(self.view.sel()[0].begin())).strip()
+        if not hierarchy.is_interface(interface):
+            interface = class_of_view(self.view)
+            if not hierarchy.is_interface(interface):
+                sublime.status_message("UnrealScriptIDE: the cursor isn't on an interface.")
+                return
+        self.implementers = hierarchy.implementers(interface)
+        if not self.implementers:
+            sublime.status_message("UnrealScriptIDE: no class implements " + interface + ".")
+            return
+        show_quick_panel([[class_name + ("" if b_direct else "  (through its parent class)"), filename]
+                          for class_name, filename, b_direct in self.implementers], self.on_class_selected)
+
+    def on_class_selected(self, index):
+        if index != -1:
+            open_location(self.view, self.implementers[index][1], 1)
+
+
+SEARCH_PANEL_NAME = 'UnrealScriptIDE_search'
+# window id -> panel with the results of 'Search in Source'
+search_panels = {}
+
+
+# returns the results panel of window. Double clicking a result opens the file at that line.
+def get_search_panel(window):
+    panel = search_panels.get(window.id())
+    if panel is not None and (not hasattr(panel, "is_valid") or panel.is_valid()):
+        return panel
+    panel = window.create_output_panel(SEARCH_PANEL_NAME) if ST3 else window.get_output_panel(SEARCH_PANEL_NAME)
+    panel.settings().set("result_file_regex", r"^([^ \t].*):$")
+    panel.settings().set("result_line_regex", r"^ +([0-9]+):")
+    panel.set_syntax_file("Packages/Default/Find Results.hidden-tmLanguage")
+    search_panels[window.id()] = panel
+    return panel
+
+
+# searches the text of all source files of the project (case insensitive), 're:' searches for a regular expression.
+# Only the files that contain the trigrams of the text are searched (see UnrealScriptIDETextIndex),
+# the results are shown in a panel while they're found.
+class UnrealSearchInSourceCommand(sublime_plugin.TextCommand):
+    # the running search, it's cancelled if another one starts
+    search = None
+    last_query = ""
+
+    def run(self, edit):
+        collector = get_collector()
+        if collector is None:
+            return
+        self.index = collector.get_text_index()
+        selection = self.view.substr(self.view.sel()[0]) if len(self.view.sel()) else ""
+        query = selection if selection and "\n" not in selection else UnrealSearchInSourceCommand.last_query
+        self.view.window().show_input_panel("Search in source ('re:' for a regular expression):", query, self.on_done, None, None)
+
+    def on_done(self, query):
+        if not query:
+            return
+        UnrealSearchInSourceCommand.last_query = query
+        b_regex = query.startswith("re:")
+        search = USTextIndex.TextSearchThread(self.index, query[3:] if b_regex else query, b_regex,
+                                              lambda batch: self.on_results(search, batch),
+                                              lambda *summary: self.on_search_done(search, *summary))
+        try:
+            search.regex()
+        except re.error as e:
+            sublime.status_message("UnrealScriptIDE: invalid regular expression: %s" % e)
+            return
+        if UnrealSearchInSourceCommand.search is not None:
+            UnrealSearchInSourceCommand.search.b_cancelled = True
+        UnrealSearchInSourceCommand.search = search
+        window = self.view.window()
+        self.panel = get_search_panel(window)
+        USData.panel_manager.replace(self.panel, 0, self.panel.size(), "Searching for \"%s\"\n" % query)
+        window.run_command("show_panel", {"panel": "output." + SEARCH_PANEL_NAME})
+        search.start()
+
+    def on_results(self, search, batch):
+        if search.b_cancelled:
+            return
+        text = "".join(["\n%s:\n%s" % (filename, "".join(["%6d: %s\n" % line for line in lines])) for filename, lines in batch])
+        USData.panel_manager.replace(self.panel, self.panel.size(), self.panel.size(), text)
+
+    def on_search_done(self, search, num_matches, num_files, num_candidates, num_indexed, duration):
+        if search.b_cancelled:
+            return
+        summary = "%d matches in %d files (searched %d of %d files in %d ms)" % (num_matches, num_files, num_candidates, num_indexed, duration * 1000)
+        USData.panel_manager.replace(self.panel, self.panel.size(), self.panel.size(), "\n" + summary + "\n")
+        sublime.status_message("UnrealScriptIDE: " + summary)
+
+
+# The symbols are matched while typing, the best match is shown in the status bar. Enter shows all matches, the best first.
+class UnrealGoToSymbolInProjectCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        collector = get_collector()
+        if collector is None:
+            return
+        self.index = collector.get_symbol_index()
+        if not len(self.index):
+            sublime.status_message("UnrealScriptIDE: the symbols of the project aren't indexed yet.")
+            return
+        self.view.window().show_input_panel("Go to symbol in project:", "", self.on_done, self.on_change, None)
+
+    def on_change(self, text):
+        symbols = self.index.search(text, 1)
+        if symbols:
+            class_name, kind, name, declaration, filename, line_number = symbols[0]
+            sublime.status_message("%s.%s  (%s)" % (class_name, name, kind) if kind != "class" else "%s  (class)" % name)
+        elif text.strip():
+            sublime.status_message("UnrealScriptIDE: no symbol matches " + text)
+
+    def on_done(self, text):
+        self.symbols = self.index.search(text)
+        if not self.symbols:
+            sublime.status_message("UnrealScriptIDE: no symbol matches " + text)
+            return
+        if len(self.symbols) == 1:
+            self.on_symbol_selected(0)
+            return
+        show_quick_panel([[(class_name + "." + name if kind != "class" else name) + "  (" + kind + ")", declaration] for class_name, kind, name, declaration, filename, line_number in self.symbols],
+                         self.on_symbol_selected)
+
+    def on_symbol_selected(self, index):
+        if index != -1:
+            symbol = self.symbols[index]
+            open_location(self.view, symbol[4], symbol[5])
@@ -0,0 +1,315 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Outline
+#-----------------------------------------------------------------------------------
+#
+#   The structure of an open file, to find out where the cursor is without searching the whole buffer:
+#       function, event and state bodies, structs, replication, defaultproperties,
+#       Begin Object / End Object blocks and cpptext.
+#   Blocks are nested (functions inside states, objects inside defaultproperties) and sorted by position,
+#   so the blocks at a position are found with a binary search on every level.
+#
+#   The outline is updated incrementally: every modification is recorded (see Outline.edited) and when the outline is
+#   needed next, only the top level block that was edited is scanned again, together with the code around it.
+#   If that isn't possible (several cursors, edits in several places, an unclosed comment, ...) the file is scanned again.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import bisect
+import re
+
+# kinds of blocks
+FUNCTION = "function"
+STATE = "state"
+STRUCT = "struct"
+REPLICATION = "replication"
+DEFAULTPROPERTIES = "defaultproperties"
+CPPTEXT = "cpptext"
+OBJECT = "object"
+
+_keyword_kinds = {"function": FUNCTION, "event": FUNCTION, "delegate": FUNCTION, "operator": FUNCTION,
+                  "preoperator": FUNCTION, "postoperator": FUNCTION, "state": STATE, "struct": STRUCT,
+                  "replication": REPLICATION, "defaultproperties": DEFAULTPROPERTIES,
+                  "structdefaultproperties": DEFAULTPROPERTIES, "cpptext": CPPTEXT, "structcpptext": CPPTEXT}
+# the blocks that can be declared inside a block of the given kind (None: the class itself)
+_allowed_kinds = {None: (FUNCTION, STATE, STRUCT, REPLICATION, DEFAULTPROPERTIES, CPPTEXT),
+                  STATE: (FUNCTION,),
+                  STRUCT: (DEFAULTPROPERTIES, CPPTEXT)}
+
+# comments, strings and names are skipped, so braces inside them don't count
+_token_regex = re.compile(r"//[^\n]*|/\*.*?(?:\*/|\Z)|\"(?:\\.|[^\"\\\n])*\"?|'[^'\n]*'?|[{};]|"
+                          r"\b(?:(function|event|delegate|operator|preoperator|postoperator|state|struct|replication|"
+                          r"defaultproperties|structdefaultproperties|cpptext|structcpptext)|(begin|end)[ \t]+object)\b",
+                          re.IGNORECASE | re.DOTALL)
+_function_name_regex = re.compile(r"(\w+)\s*\(")
+_state_name_regex = re.compile(r"\bstate\b\s*(?:\(\s*\))?\s*(\w+)", re.IGNORECASE)
+_object_class_regex = re.compile(r"\bclass\s*=\s*(\w+)", re.IGNORECASE)
+_object_begin_regex = re.compile(r"begin[ \t]+object", re.IGNORECASE)
+
+
+class OutlineBlock:
+    def __init__(self, kind, name, start, body_start):
+        self.kind = kind
+        self.name = name
+        # start of the declaration, the opening brace (or the Begin Object line) and the position after the closing brace
+        self.start = start
+        self.body_start = body_start
+        self.end = None
+        # false if the block isn't closed until the end of the file
+        self.b_closed = True
+        # the class of Begin Object blocks
+        self.class_name = ""
+        self.children = []
+        self.child_starts = []
+        # the scope of function blocks, built when it's needed (see UnrealScriptIDEScope)
+        self.scope = None
+
+    def contains(self, point):
+        return self.start <= point < self.end or (not self.b_closed and point == self.end)
+
+    def shift(self, delta):
+        self.start += delta
+        self.body_start += delta
+        self.end += delta
+        for child in self.children:
+            child.shift(delta)
+        self.child_starts = [c.start for c in self.children]
+
+    def __repr__(self):
+        return "%s %s [%d, %d)" % (self.kind, self.name, self.start, self.end)
+
+
+# returns the name of a block out of its declaration (the code between the keyword and the opening brace)
+def block_name(kind, declaration):
+    if kind == FUNCTION:
+        match = _function_name_regex.search(declaration)
+    elif kind == STATE:
+        match = _state_name_regex.search(declaration)
+    elif kind == STRUCT:
+        words = re.findall(r"\w+", declaration)[1:]
+        if "extends" in [w.lower() for w in words]:
+            words = words[:[w.lower() for w in words].index("extends")]
+        return words[-1] if words else ""
+    else:
+        return declaration.split()[0].lower() if declaration.split() else kind
+    return match.group(1) if match else ""
+
+
+# the name and class of a Begin Object block come from the rest of its line (up to the end of the block)
+def _set_object_line(block, line):
+    match = _object_class_regex.search(line)
+    block.name = line.strip()
+    block.class_name = match.group(1) if match else ""
+
+
+# scans text (which starts at offset inside the file) and returns (top level blocks, b_closed).
+# b_closed is false if the text ends inside a block or a comment, or contains a closing brace too much.
+# Blocks that aren't closed end at the end of the text.
+def scan(text, offset=0):
+    blocks = []
+    # [block or None for plain braces, ...]
+    stack = []
+    # (kind, start of the keyword) of the declaration whose opening brace comes next
+    pending = None
+    b_closed = True
+    for m in _token_regex.finditer(text):
+        token = m.group(0)
+        c = token[0]
+        if c == "/" or c == '"' or c == "'":
+            if token.startswith("/*") and (len(token) < 4 or not token.endswith("*/")):
+                b_closed = False
+            continue
+        blocks_inside = [b for b in stack if b is not None]
+        parent = blocks_inside[-1] if blocks_inside else None
+        if c == "{":
+            if pending is not None:
+                kind, keyword_start = pending
+                pending = None
+                line_start = text.rfind("\n", 0, keyword_start) + 1
+                siblings = parent.children if parent is not None else blocks
+                if siblings and siblings[-1].end is not None:
+                    line_start = max(line_start, siblings[-1].end - offset)
+                block = OutlineBlock(kind, block_name(kind, text[keyword_start:m.start()]), offset + line_start, offset + m.start())
+                siblings.append(block)
+                stack.append(block)
+            else:
+                stack.append(None)
+        elif c == "}":
+            pending = None
+            # close a pending Begin Object without End Object first
+            while stack and stack[-1] is not None and stack[-1].kind == OBJECT:
+                block = stack.pop()
+                block.end = offset + m.start()
+                # the brace is on the Begin Object line, the rest of the line doesn't belong to the block
+                begin = block.start - offset
+                if "\n" not in text[begin:m.start()]:
+                    _set_object_line(block, text[_object_begin_regex.match(text, begin).end():m.start()])
+            if not stack:
+                b_closed = False
+                continue
+            block = stack.pop()
+            if block is not None:
+                block.end = offset + m.end()
+        elif c == ";":
+            pending = None
+        elif m.group(2):
+            # Begin Object / End Object, only inside of defaultproperties
+            if parent is None or parent.kind not in (DEFAULTPROPERTIES, OBJECT) or stack[-1] is None:
+                continue
+            if m.group(2).lower() == "begin":
+                line_end = text.find("\n", m.end())
+                block = OutlineBlock(OBJECT, "", offset + m.start(), offset + m.start())
+                _set_object_line(block, text[m.end():line_end if line_end != -1 else len(text)])
+                parent.children.append(block)
+                stack.append(block)
+            elif parent.kind == OBJECT:
+                stack.pop()
+                line_end = text.find("\n", m.end())
+                parent.end = offset + (line_end if line_end != -1 else len(text))
+        else:
+            kind = _keyword_kinds[m.group(1).lower()]
+            # keywords only start a block where such a block can be declared, e.g. not inside of function bodies
+            allowed = _allowed_kinds.get(parent.kind if parent is not None else None, ())
+            if (not stack or stack[-1] is not None) and kind in allowed:
+                pending = (kind, m.start())
+
+    if stack:
+        b_closed = False
+        for block in stack:
+            if block is not None:
+                block.end = offset + len(text)
+                block.b_closed = False
+    _set_child_starts(blocks)
+    return blocks, b_closed
+
+
+def _set_child_starts(blocks):
+    for b in blocks:
+        _set_child_starts(b.children)
+        b.child_starts = [c.start for c in b.children]
+
+
+# the outline of one view.
+# get_text(begin, end) returns the current text of the view between begin and end.
+class Outline:
+    def __init__(self):
+        self._blocks = []
+        self._starts = []
+        # change count and size of the view the blocks belong to, None if it was never scanned
+        self._change_count = None
+        self._size = 0
+        # edits since the last scan: the part of the file that changed [begin, end) (positions of the last scan),
+        # the index of the first top level block inside of it and the size difference
+        self._edited = None
+        self._edit_change_count = None
+        self._delta = 0
+        # the edits can't be applied, the whole file needs to be scanned
+        self._b_stale = False
+        self.num_scans = 0
+        self.num_updates = 0
+
+    def blocks(self):
+        return self._blocks
+
+    def rebuild(self, text, change_count):
+        self._blocks = scan(text)[0]
+        self._starts = [b.start for b in self._blocks]
+        self._change_count = change_count
+        self._size = len(text)
+        self._edited = None
+        self._delta = 0
+        self._b_stale = False
+        self.num_scans += 1
+
+    # records a modification of the view. points are the cursor positions after it.
+    # Only single edits at the cursor can be applied incrementally, everything else scans the whole file again.
+    def edited(self, change_count, size, points):
+        if self._change_count is None or self._b_stale:
+            return
+        last_change_count = self._edit_change_count if self._edited is not None else self._change_count
+        delta = size - (self._size + self._delta)
+        if change_count != last_change_count + 1 or len(points) != 1 or delta == 0:
+            self._b_stale = True
+            return
+        # the edit in positions before it: text was inserted in front of the cursor, or removed behind it
+        begin = points[0] - max(delta, 0)
+        end = begin - min(delta, 0)
+        if self._edited is None:
+            self._edited = self._range_at(begin)
+        unit_begin, unit_end = self._edited[0], self._edited[1] + self._delta
+        # typing right in front of the next block could change its declaration, so could deleting
+        # the line break in front of it (the block starts at the beginning of its line)
+        b_next = self._edited[2] + self._edited[3] < len(self._blocks)
+        b_before_next = b_next and (begin >= unit_end if delta > 0 else end >= unit_end)
+        if begin < unit_begin or end > unit_end or b_before_next:
+            self._b_stale = True
+            return
+        self._delta += delta
+        self._edit_change_count = change_count
+
+    # the range that gets scanned again for an edit at point: the top level block at point (or the code between
+    # two blocks) together with the code up to the blocks before and after it. [begin, end, index of the first block, number of blocks]
+    def _range_at(self, point):
+        i = bisect.bisect_right(self._starts, point) - 1
+        if i >= 0 and self._blocks[i].contains(point):
+            first, count = i, 1
+        else:
+            first, count = i + 1, 0
+        begin = self._blocks[first - 1].end if first > 0 else 0
+        end = self._blocks[first + count].start if first + count < len(self._blocks) else self._size
+        return [begin, end, first, count]
+
+    # brings the outline up to date with the view
+    def refresh(self, get_text, change_count, size):
+        if change_count == self._change_count:
+            return
+        if (not self._b_stale and self._edited is not None and change_count == self._edit_change_count and
+                size == self._size + self._delta and self._apply_edits(get_text)):
+            self._change_count = change_count
+            self._size = size
+            self._edited = None
+            self._delta = 0
+            self.num_updates += 1
+            return
+        self.rebuild(get_text(0, size), change_count)
+
+    def _apply_edits(self, get_text):
+        begin, end, first, count = self._edited
+        text = get_text(begin, end + self._delta)
+        blocks, b_closed = scan(text, begin)
+        if not b_closed:
+            return False
+        following = self._blocks[first + count:]
+        if following:
+            # the next block starts at the beginning of its line (or where the block before it ends on that line)
+            line = text[text.rfind("\n") + 1:]
+            start = max(begin + len(text) - len(line), blocks[-1].end if blocks else begin)
+            # a line comment in front of it (e.g. the line break after it was deleted) comments out its declaration
+            if start != following[0].start + self._delta or "//" in line:
+                return False
+        for b in following:
+            b.shift(self._delta)
+        # make sure the blocks around the edit are still where they were (e.g. not the case after a replace all)
+        for b in self._blocks[first - 1:first] + following[:1] + following[-1:]:
+            if get_text(b.body_start, b.body_start + 1) != "{" or (b.b_closed and get_text(b.end - 1, b.end) != "}"):
+                return False
+        self._blocks = self._blocks[:first] + blocks + following
+        self._starts = [b.start for b in self._blocks]
+        return True
+
+    # returns all blocks at point, from the outermost to the innermost one
+    def blocks_at(self, point):
+        path = []
+        blocks, starts = self._blocks, self._starts
+        while True:
+            i = bisect.bisect_right(starts, point) - 1
+            if i < 0 or not blocks[i].contains(point):
+                return path
+            path.append(blocks[i])
+            blocks, starts = blocks[i].children, blocks[i].child_starts
+
+    # returns the innermost block of the given kind at point, or None
+    def block_at(self, point, kind):
+        for b in reversed(self.blocks_at(point)):
+            if b.kind == kind:
+                return b
+        return None
@@ -0,0 +1,328 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Packages
+#-----------------------------------------------------------------------------------
+#
+#   Enumerates the assets inside .upk / .udk packages without the asset database.
+#   Only the package summary, the name table, the import table and the export table are read,
+#   the object data itself is never touched.
+#   Packages are scanned in parallel and the result of every package is cached by its size and mtime.
+#
+#   Fully compressed packages (PKG_StoreCompressed) store their tables compressed, those are skipped.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+    import queue
+else:
+    import UnrealScriptIDECache as USCache
+    import Queue as queue
+
+PACKAGE_TAG = 0x9E2A83C1
+PKG_STORE_COMPRESSED = 0x02000000
+PACKAGE_EXTENSIONS = (".upk", ".udk")
+
+# increase this if the format of the packages cache changes
+PACKAGES_CACHE_VERSION = 1
+
+
+class PackageError(Exception):
+    pass
+
+
+# reads little endian values out of the memory mapped package
+class PackageReader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def seek(self, pos):
+        if pos < 0 or pos > len(self.data):
+            raise PackageError("offset out of range: %d" % pos)
+        self.pos = pos
+
+    def skip(self, num_bytes):
+        self.seek(self.pos + num_bytes)
+
+    def _unpack(self, fmt, size):
+        try:
+            value = struct.unpack_from(fmt, self.data, self.pos)[0]
+        except struct.error:
+            raise PackageError("unexpected end of package")
+        self.pos += size
+        return value
+
+    def int32(self):
+        return self._unpack("<i", 4)
+
+    def uint32(self):
+        return self._unpack("<I", 4)
+
+    def uint64(self):
+        return self._unpack("<Q", 8)
+
+    # length prefixed string. A negative length means UTF-16. The length includes the null char.
+    def fstring(self):
+        length = self.int32()
+        if length == 0:
+            return ""
+        if length > 0:
+            raw = self.data[self.pos:self.pos + length]
+            self.skip(length)
+            return raw[:-1].decode("latin-1")
+        length = -length * 2
+        raw = self.data[self.pos:self.pos + length]
+        self.skip(length)
+        return raw[:-2].decode("utf-16-le", "ignore")
+
+
+# the parts of the package we need
+class PackageSummary:
+    def __init__(self, reader):
+        if reader.uint32() != PACKAGE_TAG:
+            raise PackageError("not an unreal package")
+        version = reader.uint32()
+        self.file_version = version & 0xFFFF
+        self.licensee_version = version >> 16
+        if self.file_version >= 249:
+            self.headers_size = reader.int32()
+        if self.file_version >= 269:
+            self.folder_name = reader.fstring()
+        self.package_flags = reader.uint32()
+        self.name_count, self.name_offset = reader.int32(), reader.int32()
+        self.export_count, self.export_offset = reader.int32(), reader.int32()
+        self.import_count, self.import_offset = reader.int32(), reader.int32()
+
+
+# returns all assets of the package as a list of tuples: [(ClassName, Package.Group.Name), ...]
+# Throws a PackageError if the package can't be read.
+def read_package_assets(path):
+    package_name = os.path.splitext(os.path.basename(path))[0]
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise PackageError("empty file")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return read_assets(data, package_name)
+        finally:
+            data.close()
+
+
+# reads the assets out of the package data (a mmap or a string of bytes)
+def read_assets(data, package_name):
+    reader = PackageReader(data)
+    summary = PackageSummary(reader)
+    ver = summary.file_version
+    if summary.package_flags & PKG_STORE_COMPRESSED:
+        raise PackageError("compressed package")
+
+    # name table
+    names = []
+    reader.seek(summary.name_offset)
+    for i in range(summary.name_count):
+        names.append(reader.fstring())
+        if ver >= 195:
+            reader.skip(8)  # flags
+        else:
+            reader.skip(4)
+
+    def read_name():
+        index = reader.int32()
+        number = reader.int32() if ver >= 343 else 0
+        if index < 0 or index >= len(names):
+            raise PackageError("name index out of range: %d" % index)
+        if number > 0:
+            return "%s_%d" % (names[index], number - 1)
+        return names[index]
+
+    # import table, we only need the object names (that's where the class names of exports are)
+    imports = []
+    reader.seek(summary.import_offset)
+    for i in range(summary.import_count):
+        read_name()             # class package
+        read_name()             # class name
+        reader.skip(4)          # outer
+        imports.append(read_name())
+
+    # export table: (class index, outer index, object name)
+    exports = []
+    reader.seek(summary.export_offset)
+    for i in range(summary.export_count):
+        class_index = reader.int32()
+        reader.skip(4)          # super
+        outer_index = reader.int32()
+        object_name = read_name()
+        if ver >= 220:
+            reader.skip(4)      # archetype
+        reader.skip(8 if ver >= 195 else 4)     # object flags
+        serial_size = reader.int32()
+        if serial_size or ver >= 249:
+            reader.skip(4)      # serial offset
+        if ver < 543:
+            # component map: TMap<FName, int>
+            count = reader.int32()
+            reader.skip(count * (12 if ver >= 343 else 8))
+        if ver >= 247:
+            reader.skip(4)      # export flags
+        if ver >= 322:
+            count = reader.int32()  # net object counts
+            reader.skip(count * 4 + 16)     # + package guid
+        if ver >= 475:
+            reader.skip(4)      # package flags
+        exports.append((class_index, outer_index, object_name))
+
+    def class_name(class_index):
+        if class_index < 0 and -class_index - 1 < len(imports):
+            return imports[-class_index - 1]
+        if 0 < class_index <= len(exports):
+            return exports[class_index - 1][2]
+        return "Class"
+
+    # only objects directly inside the package or inside groups are assets (no sub objects like components)
+    assets = []
+    for class_index, outer_index, object_name in exports:
+        cls = class_name(class_index)
+        if cls == "Package":
+            continue
+        path = [object_name]
+        while outer_index > 0:
+            if outer_index > len(exports):
+                path = None
+                break
+            outer = exports[outer_index - 1]
+            if class_name(outer[0]) != "Package":
+                path = None
+                break
+            path.append(outer[2])
+            outer_index = outer[1]
+        if path:
+            path.append(package_name)
+            assets.append((cls, ".".join(reversed(path))))
+    return assets
+
+
+# returns all package files in the given folders
+def find_packages(folders):
+    packages = []
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            for f in files:
+                if f.lower().endswith(PACKAGE_EXTENSIONS):
+                    packages.append(os.path.join(root, f))
+    return packages
+
+
+# Packages cache:
+#   a plain text header line, followed by the zlib compressed content:
+#   for every package one line "path\tsize\tmtime\tcount", followed by count lines "ClassName AssetName"
+def load_packages_cache(cache_file):
+    packages = {}
+    if not os.path.exists(cache_file):
+        return packages
+    with open(cache_file, 'rb') as f:
+        if f.readline().rstrip(b"\n") != ("%d" % PACKAGES_CACHE_VERSION).encode("utf-8"):
+            return packages
+        data = f.read()
+    try:
+        lines = zlib.decompress(data).decode("utf-8").split("\n")
+    except zlib.error:
+        return packages
+    i = 0
+    while i < len(lines) and lines[i]:
+        path, size, mtime, count = lines[i].split("\t")
+        count = int(count)
+        packages[path] = (int(size), int(mtime), [tuple(l.split(" ", 1)) for l in lines[i + 1:i + 1 + count]])
+        i += 1 + count
+    return packages
+
+
+def save_packages_cache(cache_file, packages):
+    lines = []
+    for path, (size, mtime, assets) in packages.items():
+        lines.append("%s\t%d\t%d\t%d" % (path, size, mtime, len(assets)))
+        lines += [c + " " + a for c, a in assets]
+    body = zlib.compress("\n".join(lines).encode("utf-8"), 1)
+    USCache.write_file_atomic(cache_file, ("%d" % PACKAGES_CACHE_VERSION).encode("utf-8") + b"\n" + body)
+
+
+# reads packages out of the queue until it is empty
+class PackageScannerThread(threading.Thread):
+    def __init__(self, jobs, results):
+        self.jobs = jobs
+        self.results = results
+        threading.Thread.__init__(self)
+
+    def run(self):
+        while True:
+            try:
+                path, size, mtime = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                assets = read_package_assets(path)
+            except (PackageError, IOError, OSError, ValueError) as e:
+                print("couldn't read package ", path, ": ", e)
+                assets = []
+            self.results.append((path, size, mtime, assets))
+
+
+# scans the packages of the folders in the background (see scan_packages), the assets are in self.assets when it's done.
+class PackageScanThread(threading.Thread):
+    def __init__(self, folders, cache_file):
+        self.folders = folders
+        self.cache_file = cache_file
+        self.assets = []
+        threading.Thread.__init__(self)
+
+    def run(self):
+        self.assets = scan_packages(self.folders, self.cache_file)
+
+
+# returns the assets of all packages inside the given folders.
+# Packages that didn't change since the last scan are taken from the cache.
+def scan_packages(folders, cache_file, num_threads=4):
+    cached = load_packages_cache(cache_file)
+    packages = {}
+    jobs = queue.Queue()
+    for path in find_packages(folders):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        size, mtime = st.st_size, int(st.st_mtime * 1000)
+        entry = cached.get(path)
+        if entry and entry[0] == size and entry[1] == mtime:
+            packages[path] = entry
+        else:
+            jobs.put((path, size, mtime))
+
+    if not jobs.empty():
+        print("scanning ", jobs.qsize(), " packages for assets")
+        results = []
+        threads = [PackageScannerThread(jobs, results) for i in range(max(1, num_threads))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for path, size, mtime, assets in results:
+            packages[path] = (size, mtime, assets)
+
+    if packages != cached:
+        try:
+            save_packages_cache(cache_file, packages)
+        except (IOError, OSError) as e:
+            print("couldn't save the packages cache: ", e)
+
+    assets = []
+    for path in sorted(packages.keys()):
+        assets += packages[path][2]
+    return assets
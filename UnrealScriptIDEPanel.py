@@ -0,0 +1,110 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Panel
+#-----------------------------------------------------------------------------------
+#
+#   The helper panel (documentation of the inserted completion, build log on ST2).
+#       - every window has one panel that is reused, it is only created once.
+#       - the syntax of the panel is only set if it changes (e.g. from UnrealScript to the log).
+#       - the documentation of a symbol is formatted once and kept in a small LRU cache.
+#   With the setting "documentation_display": "popup" the documentation is shown in a popup next to the cursor instead,
+#   which doesn't change the layout of the window (needs a Sublime Text version with popups).
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDECache as USCache
+
+PANEL_NAME = 'UnrealScriptAutocomplete_panel'
+LOG_SYNTAX = "Packages/UnrealScriptIDE/Log.tmLanguage"
+POPUP_MAX_WIDTH = 800
+
+
+class PanelManager:
+    def __init__(self, max_documents=256):
+        # window id -> output panel
+        self._panels = {}
+        # panel id -> syntax file it has
+        self._syntaxes = {}
+        # symbol -> [plain text, html or None]
+        self._documents = USCache.LRUCache(max_documents)
+
+    # returns the helper panel of window, creates it if the window doesn't have one yet.
+    def get_panel(self, window):
+        panel = self._panels.get(window.id())
+        if panel is not None and (not hasattr(panel, "is_valid") or panel.is_valid()):
+            return panel
+        # get_output_panel / create_output_panel create a new panel (and clear the old one), so they're only called once
+        panel = window.create_output_panel(PANEL_NAME) if ST3 else window.get_output_panel(PANEL_NAME)
+        self._panels[window.id()] = panel
+        self._syntaxes.pop(panel.id(), None)
+        return panel
+
+    # writes text to the helper panel of view's window and shows it.
+    # if b_overwrite is false, the text is appended (and the panel scrolls to the end).
+    def print_text(self, view, text, b_overwrite=True, bLog=False):
+        window = view.window()
+        if window is None:
+            return
+        panel = self.get_panel(window)
+        if b_overwrite:
+            self.replace(panel, 0, panel.size(), text)
+        else:
+            self.replace(panel, panel.size(), panel.size(), text)
+            panel.show(panel.size())
+
+        syntax = LOG_SYNTAX if bLog else view.settings().get('syntax')
+        if self._syntaxes.get(panel.id()) != syntax:
+            self._syntaxes[panel.id()] = syntax
+            panel.set_syntax_file(syntax)
+            if bLog:
+                panel.set_name("UnrealLog")
+        window.run_command("show_panel", {"panel": "output." + PANEL_NAME})
+
+    def replace(self, panel, begin, end, text):
+        if ST3:
+            panel.run_command("replace_region", {"regionA": begin, "regionB": end, "text": text})
+        else:
+            panel_edit = panel.begin_edit()
+            panel.replace(panel_edit, sublime.Region(begin, end), text)
+            panel.end_edit(panel_edit)
+
+    # returns true if the documentation is shown in popups
+    def b_popups(self, view):
+        mode = sublime.load_settings('UnrealScriptIDE.sublime-settings').get('documentation_display', "panel")
+        return mode == "popup" and hasattr(view, "show_popup")
+
+    # shows the documentation of symbol, render() returns it as text. It's only called the first time the symbol is shown.
+    # Returns true if it was shown in the panel (false for popups).
+    def show_documentation(self, view, symbol, render):
+        document = self._documents.get(symbol)
+        if document is None:
+            document = [render(), None]
+            self._documents.put(symbol, document)
+        if self.b_popups(view):
+            if document[1] is None:
+                document[1] = to_html(document[0])
+            view.show_popup(document[1], sublime.COOPERATE_WITH_AUTO_COMPLETE, -1, POPUP_MAX_WIDTH)
+            return False
+        self.print_text(view, document[0])
+        return True
+
+    # the documentation of symbol is rendered again the next time it's shown
+    def forget(self, symbol):
+        self._documents.remove(symbol)
+
+    def clear(self):
+        self._documents.clear()
+
+
+# formats documentation for a popup
+def to_html(text):
+    import html
+    lines = html.escape(text.strip("\r\n"), False).replace("\t", "    ").split("\n")
+    lines = [line.replace("  ", "&nbsp; ") for line in lines]
+    return '<body id="unrealscript-documentation"><div style="font-family: monospace">%s</div></body>' % "<br>".join(lines)
@@ -0,0 +1,110 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Parse Store
+#-----------------------------------------------------------------------------------
+#
+#   Parse results (functions, variables, consts and structs of a file) by content hash, shared by all projects of the user.
+#   Several UDK installations and git worktrees contain mostly the same files, those are only parsed once:
+#       - on the disk, every parsed file is saved under its content hash in the User folder:
+#             ParseStore\<format version>-<plug-in version>\ab\abcdef....bin
+#         The file names inside an entry are relative, they're set to the file that loads it.
+#       - in memory, classes with the same content (e.g. Engine\Classes\Actor.uc of two Src roots) share the same members.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import os
+import shutil
+import threading
+import zlib
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDEIndexFile as USIndexFile
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDEIndexFile as USIndexFile
+    import UnrealScriptIDECache as USCache
+
+ENTRY_EXTENSION = ".bin"
+# members of this many different files are shared in memory
+MAX_SHARED_ENTRIES = 4096
+
+
+def store_folder():
+    return os.path.join(sublime.packages_path(), "User", "UnrealScriptIDE", "ParseStore")
+
+
+# entries of older versions can't be read anymore
+def version_name():
+    return "%d-%s" % (USIndexFile.FORMAT_VERSION, USIndexFile.PLUGIN_VERSION)
+
+
+# content hash -> members. Used from the parser threads, so every access is locked.
+# if folder is None, parse results are only shared in memory.
+class ParseStore:
+    def __init__(self, folder=None):
+        self._folder = None
+        if folder is not None:
+            self._folder = os.path.join(folder, version_name())
+            threading.Thread(target=self.remove_old_versions, args=(folder,)).start()
+        self._lock = threading.Lock()
+        # content hash -> (functions, variables, consts, structs)
+        self._members = USCache.LRUCache(MAX_SHARED_ENTRIES)
+
+    def entry_path(self, content_hash):
+        return os.path.join(self._folder, content_hash[:2], content_hash + ENTRY_EXTENSION)
+
+    # returns the members of a file with the given content hash: (functions, variables, consts, structs) or None.
+    # if b_load is true, also looks for them on the disk. file_name is used for the members loaded from the disk.
+    def get(self, content_hash, file_name, b_load=False):
+        with self._lock:
+            members = self._members.get(content_hash)
+        if members is not None or not b_load or self._folder is None:
+            return members
+        path = self.entry_path(content_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = zlib.decompress(f.read())
+            members = USIndexFile.decode_members(data, lambda f: file_name if f == "" else f)
+        except Exception as e:
+            print("couldn't load ", path, ": ", e)
+            return None
+        with self._lock:
+            # another thread might have been faster
+            shared = self._members.get(content_hash)
+            if shared is not None:
+                return shared
+            self._members.put(content_hash, members)
+        return members
+
+    # shares the members of my_class (parsed out of a file with the given content hash), if b_save is true also on the disk.
+    # Returns the members that should be used for the class, which are the already shared ones if there are any.
+    def put(self, content_hash, my_class, b_save=True):
+        members = (my_class._functions, my_class._variables, my_class._consts, my_class._structs)
+        with self._lock:
+            shared = self._members.get(content_hash)
+            if shared is not None:
+                return shared
+            self._members.put(content_hash, members)
+        if self._folder is not None and b_save:
+            path = self.entry_path(content_hash)
+            if not os.path.exists(path):
+                file_name = my_class.file_name()
+                try:
+                    if not os.path.isdir(os.path.dirname(path)):
+                        os.makedirs(os.path.dirname(path))
+                    USCache.write_file_atomic(path, zlib.compress(USIndexFile.encode_members(my_class, lambda f: "" if f == file_name else f), 1))
+                except (IOError, OSError) as e:
+                    # e.g. written by another window at the same time
+                    print("couldn't save ", path, ": ", e)
+        return members
+
+    def remove_old_versions(self, folder):
+        if not os.path.isdir(folder):
+            return
+        for f in os.listdir(folder):
+            if f != version_name():
+                shutil.rmtree(os.path.join(folder, f), True)
@@ -21,8 +21,10 @@ ST3 = int(sublime.version()) > 3000
 
 if ST3:
     import UnrealScriptIDE.UnrealScriptIDEData as USData
+    import queue
 else:
     import UnrealScriptIDEData as USData
+    import Queue as queue
 
 
 # Adds the class inside (filename) to the collector.
@@ -39,18 +41,20 @@ class ClassesCollectorThread(threading.Thread):
 
     def run(self):  # gets called when the thread is created
         if self.b_first:
-            for f in self.open_folder_arr:
-                if "Development\\Src" in f:
-                    self.collector.src_folder = f
-                    # if we saved the classes to a cache before, load them from there.
-                    if not self.collector.b_rebuild_cache and os.path.exists(os.path.join(f, "classes_cache.obj")):
-                        print("cache exists. Loading classes from memory")
-                        self.collector.load_classes_from_cache()
-                    else:
-                        print("no cache file found, start parsing all classes")
+            src_folders = [f for f in self.open_folder_arr if "Development\\Src" in f]
+            # in multi-root mode, all open Src folders are indexed, otherwise only the first one
+            if not sublime.load_settings('UnrealScriptIDE.sublime-settings').get('multi_root', False):
+                src_folders = src_folders[:1]
+            if src_folders:
+                self.collector.set_src_folders(src_folders)
+                # if we saved the classes to a cache before, load them from there.
+                if not self.collector.b_rebuild_cache and self.collector.load_classes_from_cache():
+                    print("cache exists. Loaded classes from memory")
+                else:
+                    print("no usable cache found, start parsing all classes")
+                    for f in src_folders:
                         self.get_classes(f)
-                        self.get_inbuilt_classes()
-                    break
+                    self.get_inbuilt_classes()
 
         else:
             if self.filename is not None:
@@ -61,8 +65,7 @@ class ClassesCollectorThread(threading.Thread):
         for file in os.listdir(path):
             dirfile = os.path.join(path, file)
             if os.path.isfile(dirfile) and dirfile.endswith(".uc"):
-                    self.collector._collector_threads.append(ClassesCollectorThread(self.collector, dirfile, 30, self.open_folder_arr))
-                    self.collector._collector_threads[-1].start()
+                    self.collector.start_job(ClassesCollectorThread(self.collector, dirfile, 30, self.open_folder_arr))
 
             elif os.path.isdir(dirfile):
                 self.get_classes(dirfile)
@@ -70,8 +73,7 @@ class ClassesCollectorThread(threading.Thread):
     def get_inbuilt_classes(self):
         for f in self.inbuild_classes:
             path = os.path.join(sublime.packages_path(), "UnrealScriptIDE\\InbuiltClasses\\" + f + ".uc")
-            self.collector._collector_threads.append(ClassesCollectorThread(self.collector, path, 30, self.open_folder_arr))
-            self.collector._collector_threads[-1].start()
+            self.collector.start_job(ClassesCollectorThread(self.collector, path, 30, self.open_folder_arr))
 
     # parses the filename and saves the class declaration to the _classes
     def save_classes(self):
@@ -96,6 +98,39 @@ class ClassesCollectorThread(threading.Thread):
                         break
 
 
+# returns the lines of text like iterating over the file would (every line ends with its line break)
+def split_lines(text):
+    lines = [line + "\n" for line in text.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+# parses the members of a file without changing any class: (functions, variables, consts, structs)
+# text is the content of the file, if it was already read.
+def parse_members(filename, text=None):
+    parser = ParserThread(None, filename, 30, False)
+    parser.save_functions(filename, text)
+    return parser._functions, parser._variables, parser._consts, parser._structs
+
+
+# returns the rows of all members: [(kind, name, type, declaration, line number, documentation), ...]
+def member_rows(functions, variables, consts, structs):
+    rows = []
+    for f in functions:
+        rows.append(("function" if f._b_is_function == 1 else "event", f.function_name(), f.return_type(), f.declaration(), f.line_number(), f.documentation()))
+    for v in variables:
+        rows.append(("variable", v.name(), v.type() if v._variable_modifiers else "", v.declaration(), v.line_number(), v.description()))
+    for c in consts:
+        rows.append(("const", c.name(), "", "const " + c.name() + " = " + c.value() + ";", c.line_number(), c.description()))
+    for s in structs:
+        rows.append(("struct", s.name(), "struct", s.declaration(), s.line_number(), s.description()))
+        for v in s.get_variables():
+            rows.append(("variable", v.name(), v.type() if v._variable_modifiers else "", v.declaration(), v.line_number(), v.description()))
+    return rows
+
+
 # parses one file and creates a new thread for the parent class
 # this saves all functions and variables in the according classes object
 # ! (TODO): instead of the filename I could pass the class object
@@ -109,10 +144,12 @@ class ParserThread(threading.Thread):
     _structs = []
     _struct_variables = []
 
-    def __init__(self, collector, filename, timeout_seconds):
+    # if b_parse_parent is False, the parent class isn't parsed as well
+    def __init__(self, collector, filename, timeout_seconds, b_parse_parent=True):
         self.collector = collector
         self.timeout = timeout_seconds
         self.filename = filename
+        self.b_parse_parent = b_parse_parent
         self._functions = []
         self._variables = []
         self._consts = []
@@ -131,15 +168,21 @@ class ParserThread(threading.Thread):
                 self.update_class(my_class)
 
             print("not parsed yet: ", self.filename)
+            stamp = USData.source_stamp(self.filename)
             self.update_class(my_class)
-            self.save_functions(self.filename)  # parse current file
+            # a file with the same content might have been parsed before (e.g. in another Src folder or project)
+            members = self.collector.shared_members(stamp, self.filename, True)
+            if members is None:
+                self.save_functions(self.filename)  # parse current file
+                members = (self._functions, self._variables, self._consts, self._structs)
 
             parent_class_name = my_class.parent_class()
             parent_file = self.get_file_name(parent_class_name)
-            if parent_file is not None:
+            if parent_file is not None and self.b_parse_parent:
                 self.collector.add_function_collector_thread(parent_file)   # create a new thread to parse the parent_file too
 
-            my_class.save_completions(self._functions, self._variables, self._consts, self._structs)
+            my_class.save_completions(members[0], members[1], members[2], members[3], stamp)
+            self.collector.share_members(my_class, True)
 
     # checks the class and if there are changes, update the class declaration of to the class
     def update_class(self, my_class=None):
@@ -194,134 +237,142 @@ class ParserThread(threading.Thread):
         return None
 
     # extract functions, event and variables and split them into smaller groups.
+    # text is the content of the file, if it was already read.
     # ! TODO:   -support ENUMS
-    def save_functions(self, file_name):
+    def save_functions(self, file_name, text=None):
+        if text is not None:
+            self.save_functions_of_lines(split_lines(text), file_name)
+            return
         with open(file_name, 'rU') as file_lines:
-            current_documentation = ""
-            long_line = ""
-            bBracesNotOnSameLine = False
-            bCppText = False
-            CppTextBracketsNum = 0
-            bStruct = False
-            regex_f = re.compile(r"([a-zA-Z0-9()\s]*?)function[\s]+((coerce)\s*)?([a-zA-z0-9<>_]*?)[\s]*([a-zA-z0-9_-]+)([\s]*\(+)(.*)((\s*\))+)[\s]*(const)?[\s]*;?[\s]*(\/\/.*)?")
-            regex_e = re.compile(r"([a-zA-Z0-9()\s]*?)event[\s]+((coerce)\s*)?([a-zA-z0-9<>_]*?)[\s]*([a-zA-z0-9_-]+)([\s]*\(+)(.*)((\s*\))+)[\s]*(const)?[\s]*;?[\s]*(\/\/.*)?")
-            regex_c = re.compile(r"const[\s]+([a-zA-Z0-9_]+)[\s]*=[\s]*([a-zA-Z0-9\"'!_\-.]+);")
-
-            for i, line in enumerate(file_lines):
-                if line.strip() == "":
+            self.save_functions_of_lines(file_lines, file_name)
+
+    # the lines are the ones of file_name (see save_functions)
+    def save_functions_of_lines(self, file_lines, file_name):
+        current_documentation = ""
+        long_line = ""
+        bBracesNotOnSameLine = False
+        bCppText = False
+        CppTextBracketsNum = 0
+        bStruct = False
+        regex_f = re.compile(r"([a-zA-Z0-9()\s]*?)function[\s]+((coerce)\s*)?([a-zA-z0-9<>_]*?)[\s]*([a-zA-z0-9_-]+)([\s]*\(+)(.*)((\s*\))+)[\s]*(const)?[\s]*;?[\s]*(\/\/.*)?")
+        regex_e = re.compile(r"([a-zA-Z0-9()\s]*?)event[\s]+((coerce)\s*)?([a-zA-z0-9<>_]*?)[\s]*([a-zA-z0-9_-]+)([\s]*\(+)(.*)((\s*\))+)[\s]*(const)?[\s]*;?[\s]*(\/\/.*)?")
+        regex_c = re.compile(r"const[\s]+([a-zA-Z0-9_]+)[\s]*=[\s]*([a-zA-Z0-9\"'!_\-.]+);")
+
+        for i, line in enumerate(file_lines):
+            if line.strip() == "":
+                current_documentation = ""
+                continue
+
+            # skip lines inside cpptext.
+            if bCppText:
+                if '{' == line.strip():
+                    CppTextBracketsNum += 1
+                elif '}' == line.strip():
+                    CppTextBracketsNum -= 1
+                if CppTextBracketsNum == 0:
+                    bCppText = False
+                continue
+
+            if bStruct:
+                # struct finished, save variables to struct.
+                if "};" in line:
+                    bStruct = False
+                    self._structs[-1].save_variables(self._struct_variables)
+                    self._struct_variables = []
+
+            if "cpptext" == line.lower().strip():
+                bCppText = True
+
+            if "/*" == line.lstrip()[:2]:                       # start capturing documentation
+                current_documentation = line
+                continue
+            elif "/" == line.lstrip()[0] and current_documentation == "":
+                current_documentation = line
+                continue
+
+            if current_documentation != "":     # add to documentation
+                if current_documentation != line:
+                    current_documentation += line
+            if line.lstrip()[0] == '*' or line.lstrip()[:2] == "//":
+                continue
+
+            left_line = line.split('//')[0].lower()
+            if bBracesNotOnSameLine:
+                if ')' in left_line:
+                    bBracesNotOnSameLine = False
+                    new_line = ' '.join(long_line.split()) + ')'
+                    if not self.extract_functions(new_line, new_line, i, file_name, current_documentation, regex_f, regex_e):
+                        if not self.extract_comlicated_function(new_line, new_line, i, file_name, current_documentation, regex_f, regex_e):
+                            print("Failed to parse this function/event:\n", new_line, "\n(it probably should fail. If you see a line that fails that shouldn't, contact me)")
+                        # if "event final Inventory CreateInventory( class<Inventory> NewInvClass, optional bool bDoNotActivate ) {)" == new_line:
+                        #     self.add_func("", "Inventory", "CreateInventory", "class<Inventory> NewInvClass, optional bool bDoNotActivate", i, file_name, current_documentation, False)
+                        # elif "native noexport final function coerce actor Spawn ( class<actor> SpawnClass, optional actor SpawnOwner, optional name SpawnTag, optional vector SpawnLocation, optional rotator SpawnRotation, optional Actor ActorTemplate, optional bool bNoCollisionFail)" in new_line:
+                        #     self.add_func("native noexport final ", "actor", "Spawn", "class<actor> SpawnClass, optional actor SpawnOwner, optional name SpawnTag, optional vector SpawnLocation, optional rotator SpawnRotation, optional Actor ActorTemplate, optional bool bNoCollisionFail", i, file_name, current_documentation, False)
                     current_documentation = ""
                     continue
+                else:
+                    long_line += line
+
+            if not bStruct and "struct" in left_line:
+                if "struct" == left_line.split()[0]:
+                    bStruct = True
+                    self._struct_variables = []
+                    if "extends" in left_line:
+                        line = line.split("extends")[0]
+                    struct_name = line.split()[-1]
+                    self.add_struct(struct_name, line, i, file_name, current_documentation)
+                    current_documentation = ""
 
-                # skip lines inside cpptext.
-                if bCppText:
-                    if '{' == line.strip():
-                        CppTextBracketsNum += 1
-                    elif '}' == line.strip():
-                        CppTextBracketsNum -= 1
-                    if CppTextBracketsNum == 0:
-                        bCppText = False
-                    continue
-
-                if bStruct:
-                    # struct finished, save variables to struct.
-                    if "};" in line:
-                        bStruct = False
-                        self._structs[-1].save_variables(self._struct_variables)
-                        self._struct_variables = []
-
-                if "cpptext" == line.lower().strip():
-                    bCppText = True
-
-                if "/*" == line.lstrip()[:2]:                       # start capturing documentation
-                    current_documentation = line
+            if "function" in left_line or "event" in left_line:  # get possible lines containing functions / events
+                if self.extract_functions(line, left_line, i, file_name, current_documentation, regex_f, regex_e):
+                    current_documentation = ""
+                else:   # fail to capture function, check if it should really fail or if it is a function on multiple lines:
+                    b_fail = True
+                    for i, txt in enumerate(left_line.split()):
+                        if txt.lower() == "function" or txt.lower() == "event":
+                            b_fail = False
+                            if '(' in left_line.split()[i:] and ')' in left_line.split()[i:]:
+                                print("Failed to parse this function/event:\n", line, "(it probably should fail. If you see a line that fails that shouldn't, contact me)")
+                                b_fail = True
+                                continue
+                            continue
+                    if not b_fail:
+                        bBracesNotOnSameLine = True
+                        long_line = line
+
+            elif "var" in left_line:  # get possible lines containing variables
+                # 1: vartype, 2: name, 3: documentation
+                var_doc_line = line.split('//')
+                if len(var_doc_line) < 2:
+                    var_doc_line = line.split('/**')
+                var_line = var_doc_line[0].split()
+                if var_line and "var" not in var_line[0]:
                     continue
-                elif "/" == line.lstrip()[0] and current_documentation == "":
-                    current_documentation = line
+                elif not var_line:
                     continue
 
-                if current_documentation != "":     # add to documentation
-                    if current_documentation != line:
-                        current_documentation += line
-                if line.lstrip()[0] == '*' or line.lstrip()[:2] == "//":
-                    continue
+                doc_line = ''
+                if len(var_doc_line) > 1:
+                    doc_line = var_doc_line[1].rstrip()
 
-                left_line = line.split('//')[0].lower()
-                if bBracesNotOnSameLine:
-                    if ')' in left_line:
-                        bBracesNotOnSameLine = False
-                        new_line = ' '.join(long_line.split()) + ')'
-                        if not self.extract_functions(new_line, new_line, i, file_name, current_documentation, regex_f, regex_e):
-                            if not self.extract_comlicated_function(new_line, new_line, i, file_name, current_documentation, regex_f, regex_e):
-                                print("Failed to parse this function/event:\n", new_line, "\n(it probably should fail. If you see a line that fails that shouldn't, contact me)")
-                            # if "event final Inventory CreateInventory( class<Inventory> NewInvClass, optional bool bDoNotActivate ) {)" == new_line:
-                            #     self.add_func("", "Inventory", "CreateInventory", "class<Inventory> NewInvClass, optional bool bDoNotActivate", i, file_name, current_documentation, False)
-                            # elif "native noexport final function coerce actor Spawn ( class<actor> SpawnClass, optional actor SpawnOwner, optional name SpawnTag, optional vector SpawnLocation, optional rotator SpawnRotation, optional Actor ActorTemplate, optional bool bNoCollisionFail)" in new_line:
-                            #     self.add_func("native noexport final ", "actor", "Spawn", "class<actor> SpawnClass, optional actor SpawnOwner, optional name SpawnTag, optional vector SpawnLocation, optional rotator SpawnRotation, optional Actor ActorTemplate, optional bool bNoCollisionFail", i, file_name, current_documentation, False)
-                        current_documentation = ""
-                        continue
+                var_names = []
+                var_names.append(var_line.pop().rstrip('\n\r\t ;'))     # get the right most variable
+                for v in var_line:
+                    if "," in var_line[-1]:     # if there are multiple variable names in one line separated by ',' , get them.
+                        var_names.append(var_line.pop().rstrip('\n\r\t ,'))
                     else:
-                        long_line += line
-
-                if not bStruct and "struct" in left_line:
-                    if "struct" == left_line.split()[0]:
-                        bStruct = True
-                        self._struct_variables = []
-                        if "extends" in left_line:
-                            line = line.split("extends")[0]
-                        struct_name = line.split()[-1]
-                        self.add_struct(struct_name, line, i, file_name, current_documentation)
-                        current_documentation = ""
-
-                if "function" in left_line or "event" in left_line:  # get possible lines containing functions / events
-                    if self.extract_functions(line, left_line, i, file_name, current_documentation, regex_f, regex_e):
-                        current_documentation = ""
-                    else:   # fail to capture function, check if it should really fail or if it is a function on multiple lines:
-                        b_fail = True
-                        for i, txt in enumerate(left_line.split()):
-                            if txt.lower() == "function" or txt.lower() == "event":
-                                b_fail = False
-                                if '(' in left_line.split()[i:] and ')' in left_line.split()[i:]:
-                                    print("Failed to parse this function/event:\n", line, "(it probably should fail. If you see a line that fails that shouldn't, contact me)")
-                                    b_fail = True
-                                    continue
-                                continue
-                        if not b_fail:
-                            bBracesNotOnSameLine = True
-                            long_line = line
-
-                elif "var" in left_line:  # get possible lines containing variables
-                    # 1: vartype, 2: name, 3: documentation
-                    var_doc_line = line.split('//')
-                    if len(var_doc_line) < 2:
-                        var_doc_line = line.split('/**')
-                    var_line = var_doc_line[0].split()
-                    if var_line and "var" not in var_line[0]:
-                        continue
-                    elif not var_line:
-                        continue
-
-                    doc_line = ''
-                    if len(var_doc_line) > 1:
-                        doc_line = var_doc_line[1].rstrip()
-
-                    var_names = []
-                    var_names.append(var_line.pop().rstrip('\n\r\t ;'))     # get the right most variable
-                    for v in var_line:
-                        if "," in var_line[-1]:     # if there are multiple variable names in one line separated by ',' , get them.
-                            var_names.append(var_line.pop().rstrip('\n\r\t ,'))
-                        else:
-                            break
-                    for name in var_names:
-                        if "<" in name or ">" in name:
-                            name = re.sub(r'\<.*?\>', '', name)
-                        self.add_var(var_line, name, doc_line, i, file_name, current_documentation, bStruct)
+                        break
+                for name in var_names:
+                    if "<" in name or ">" in name:
+                        name = re.sub(r'\<.*?\>', '', name)
+                    self.add_var(var_line, name, doc_line, i, file_name, current_documentation, bStruct)
+                current_documentation = ""
+
+            elif "const" in left_line:
+                if self.extract_const(line, i, file_name, current_documentation, regex_c):
                     current_documentation = ""
-
-                elif "const" in left_line:
-                    if self.extract_const(line, i, file_name, current_documentation, regex_c):
-                        current_documentation = ""
-                    else:   # fail to capture const
-                        print("Failed to parse const:\n", line, "(it probably should fail. If you see a line that fails that shouldn't, contact me)")
+                else:   # fail to capture const
+                    print("Failed to parse const:\n", line, "(it probably should fail. If you see a line that fails that shouldn't, contact me)")
 
     # get the function in left_line. If this failed return false
     def extract_functions(self, line, left_line, i, file_name, current_documentation, regex_f, regex_e):
@@ -358,3 +409,106 @@ class ParserThread(threading.Thread):
             self.add_const(matches.group(1), matches.group(2), comment, i, file_name, current_documentation)
             return True
         return False
+
+
+# queue of the files whose file indexes need to be updated (see FileIndexerThread).
+# All of them are indexed by one thread, so the indexes are never updated or saved by two threads at once.
+# The thread runs as a job of the collector, so the collector isn't idle while files are indexed.
+class FileIndexer:
+    def __init__(self, collector):
+        self.collector = collector
+        self._lock = threading.Lock()
+        # [(filenames, b_remove_missing), ...]
+        self._requests = []
+        self._thread = None
+
+    # indexes the files in the background, after the ones that are already queued.
+    def index_files(self, filenames, b_remove_missing=False):
+        with self._lock:
+            self._requests.append((filenames, b_remove_missing))
+            if self._thread is None:
+                self._thread = self.collector.start_job(FileIndexerThread(self))
+
+    # returns the next (filenames, b_remove_missing), or None if the queue is empty. The thread ends then.
+    def next_request(self):
+        with self._lock:
+            if self._requests:
+                return self._requests.pop(0)
+            self._thread = None
+            return None
+
+
+# reads every queued file once and passes its content to the file indexes of the collector (e.g. the asset references).
+# Files that didn't change since they were indexed are skipped.
+# Indexes with b_parse_members get the member rows of the file too (see member_rows).
+# if b_remove_missing is true, all indexed files that are not in filenames get removed from the indexes.
+# The indexes are saved after every request.
+class FileIndexerThread(threading.Thread):
+    def __init__(self, indexer):
+        self.indexer = indexer
+        self.collector = indexer.collector
+        threading.Thread.__init__(self)
+
+    def run(self):
+        while True:
+            request = self.indexer.next_request()
+            if request is None:
+                return
+            try:
+                self.index_files(*request)
+            except Exception as e:
+                # the thread has to go on, otherwise the queued files would never be indexed
+                print("couldn't update the file indexes: ", e)
+
+    def index_files(self, filenames, b_remove_missing):
+        indexes = [index for index, cache_name in self.collector.file_indexes()]
+        if b_remove_missing:
+            existing = set(filenames)
+            for index in indexes:
+                for filename in index.files():
+                    if filename not in existing:
+                        index.remove_file(filename)
+
+        for filename in filenames:
+            try:
+                mtime = os.path.getmtime(filename)
+            except OSError:
+                for index in indexes:
+                    index.remove_file(filename)
+                continue
+            outdated = [index for index in indexes if not index.is_up_to_date(filename, mtime)]
+            if not outdated:
+                continue
+            try:
+                with open(filename, 'rb') as f:
+                    text = f.read().decode('utf-8', 'replace').replace('\r\n', '\n').replace('\r', '\n')
+            except IOError as e:
+                print("couldn't index ", filename, ": ", e)
+                continue
+            # the indexes that need the members of the file (b_parse_members) get them parsed only once
+            rows = None
+            for index in outdated:
+                if getattr(index, "b_parse_members", False):
+                    if rows is None:
+                        rows = member_rows(*parse_members(filename, text))
+                    index.update_file(filename, mtime, text, rows)
+                else:
+                    index.update_file(filename, mtime, text)
+
+        self.collector.save_file_indexes()
+
+
+# checks the source files of the cached classes in the background (see ClassReference.check_source).
+# Several of these threads share one queue of classes.
+class SourceValidatorThread(threading.Thread):
+    def __init__(self, classes):
+        self.classes = classes
+        threading.Thread.__init__(self)
+
+    def run(self):
+        while True:
+            try:
+                my_class = self.classes.get_nowait()
+            except queue.Empty:
+                return
+            my_class.has_parsed()
@@ -0,0 +1,229 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE References
+#-----------------------------------------------------------------------------------
+#
+#   Inverted index of the identifiers used in the code of the project, for 'UnrealScriptIDE: Find References':
+#       name -> files -> (line, column, enclosing member, after a dot)
+#   Indexed are the bodies of functions, states (state code), replication and defaultproperties blocks,
+#   without comments, strings and names. The enclosing member is the function (State.Function inside of states).
+#   Which declaration an occurrence belongs to isn't decided here, that is done when the references are
+#   looked up (see UnrealScriptIDEMain.find_references).
+#   The occurrences of every name in a file are stored as one packed array, they're only unpacked when the name is looked up.
+#   The index is updated file by file by the FileIndexerThread and saved next to the classes cache.
+#   The saved index is only read when it's first used (on the indexer thread).
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import array
+import os
+import pickle
+import re
+import threading
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+    import UnrealScriptIDE.UnrealScriptIDEOutline as USOutline
+else:
+    import UnrealScriptIDECache as USCache
+    import UnrealScriptIDEOutline as USOutline
+
+INDEX_FILE_NAME = 'references_index.obj'
+# increase this if the format of the saved index changes
+REFERENCES_VERSION = 1
+
+# every occurrence: line, column, member (index into the members of the file) * 2 + 1 if it's after a dot
+_FIELDS = 3
+_INDEXED_KINDS = (USOutline.FUNCTION, USOutline.STATE, USOutline.REPLICATION, USOutline.DEFAULTPROPERTIES)
+# words that are never looked up, there are too many of them
+_KEYWORDS = frozenset(["if", "else", "for", "foreach", "while", "do", "until", "switch", "case", "default", "break",
+                       "continue", "return", "local", "new", "none", "true", "false", "self", "super", "global",
+                       "goto", "stop", "assert", "class", "static", "const", "int", "float", "bool", "byte",
+                       "string", "name", "out", "optional", "coerce", "begin", "end", "object"])
+
+# comments, strings and names are skipped
+_identifier_regex = re.compile(r"//[^\n]*|/\*.*?(?:\*/|\Z)|\"(?:\\.|[^\"\\\n])*\"?|'[^'\n]*'?|(\.[ \t]*)?\b([A-Za-z_]\w*)", re.DOTALL)
+# self.Foo, super.Foo, super(Actor).Foo and global.Foo are the same as Foo
+_own_member_regex = re.compile(r"\b(?:self|super|global)\s*(?:\(\s*\w*\s*\))?\s*$", re.IGNORECASE)
+
+
+def _array(data=None):
+    a = array.array('i')
+    if data:
+        if hasattr(a, "frombytes"):
+            a.frombytes(data)
+        else:
+            a.fromstring(data)
+    return a
+
+
+def _array_bytes(a):
+    return a.tobytes() if hasattr(a, "tobytes") else a.tostring()
+
+
+# returns the indexed blocks of the file as [(member name, begin, end), ...]. The functions of a state are left out of the state.
+def _member_ranges(blocks, prefix=""):
+    ranges = []
+    for block in blocks:
+        if block.kind not in _INDEXED_KINDS:
+            continue
+        name = prefix + (block.name if block.kind in (USOutline.FUNCTION, USOutline.STATE) else block.kind)
+        begin = block.body_start
+        for child in block.children:
+            if child.kind == USOutline.FUNCTION:
+                ranges.append((name, begin, child.start))
+                begin = child.end
+        ranges.append((name, begin, block.end))
+        if block.kind == USOutline.STATE:
+            ranges += _member_ranges([c for c in block.children if c.kind == USOutline.FUNCTION], name + ".")
+    return ranges
+
+
+# returns (members, {name (lower case): packed occurrences}) of the code in text
+def extract_references(text):
+    blocks, b_closed = USOutline.scan(text)
+    members = []
+    member_ids = {}
+    occurrences = {}
+    line_number = 1
+    line_start = 0
+    position = 0
+    for member, begin, end in sorted(_member_ranges(blocks), key=lambda r: r[1]):
+        member_id = member_ids.get(member)
+        if member_id is None:
+            member_id = member_ids[member] = len(members)
+            members.append(member)
+        for m in _identifier_regex.finditer(text, begin, end):
+            word = m.group(2)
+            if word is None:
+                continue
+            key = word.lower()
+            if key in _KEYWORDS:
+                continue
+            start = m.start(2)
+            num_lines = text.count('\n', position, start)
+            if num_lines:
+                line_number += num_lines
+                line_start = text.rfind('\n', position, start) + 1
+            position = start
+            b_qualified = m.group(1) is not None and not _own_member_regex.search(text, max(0, m.start() - 40), m.start())
+            values = occurrences.get(key)
+            if values is None:
+                values = occurrences[key] = _array()
+            values.extend((line_number, start - line_start + 1, member_id * 2 + (1 if b_qualified else 0)))
+    return members, dict([(key, _array_bytes(values)) for key, values in occurrences.items()])
+
+
+class ReferenceIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # filename -> (mtime, class name, members, {name: packed occurrences})
+        self._files = {}
+        # name -> files it is used in
+        self._names = {}
+        # the saved index that wasn't read yet
+        self._unread_path = None
+        self.b_changed = False
+
+    # reads the saved index, if it wasn't read yet
+    def _read(self):
+        path, self._unread_path = self._unread_path, None
+        if path is None:
+            return
+        try:
+            with open(path, 'rb') as f:
+                version, files = pickle.load(f)
+        except Exception as e:
+            print("couldn't load ", path, ": ", e)
+            return
+        if version != REFERENCES_VERSION:
+            return
+        for filename, entry in files.items():
+            self._add_file(filename, entry)
+
+    # ==============================
+    # File index interface (see FileIndexerThread)
+    # ==============================
+
+    def is_up_to_date(self, filename, mtime):
+        with self._lock:
+            self._read()
+            entry = self._files.get(filename)
+        return entry is not None and entry[0] == mtime
+
+    def files(self):
+        with self._lock:
+            self._read()
+            return list(self._files.keys())
+
+    def update_file(self, filename, mtime, text):
+        class_name = os.path.basename(filename).split('.')[0]
+        members, occurrences = extract_references(text)
+        with self._lock:
+            self._read()
+            self._remove_file(filename)
+            self._add_file(filename, (mtime, class_name, members, occurrences))
+            self.b_changed = True
+
+    def remove_file(self, filename):
+        with self._lock:
+            self._read()
+            if filename in self._files:
+                self._remove_file(filename)
+                self.b_changed = True
+
+    def _add_file(self, filename, entry):
+        self._files[filename] = entry
+        for name in entry[3]:
+            files = self._names.get(name)
+            if files is None:
+                files = self._names[name] = set()
+            files.add(filename)
+
+    def _remove_file(self, filename):
+        entry = self._files.pop(filename, None)
+        if entry is None:
+            return
+        for name in entry[3]:
+            files = self._names.get(name)
+            if files is not None:
+                files.discard(filename)
+                if not files:
+                    del self._names[name]
+
+    def save(self, path):
+        USCache.save_index(self, path, self._snapshot)
+
+    def _snapshot(self):
+        self._read()
+        return pickle.dumps((REFERENCES_VERSION, self._files), 2)
+
+    # the index is read from path when it's first used. Returns False if there is no saved index.
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        with self._lock:
+            self.__init__()
+            self._unread_path = path
+        return True
+
+    # ==============================
+    # Queries
+    # ==============================
+
+    # returns all occurrences of name: [(class name, file name, line number, column, member, b_qualified), ...]
+    # b_qualified is true if the name is used after a dot (Other.Name), but not after self., super. or global.
+    def find(self, name):
+        references = []
+        key = name.lower()
+        with self._lock:
+            self._read()
+            for filename in self._names.get(key, ()):
+                mtime, class_name, members, occurrences = self._files[filename]
+                values = _array(occurrences[key])
+                for i in range(0, len(values), _FIELDS):
+                    references.append((class_name, filename, values[i], values[i + 1], members[values[i + 2] >> 1], bool(values[i + 2] & 1)))
+        references.sort(key=lambda r: (r[0].lower(), r[2], r[3]))
+        return references
@@ -0,0 +1,102 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Scope
+#-----------------------------------------------------------------------------------
+#
+#   The scope of a function body: its parameters, its local variables and the super call template.
+#   A scope is built once per function block of the outline (see UnrealScriptIDEOutline) and kept on the block.
+#   The outline replaces a block whenever its text changes, so the scope is built again only then.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import re
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDEData as USData
+else:
+    import UnrealScriptIDEData as USData
+
+_comment_regex = re.compile(r"//[^\n]*|/\*.*?(?:\*/|\Z)", re.DOTALL)
+# 1: the declared variables, 2 or 3: the comment behind them
+_local_regex = re.compile(r"^[ \t]*local\s+([^;]*);[ \t]*(?://+[ \t]*(.*?)[ \t]*$|/\*\*?[ \t]*(.*?)[ \t]*(?:\*/)?$)?", re.IGNORECASE | re.MULTILINE)
+_spaces_in_type_regex = re.compile(r"\s*<\s*|\s+>")
+
+
+class FunctionScope:
+    def __init__(self, name, parameters, local_vars, super_call):
+        self._name = name
+        self._parameters = parameters
+        self._local_vars = local_vars
+        self._super_call = super_call
+
+    def name(self):
+        return self._name
+
+    def parameters(self):
+        return self._parameters
+
+    def local_vars(self):
+        return self._local_vars
+
+    # locals and parameters, as used by get_object and get_autocomplete_list
+    def variables(self):
+        return self._local_vars + self._parameters
+
+    # e.g. super.TakeDamage(DamageAmount, EventInstigator, HitLocation), "" if the function has no name
+    def super_call(self):
+        return self._super_call
+
+
+# returns the scope of a function block, get_text(begin, end) returns the current text of the view.
+def scope_of(block, get_text):
+    if block.scope is None:
+        block.scope = build_scope(block.name, get_text(block.start, block.end), block.body_start - block.start)
+    return block.scope
+
+
+# builds the scope out of the text of a function (declaration and body), body_start is the position of the opening brace inside of it.
+# Line numbers of the variables are relative to the first line of the declaration.
+def build_scope(name, text, body_start):
+    declaration = _comment_regex.sub(lambda m: re.sub(r"[^\n]", " ", m.group(0)), text[:body_start])
+    parameters = []
+    super_call = ""
+    match = re.search(r"\b%s\s*\(" % re.escape(name), declaration) if name else None
+    if match:
+        end = matching_parenthesis(declaration, match.end() - 1)
+        for param in declaration[match.end():end].split(','):
+            # no default values (optional int Count=1)
+            words = _spaces_in_type_regex.sub(lambda m: m.group(0).strip(), param.split('=')[0]).split()
+            if words:
+                line_number = declaration.count("\n", 0, match.end() + declaration[match.end():end].find(words[-1]))
+                parameters.append(USData.Variable(["param"] + words[:-1], words[-1], "", line_number, ""))
+        super_call = "super." + name + "(" + ", ".join([p.name() for p in parameters]) + ")"
+
+    local_vars = []
+    for m in _local_regex.finditer(text, body_start):
+        words = _spaces_in_type_regex.sub(lambda m: m.group(0).strip(), m.group(1)).split(',')
+        var_line = words[0].split()
+        if len(var_line) < 2:
+            continue
+        doc_line = m.group(2) or m.group(3) or ""
+        line_number = text.count("\n", 0, m.start())
+        # local int A, B[4], C;
+        for var_name in [var_line[-1]] + words[1:]:
+            var_name = re.sub(r"\[.*?\]|<.*?>", "", var_name).strip()
+            if var_name:
+                local_vars.append(USData.Variable(["local"] + var_line[:-1], var_name, doc_line, line_number, ""))
+    return FunctionScope(name, parameters, local_vars, super_call)
+
+
+# returns the position of the parenthesis closing the one at start, or the end of the text
+def matching_parenthesis(text, start):
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
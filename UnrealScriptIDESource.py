@@ -0,0 +1,125 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Source
+#-----------------------------------------------------------------------------------
+#
+#   Reads single lines out of source files without opening them in a view, e.g. to peek at a declaration.
+#   The offsets of all lines of a file are indexed once (as long as the file doesn't change),
+#   the lines themselves are read out of the memory mapped file when they're needed.
+#   The file isn't kept open, so it can still be saved (Windows doesn't allow writing to mapped files).
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import mmap
+import os
+import re
+import threading
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDECache as USCache
+
+# number of files whose line offsets are kept
+MAX_INDEXED_FILES = 64
+
+
+# the offsets of the lines of a file. Only valid for the given (size, mtime) of the file.
+class LineIndex:
+    def __init__(self, path, stamp, offsets):
+        self.path = path
+        self.stamp = stamp
+        # the offset of the start of every line, and the size of the file at the end
+        self.offsets = offsets
+
+    def num_lines(self):
+        return len(self.offsets) - 1
+
+    # returns the lines first_line up to (but not including) last_line (starting at 1) as unicode strings
+    def lines(self, first_line, last_line):
+        first_line = max(first_line, 1)
+        last_line = min(last_line, self.num_lines() + 1)
+        if first_line >= last_line:
+            return []
+        begin, end = self.offsets[first_line - 1], self.offsets[last_line - 1]
+        if begin == end:
+            return []
+        with open(self.path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                text = data[begin:end]
+            finally:
+                data.close()
+        return text.decode('utf-8', 'replace').replace('\r\n', '\n').split('\n')[:last_line - first_line]
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_size, st.st_mtime)
+
+
+def index_lines(path, stamp):
+    offsets = [0]
+    if stamp[0] > 0:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                offsets += [m.end() for m in re.finditer(b"\n", data)]
+                size = len(data)
+            finally:
+                data.close()
+        if offsets[-1] != size:
+            offsets.append(size)
+    return LineIndex(path, stamp, offsets)
+
+
+# path -> LineIndex of recently used files
+class SourceLines:
+    def __init__(self, max_files=MAX_INDEXED_FILES):
+        self._lock = threading.Lock()
+        self._indexes = USCache.LRUCache(max_files)
+        self.num_indexed = 0
+
+    # returns the up to date line index of path, or None if the file doesn't exist
+    def get_index(self, path):
+        stamp = file_stamp(path)
+        if stamp is None:
+            return None
+        key = os.path.normcase(path)
+        with self._lock:
+            index = self._indexes.get(key)
+        if index is None or index.stamp != stamp:
+            index = index_lines(path, stamp)
+            self.num_indexed += 1
+            with self._lock:
+                self._indexes.put(key, index)
+        return index
+
+    # returns the lines first_line up to (but not including) last_line of the file (starting at 1)
+    def lines(self, path, first_line, last_line):
+        index = self.get_index(path)
+        if index is None:
+            return []
+        return index.lines(first_line, last_line)
+
+    # returns (number of the first line, lines) of a declaration at line_number in path:
+    # the documentation comment right above it, the declaration and num_lines lines after it.
+    def declaration(self, path, line_number, num_lines=10, max_doc_lines=20):
+        index = self.get_index(path)
+        if index is None:
+            return line_number, []
+        above = index.lines(line_number - max_doc_lines, line_number)
+        num_doc_lines = 0
+        for line in reversed(above):
+            stripped = line.strip()
+            if stripped.startswith(("/**", "/*", "*", "//")) or stripped.endswith("*/"):
+                num_doc_lines += 1
+            else:
+                break
+        first_line = line_number - num_doc_lines
+        return first_line, index.lines(first_line, line_number + num_lines + 1)
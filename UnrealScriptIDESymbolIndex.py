@@ -0,0 +1,475 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Symbol Index
+#-----------------------------------------------------------------------------------
+#
+#   In memory index of every class, function, event, variable, const and struct of the project
+#   for 'UnrealScriptIDE: Go to Symbol in Project'. Queries are matched fuzzy (tkdmg -> TakeDamage).
+#   The symbols are kept in flat arrays, one slot per symbol:
+#       - the names sorted, names starting with the query are found by bisection.
+#         That's enough for short queries, they match more names than are shown anyway.
+#       - the slots sorted by the length of the name. The other names are matched the shortest first,
+#         until enough names containing the query are found.
+#       - the character masks: for every character one byte array with a 1 for every name (in the order by length)
+#         that contains it. A query ANDs the arrays of its characters (as big integers), which drops all names that
+#         miss one of its characters without looking at them. The rest is found with a regex on the bytes of the result,
+#         already the shortest names first, and matched against the query until there are enough. They're ranked:
+#             exact name, name starting with the query, name containing it, name containing its characters in order.
+#   While typing, the next query only looks at the names that matched the previous one.
+#   The index is updated file by file by the FileIndexerThread (slots of removed symbols are reused)
+#   and saved next to the classes cache. The arrays are built on the indexer thread once a batch of files
+#   is indexed (see save), so neither loading nor indexing the whole project inserts the symbols one by one.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import array
+import binascii
+import bisect
+import heapq
+import operator
+import os
+import pickle
+import re
+import threading
+import time
+
+from itertools import islice, repeat
+
+try:
+    from itertools import imap
+except ImportError:
+    # Python 3
+    imap = map
+
+try:
+    from itertools import compress
+except ImportError:
+    # Python 2.6
+    def compress(data, selectors):
+        return [d for d, s in zip(data, selectors) if s]
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDECache as USCache
+
+INDEX_FILE_NAME = 'symbol_index.obj'
+# increase this if the format of the saved index changes
+SYMBOL_INDEX_VERSION = 1
+
+KINDS = ["class", "function", "event", "variable", "const", "struct"]
+
+# one character mask per letter, one for all digits and one for _
+_DIGIT_BIT = 26
+_UNDERSCORE_BIT = 27
+_NUM_MASKS = 28
+# if more files are updated before the next query (or save), the arrays are built again instead of inserting their symbols
+_MAX_INSERTED_FILES = 64
+# the names that have all characters of a query are matched in chunks, the shortest names first.
+# The first chunk is small, short queries usually have enough matches after it.
+_FIRST_CHUNK = 512
+_CHUNK_SIZE = 4096
+# more names that only contain the characters of a query in order can't be scored in time anyway
+_MAX_SCORED_NAMES = 1024
+# names whose characters are only matched in order are scored one by one, for at most this long
+SCORE_BUDGET = 0.004
+
+_class_regex = re.compile(r"^\s*class\s+(\w+)", re.IGNORECASE | re.MULTILINE)
+
+
+# character -> its character mask
+_CHAR_MASKS = dict([(chr(97 + i), i) for i in range(26)] + [(str(i), _DIGIT_BIT) for i in range(10)] + [('_', _UNDERSCORE_BIT)])
+
+
+# returns the character masks text has a character of
+def char_masks(text):
+    masks = set(map(_CHAR_MASKS.get, set(text.lower())))
+    masks.discard(None)
+    return masks
+
+
+_set_byte_regex = re.compile(b"\x01")
+_match_start = operator.methodcaller("start")
+
+
+# returns the positions of the bytes of data that are 1, as an iterator
+def _set_bytes(data):
+    return imap(_match_start, _set_byte_regex.finditer(data))
+
+
+# a byte array as integer and back, to AND them.
+# The bytes are only searched with a regex, never indexed (their items would be str on Python 2).
+if hasattr(int, "from_bytes"):
+    def _to_int(data):
+        return int.from_bytes(bytes(data), 'little')
+
+    def _to_bytes(value, length):
+        return value.to_bytes(length, 'little')
+else:
+    def _to_int(data):
+        return int(binascii.hexlify(data), 16) if data else 0
+
+    def _to_bytes(value, length):
+        return binascii.unhexlify("%0*x" % (2 * length, value))
+
+
+# returns a regex that matches names containing the characters of query in order
+def subsequence_regex(query):
+    return re.compile("".join(["[^%s]*%s" % (re.escape(c), re.escape(c)) for c in query]))
+
+
+# returns true if the character at i starts a word of name (TakeDamage, Take_Damage, Damage2)
+def _is_word_start(name, i):
+    if i == 0:
+        return True
+    c, before = name[i], name[i - 1]
+    return (c.isupper() and not before.isupper()) or (before == '_' and c != '_') or (c.isdigit() and not before.isdigit())
+
+
+# scores a name that contains the characters of query in order: word starts and consecutive characters count most,
+# gaps are bad. Word starts are preferred, so tdm matches TakeDamage at T, D and m.
+def subsequence_score(name, key, query):
+    score = 0
+    i = 0
+    last = -2
+    for c in query:
+        # the next word start with that character, else the next character
+        j = i
+        found = -1
+        while True:
+            j = key.find(c, j)
+            if j == -1:
+                break
+            if found == -1:
+                found = j
+            if _is_word_start(name, j) or j == last + 1:
+                found = j
+                break
+            j += 1
+        if found == -1:
+            return None
+        if found == last + 1:
+            score += 5
+        elif _is_word_start(name, found):
+            score += 8
+        else:
+            score -= min(found - i, 5)
+        last = found
+        i = found + 1
+    return score
+
+
+class SymbolIndex:
+    # update_file gets the member rows of the file (see FileIndexerThread)
+    b_parse_members = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # filename -> (mtime, class name, [(kind, name, declaration, line number), ...])
+        self._entries = {}
+        # increased with every change, invalidates the matches of the last query
+        self._generation = 0
+        self.b_changed = False
+        self._clear_arrays()
+
+    # the arrays are built out of _entries when they're needed next (see _build)
+    def _clear_arrays(self):
+        self._b_built = False
+        # files updated since the arrays were used last
+        self._num_updated = 0
+        # filename -> slots of its symbols
+        self._slots = {}
+        self._free = []
+        # the slots: name, lower case name, kind, line number, file (index into _file_names), declaration
+        self._names = []
+        self._keys = []
+        self._kinds = array.array('b')
+        self._lines = array.array('l')
+        self._files = array.array('l')
+        self._declarations = []
+        # all used slots sorted by name, and sorted by (length, name)
+        self._sorted_keys = []
+        self._sorted_slots = array.array('l')
+        self._by_length_keys = []
+        self._by_length_slots = array.array('l')
+        # character masks: one byte per name, in the order of _by_length_slots.
+        # The integers of the masks are cached until they change.
+        self._masks = [bytearray() for i in range(_NUM_MASKS)]
+        self._mask_values = {}
+        self._file_ids = {}
+        self._file_names = []
+        self._class_names = []
+        self._last_query = None
+        self._changed()
+
+    # ==============================
+    # File index interface (see FileIndexerThread)
+    # ==============================
+
+    def is_up_to_date(self, filename, mtime):
+        entry = self._entries.get(filename)
+        return entry is not None and entry[0] == mtime
+
+    def files(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    # replaces the symbols of the file. members are its member rows (see Parser.member_rows).
+    def update_file(self, filename, mtime, text, members):
+        class_name = os.path.basename(filename).split('.')[0]
+        match = _class_regex.search(text)
+        rows = [(0, class_name, match.group(0).strip() if match else "class " + class_name, text.count('\n', 0, match.start(1)) + 1 if match else 1)]
+        for kind, name, type_name, declaration, line_number, doc in members:
+            rows.append((KINDS.index(kind), name, declaration.strip(), line_number))
+        with self._lock:
+            self._num_updated += 1
+            if self._b_built and self._num_updated > _MAX_INSERTED_FILES:
+                # inserting into the sorted arrays one by one would take longer than building them again
+                self._clear_arrays()
+            if self._b_built:
+                self._add_file(filename, (mtime, class_name, rows))
+            else:
+                self._entries[filename] = (mtime, class_name, rows)
+            self.b_changed = True
+
+    def remove_file(self, filename):
+        with self._lock:
+            if filename in self._entries:
+                self._remove_file(filename)
+                self.b_changed = True
+
+    def _add_file(self, filename, entry, b_sort=True):
+        self._entries[filename] = entry
+        file_id = self._file_ids.get(filename)
+        if file_id is None:
+            file_id = len(self._file_names)
+            self._file_ids[filename] = file_id
+            self._file_names.append(filename)
+            self._class_names.append(entry[1])
+        # the slots of the symbols the file had before, by name. They're kept for the names that are still there,
+        # so only the names that were added or removed change the sorted arrays.
+        old_slots = {}
+        for i in self._slots.pop(filename, []):
+            old_slots.setdefault(self._keys[i], []).append(i)
+        slots = []
+        for kind, name, declaration, line_number in entry[2]:
+            key = name.lower()
+            kept = old_slots.get(key)
+            if kept:
+                i = kept.pop()
+                self._names[i] = name
+                self._kinds[i] = kind
+                self._lines[i] = line_number
+                self._files[i] = file_id
+                self._declarations[i] = declaration
+                slots.append(i)
+                continue
+            if self._free:
+                i = self._free.pop()
+                self._names[i] = name
+                self._keys[i] = key
+                self._kinds[i] = kind
+                self._lines[i] = line_number
+                self._files[i] = file_id
+                self._declarations[i] = declaration
+            else:
+                i = len(self._names)
+                self._names.append(name)
+                self._keys.append(key)
+                self._kinds.append(kind)
+                self._lines.append(line_number)
+                self._files.append(file_id)
+                self._declarations.append(declaration)
+            if b_sort:
+                position = bisect.bisect_left(self._sorted_keys, key)
+                self._sorted_keys.insert(position, key)
+                self._sorted_slots.insert(position, i)
+                position = bisect.bisect_left(self._by_length_keys, (len(key), key))
+                self._by_length_keys.insert(position, (len(key), key))
+                self._by_length_slots.insert(position, i)
+                masks = char_masks(key)
+                for m in range(_NUM_MASKS):
+                    self._masks[m].insert(position, 1 if m in masks else 0)
+            slots.append(i)
+        self._remove_slots([i for kept in old_slots.values() for i in kept])
+        self._slots[filename] = slots
+        self._changed()
+
+    # the arrays don't need to be built, a file that isn't in them is only removed from _entries
+    def _remove_file(self, filename):
+        if self._entries.pop(filename, None) is None:
+            return
+        self._remove_slots(self._slots.pop(filename, []))
+        self._changed()
+
+    def _remove_slots(self, slots):
+        for i in slots:
+            key = self._keys[i]
+            position = bisect.bisect_left(self._sorted_keys, key)
+            while self._sorted_slots[position] != i:
+                position += 1
+            del self._sorted_keys[position]
+            del self._sorted_slots[position]
+            position = bisect.bisect_left(self._by_length_keys, (len(key), key))
+            while self._by_length_slots[position] != i:
+                position += 1
+            del self._by_length_keys[position]
+            del self._by_length_slots[position]
+            for mask in self._masks:
+                del mask[position]
+            self._names[i] = self._keys[i] = self._declarations[i] = ""
+            self._free.append(i)
+
+    def _changed(self):
+        self._generation += 1
+        self._mask_values = {}
+
+    # builds the arrays out of the loaded entries
+    def _build(self):
+        self._num_updated = 0
+        if self._b_built:
+            return
+        self._b_built = True
+        for filename, entry in self._entries.items():
+            self._add_file(filename, entry, False)
+        order = sorted(zip(self._keys, range(len(self._keys))))
+        self._sorted_keys = [key for key, i in order]
+        self._sorted_slots = array.array('l', [i for key, i in order])
+        order = sorted(zip(map(len, self._keys), self._keys, range(len(self._keys))))
+        self._by_length_keys = [(length, key) for length, key, i in order]
+        self._by_length_slots = array.array('l', [i for length, key, i in order])
+        self._masks = masks = [bytearray(len(order)) for m in range(_NUM_MASKS)]
+        for position, (length, key, i) in enumerate(order):
+            for m in char_masks(key):
+                masks[m][position] = 1
+
+    def __len__(self):
+        with self._lock:
+            self._build()
+            return len(self._names) - len(self._free)
+
+    # the arrays are built here, on the indexer thread, so that the next query doesn't have to
+    def save(self, path):
+        USCache.save_index(self, path, self._snapshot)
+
+    def _snapshot(self):
+        self._build()
+        return pickle.dumps((SYMBOL_INDEX_VERSION, self._entries), 2)
+
+    # loads the index from path. Returns False if there is no (compatible) index.
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                version, entries = pickle.load(f)
+        except Exception as e:
+            print("couldn't load ", path, ": ", e)
+            return False
+        if version != SYMBOL_INDEX_VERSION:
+            return False
+        with self._lock:
+            self._entries = entries
+            self._clear_arrays()
+        return True
+
+    # ==============================
+    # Queries
+    # ==============================
+
+    # returns the symbols matching query, the best first: [(class name, kind, name, declaration, file name, line number), ...]
+    def search(self, query, limit=200):
+        query = re.sub(r"\W", "", query).lower()
+        if not query:
+            return []
+        with self._lock:
+            self._build()
+            ranked = self._rank(query, limit)
+            return [(self._class_names[self._files[i]], KINDS[self._kinds[i]], self._names[i], self._declarations[i],
+                     self._file_names[self._files[i]], self._lines[i]) for i in ranked]
+
+    # names starting with query (the exact match first), then names containing it, the shortest names first.
+    # Then the best scored names that only contain its characters in order, as many as can be scored in time.
+    def _rank(self, query, limit):
+        ranked = self._prefix_matches(query, limit)
+        if len(ranked) >= limit:
+            return ranked
+        contained, rest = self._matches(query, limit)
+        prefixes = set(ranked)
+        slots = self._by_length_slots
+        ranked += [i for i in map(slots.__getitem__, contained) if i not in prefixes][:limit - len(ranked)]
+        if len(ranked) >= limit:
+            return ranked
+        scored = []
+        start = time.time()
+        for n, i in enumerate(map(slots.__getitem__, rest)):
+            if n % 128 == 0 and n and time.time() - start > SCORE_BUDGET:
+                break
+            score = subsequence_score(self._names[i], self._keys[i], query)
+            if score is not None:
+                scored.append((-score, n, i))
+        return ranked + [hit[2] for hit in heapq.nsmallest(limit - len(ranked), scored)]
+
+    # returns the names (lower case) of the classes that declare a member called name
+    def classes_declaring(self, name):
+        key = name.lower()
+        classes = set()
+        with self._lock:
+            self._build()
+            position = bisect.bisect_left(self._sorted_keys, key)
+            while position < len(self._sorted_keys) and self._sorted_keys[position] == key:
+                i = self._sorted_slots[position]
+                if self._kinds[i] != 0:
+                    classes.add(self._class_names[self._files[i]].lower())
+                position += 1
+        return classes
+
+    # returns the slots of the names starting with query, the shortest (i.e. the exact match) first
+    def _prefix_matches(self, query, limit):
+        begin = bisect.bisect_left(self._sorted_keys, query)
+        end = bisect.bisect_left(self._sorted_keys, query + "\uffff" if ST3 else query + "\xff", begin)
+        keys = self._sorted_keys[begin:end]
+        return [hit[2] for hit in heapq.nsmallest(limit, zip(map(len, keys), keys, self._sorted_slots[begin:end]))]
+
+    # returns (positions of the names containing query, positions of the names containing its characters in order)
+    # in _by_length_slots, i.e. the shortest names first.
+    # Stops once num_wanted names containing query (or more names than can be scored) are found.
+    def _matches(self, query, num_wanted):
+        last = self._last_query
+        if last is not None and last[0] == self._generation and query.startswith(last[1]) and last[4]:
+            # typed on: only the names that matched before can still match
+            candidates = iter(sorted(last[2] + last[3]))
+        else:
+            masks = char_masks(query)
+            value = self._mask_value(masks.pop())
+            for m in masks:
+                value &= self._mask_value(m)
+            candidates = _set_bytes(_to_bytes(value, len(self._by_length_slots)))
+        matcher = subsequence_regex(query).match
+        get_key = operator.itemgetter(1)
+        contained, rest = [], []
+        b_complete = True
+        chunk = list(islice(candidates, _FIRST_CHUNK))
+        while chunk:
+            keys = list(map(get_key, map(self._by_length_keys.__getitem__, chunk)))
+            # names containing query match too
+            b_matches = list(map(matcher, keys))
+            matched = list(compress(chunk, b_matches))
+            keys = list(compress(keys, b_matches))
+            b_contains = list(map(operator.contains, keys, repeat(query, len(keys))))
+            contained += compress(matched, b_contains)
+            rest += compress(matched, map(operator.not_, b_contains))
+            chunk = list(islice(candidates, _CHUNK_SIZE))
+            if chunk and (len(contained) >= num_wanted or len(rest) >= _MAX_SCORED_NAMES):
+                b_complete = False
+                break
+        self._last_query = (self._generation, query, contained, rest, b_complete)
+        return contained, rest
+
+    def _mask_value(self, m):
+        value = self._mask_values.get(m)
+        if value is None:
+            value = self._mask_values[m] = _to_int(self._masks[m])
+        return value
@@ -0,0 +1,262 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Symbol Store
+#-----------------------------------------------------------------------------------
+#
+#   Optional SQLite database of all classes, functions, variables, consts and structs of the project
+#   for project wide queries, e.g. every function named *Damage* or all variables of type SoundCue.
+#   Tables:
+#       files (path, mtime), classes, types, members, docs
+#       symbols_fts: full text index over the names (split at camel case) and the documentation.
+#                    FTS5 if available, else FTS4. Without either, LIKE queries are used.
+#   The store is updated file by file by the FileIndexerThread, in one transaction per batch of files.
+#   Queries can run on any thread, every thread gets its own read connection.
+#
+#   Sublime Text doesn't ship sqlite3 on every platform, the store is simply not used then.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import os
+import re
+import threading
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+STORE_FILE_NAME = "symbols.sqlite"
+# increase this if the schema changes, the store gets rebuilt then
+SCHEMA_VERSION = 1
+# number of files written in one transaction
+BATCH_SIZE = 100
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL)",
+    "CREATE TABLE IF NOT EXISTS classes (id INTEGER PRIMARY KEY, file_id INTEGER, name TEXT, parent TEXT)",
+    "CREATE TABLE IF NOT EXISTS types (id INTEGER PRIMARY KEY, name TEXT UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS members (id INTEGER PRIMARY KEY, class_id INTEGER, kind TEXT, name TEXT, type_id INTEGER, declaration TEXT, line INTEGER)",
+    "CREATE TABLE IF NOT EXISTS docs (member_id INTEGER PRIMARY KEY, text TEXT)",
+    "CREATE INDEX IF NOT EXISTS classes_file ON classes (file_id)",
+    "CREATE INDEX IF NOT EXISTS classes_name ON classes (name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS members_class ON members (class_id)",
+    "CREATE INDEX IF NOT EXISTS members_name ON members (name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS members_type ON members (type_id)",
+]
+
+# all queries return: (class name, kind, name, type, declaration, file name, line number)
+# (find_classes: class name, parent class, file name)
+_SELECT_SYMBOLS = """SELECT c.name, m.kind, m.name, t.name, m.declaration, f.path, m.line
+                     FROM members m JOIN classes c ON c.id = m.class_id JOIN files f ON f.id = c.file_id
+                     LEFT JOIN types t ON t.id = m.type_id """
+SQL_FIND_FTS = _SELECT_SYMBOLS + "JOIN symbols_fts s ON s.rowid = m.id WHERE symbols_fts MATCH ? AND (? IS NULL OR m.kind = ?) LIMIT ?"
+SQL_FIND_LIKE = _SELECT_SYMBOLS + "WHERE m.name LIKE ? ESCAPE '\\' AND (? IS NULL OR m.kind = ?) LIMIT ?"
+SQL_FIND_DOCS_LIKE = _SELECT_SYMBOLS + "JOIN docs d ON d.member_id = m.id WHERE d.text LIKE ? ESCAPE '\\' LIMIT ?"
+SQL_FIND_BY_TYPE = _SELECT_SYMBOLS + "WHERE t.name = ? LIMIT ?"
+SQL_FIND_CLASSES = "SELECT c.name, c.parent, f.path FROM classes c JOIN files f ON f.id = c.file_id WHERE c.name LIKE ? ESCAPE '\\' LIMIT ?"
+
+_camel_case_regex = re.compile(r"[A-Z]+(?=[A-Z][a-z]|[0-9]|\b)|[A-Z]?[a-z]+|[0-9]+")
+_class_regex = re.compile(r"class\s+\w+\s*[\n]?\s*extends\s+(\w+)", re.IGNORECASE)
+
+
+def is_available():
+    return sqlite3 is not None
+
+
+# TakeDamage -> "take damage", so that "damage*" finds it in the full text index.
+# (the whole name isn't indexed, every distinct name would slow down prefix queries)
+def name_tokens(name):
+    return " ".join([t.lower() for t in _camel_case_regex.findall(name)]) or name.lower()
+
+
+# *Damage* -> %Damage%
+def glob_to_like(pattern):
+    pattern = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return pattern.replace("*", "%").replace("?", "_")
+
+
+class SymbolStore:
+    # update_file gets the member rows of the file (see FileIndexerThread)
+    b_parse_members = True
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._files = {}
+        # (filename, mtime, class name, parent class, member rows) waiting to be written
+        self._pending = []
+        self.b_changed = False
+        self._connection = self._connect()
+        with self._lock:
+            self._create_schema()
+            for path, mtime in self._connection.execute("SELECT path, mtime FROM files"):
+                self._files[path] = mtime
+
+    def _connect(self):
+        connection = sqlite3.connect(self._path, timeout=10, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _create_schema(self):
+        c = self._connection
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            for table in ("files", "classes", "types", "members", "docs", "symbols_fts"):
+                c.execute("DROP TABLE IF EXISTS " + table)
+        for statement in SCHEMA:
+            c.execute(statement)
+        self.fts = None
+        for fts in ("fts5", "fts4"):
+            try:
+                c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS symbols_fts USING %s(name, doc)" % fts)
+                self.fts = fts
+                break
+            except sqlite3.OperationalError:
+                pass
+        c.execute("PRAGMA user_version=%d" % SCHEMA_VERSION)
+        c.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    # ==============================
+    # File index interface (see FileIndexerThread)
+    # ==============================
+
+    def is_up_to_date(self, filename, mtime):
+        return self._files.get(filename) == mtime
+
+    def files(self):
+        return list(self._files.keys())
+
+    # queues the file for the next batch. rows are its members (see Parser.member_rows).
+    def update_file(self, filename, mtime, text, rows):
+        match = _class_regex.search(text)
+        with self._lock:
+            self._files[filename] = mtime
+            self._pending.append((filename, mtime, os.path.basename(filename).split('.')[0], match.group(1) if match else "", rows))
+            self.b_changed = True
+            if len(self._pending) >= BATCH_SIZE:
+                self._write_pending()
+
+    def remove_file(self, filename):
+        with self._lock:
+            if filename in self._files:
+                del self._files[filename]
+                self._pending.append((filename, None, None, None, None))
+                self.b_changed = True
+
+    # the store is opened when it's created
+    def load(self, path):
+        return True
+
+    # the store stays changed if the pending files couldn't be written
+    def save(self, path):
+        with self._lock:
+            if self._write_pending():
+                self.b_changed = False
+
+    # writes all pending files in one transaction. Returns False if that failed: the files that were updated
+    # are forgotten then, so they get indexed again, and the removed files are written with the next batch.
+    def _write_pending(self):
+        if not self._pending:
+            return True
+        c = self._connection
+        types = {}
+        try:
+            for filename, mtime, class_name, parent, rows in self._pending:
+                self._delete_file(filename)
+                if mtime is None:
+                    continue
+                file_id = c.execute("INSERT INTO files (path, mtime) VALUES (?, ?)", (filename, mtime)).lastrowid
+                class_id = c.execute("INSERT INTO classes (file_id, name, parent) VALUES (?, ?, ?)", (file_id, class_name, parent)).lastrowid
+                for kind, name, type_name, declaration, line_number, doc in rows:
+                    type_id = None
+                    if type_name:
+                        type_name = type_name.lower()
+                        type_id = types.get(type_name)
+                        if type_id is None:
+                            c.execute("INSERT OR IGNORE INTO types (name) VALUES (?)", (type_name,))
+                            type_id = c.execute("SELECT id FROM types WHERE name = ?", (type_name,)).fetchone()[0]
+                            types[type_name] = type_id
+                    member_id = c.execute("INSERT INTO members (class_id, kind, name, type_id, declaration, line) VALUES (?, ?, ?, ?, ?, ?)",
+                                          (class_id, kind, name, type_id, declaration, line_number)).lastrowid
+                    if doc:
+                        c.execute("INSERT INTO docs (member_id, text) VALUES (?, ?)", (member_id, doc))
+                    if self.fts:
+                        c.execute("INSERT INTO symbols_fts (rowid, name, doc) VALUES (?, ?, ?)", (member_id, name_tokens(name), doc))
+            c.commit()
+        except sqlite3.Error as e:
+            c.rollback()
+            print("couldn't write to the symbol store: ", e)
+            for filename, mtime, class_name, parent, rows in self._pending:
+                if mtime is not None and self._files.get(filename) == mtime:
+                    del self._files[filename]
+            self._pending = [p for p in self._pending if p[1] is None]
+            return False
+        self._pending = []
+        return True
+
+    def _delete_file(self, filename):
+        c = self._connection
+        row = c.execute("SELECT id FROM files WHERE path = ?", (filename,)).fetchone()
+        if row is None:
+            return
+        members = "SELECT m.id FROM members m JOIN classes cl ON cl.id = m.class_id WHERE cl.file_id = ?"
+        if self.fts:
+            c.execute("DELETE FROM symbols_fts WHERE rowid IN (%s)" % members, row)
+        c.execute("DELETE FROM docs WHERE member_id IN (%s)" % members, row)
+        c.execute("DELETE FROM members WHERE class_id IN (SELECT id FROM classes WHERE file_id = ?)", row)
+        c.execute("DELETE FROM classes WHERE file_id = ?", row)
+        c.execute("DELETE FROM files WHERE id = ?", row)
+
+    # ==============================
+    # Queries, can be called from any thread
+    # ==============================
+
+    def _reader(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._path, timeout=10)
+            self._local.connection = connection
+        return connection
+
+    # the first rows that match (sorting all matches in SQL would visit every one of them), sorted by name
+    def _query(self, sql, args):
+        try:
+            return sorted(self._reader().execute(sql, args).fetchall(), key=lambda row: (row[2].lower(), row[0].lower()))
+        except sqlite3.Error as e:
+            print("symbol store query failed: ", e)
+            return []
+
+    # returns all members whose name matches. Words are searched in the full text index (at the start of every
+    # camel case part of the name, "damage" finds TakeDamage), patterns with * and ? are matched against the whole name.
+    # kind can be "function", "event", "variable", "const" or "struct".
+    def find_symbols(self, pattern, kind=None, limit=200):
+        if self.fts and not re.search(r"[*?]", pattern):
+            words = re.findall(r"\w+", pattern.lower())
+            if not words:
+                return []
+            return self._query(SQL_FIND_FTS, (" ".join(["name:%s*" % w for w in words]), kind, kind, limit))
+        if not re.search(r"[*?]", pattern):
+            pattern = "*" + pattern + "*"
+        return self._query(SQL_FIND_LIKE, (glob_to_like(pattern), kind, kind, limit))
+
+    # returns all members that contain the words in their documentation
+    def find_in_docs(self, text, limit=200):
+        if self.fts:
+            words = re.findall(r"\w+", text.lower())
+            if not words:
+                return []
+            return self._query(SQL_FIND_FTS, (" ".join(["doc:%s*" % w for w in words]), None, None, limit))
+        return self._query(SQL_FIND_DOCS_LIKE, ("%" + glob_to_like(text) + "%", limit))
+
+    # returns all variables, functions (return type) and structs of the given type, e.g. SoundCue
+    def find_by_type(self, type_name, limit=500):
+        return self._query(SQL_FIND_BY_TYPE, (type_name.lower(), limit))
+
+    # returns (class name, parent class, file name) of all classes that match the pattern (* and ? are allowed)
+    def find_classes(self, pattern, limit=200):
+        return self._query(SQL_FIND_CLASSES, (glob_to_like(pattern if re.search(r"[*?]", pattern) else "*" + pattern + "*"), limit))
@@ -0,0 +1,369 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Text Index
+#-----------------------------------------------------------------------------------
+#
+#   Trigram index of the source files of the project for 'UnrealScriptIDE: Search in Source' (string literals, log messages, ...):
+#       trigram -> files that contain it
+#   The text is lower cased and split into words (letters, digits and _), the trigrams are the ones of every word
+#   with a space before and after it. Only the files that contain all trigrams of the words of the query are searched.
+#   Every file has an id, the files of a trigram are the set bits of an integer, so the candidates are found with a few ANDs.
+#   If a file changes it gets a new id, the bits of the old id are cleared in one pass over all trigrams later.
+#   The candidates are searched with the regular expression on the memory mapped files, nothing is kept in memory.
+#   The index is updated file by file by the FileIndexerThread and saved next to the classes cache.
+#   The saved index is only read when it's first used (on the indexer thread).
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import mmap
+import os
+import pickle
+import re
+import threading
+import time
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDECache as USCache
+
+INDEX_FILE_NAME = 'text_index.obj'
+# increase this if the format of the saved index changes
+TEXT_INDEX_VERSION = 1
+# the bits of the ids of changed files are cleared once there are this many
+_MAX_STALE_IDS = 128
+# the results of this many files are sent at once
+_BATCH_FILES = 32
+
+# lower case letters, digits and _ are kept, every other byte becomes a space
+_WORD_BYTES = bytearray(b"0123456789_abcdefghijklmnopqrstuvwxyz")
+_NORMALIZE_TABLE = bytes(bytearray([c if c in _WORD_BYTES else 32 for c in bytearray(range(256)).lower()]))
+_special_regex_chars = "\\[(){}*+?.^$|"
+
+
+# returns text as lower case utf-8 bytes, everything but letters, digits and _ replaced with spaces
+def normalize(text):
+    if not isinstance(text, bytes):
+        text = text.encode('utf-8', 'ignore')
+    return text.lower().translate(_NORMALIZE_TABLE)
+
+
+def _add_trigrams(grams, word):
+    grams.update([word[i:i + 3] for i in range(len(word) - 2)])
+
+
+# returns the trigrams of all words of text, every word with a space before and after it.
+# The words are joined with two spaces, so the trigrams of all of them are taken at once.
+def trigrams(text):
+    grams = set()
+    _add_trigrams(grams, b" " + b"  ".join(set(normalize(text).split())) + b" ")
+    return grams
+
+
+# returns the trigrams every text that contains query has.
+# The first and the last word of the query can be the end of a longer word, they only get a space if the query has one.
+def query_trigrams(query):
+    text = normalize(query)
+    words = text.split()
+    grams = set()
+    for i, word in enumerate(words):
+        if i > 0 or text[:1] == b" ":
+            word = b" " + word
+        if i < len(words) - 1 or text[-1:] == b" ":
+            word += b" "
+        _add_trigrams(grams, word)
+    return grams
+
+
+def _count_bits(value):
+    if hasattr(value, "bit_count"):
+        return value.bit_count()
+    return bin(value).count("1")
+
+
+# returns the literal parts every match of the regular expression pattern contains, as far as that's easy to tell.
+# Returns [] if nothing is known, e.g. if the pattern has alternatives.
+def required_literals(pattern):
+    if "|" in pattern or re.search(r"\)[?*{]|\(\?", pattern):
+        return []
+    literals = []
+    current = ""
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        i += 1
+        piece = None
+        if c == "\\":
+            escaped = pattern[i:i + 1]
+            i += 1
+            if escaped and not escaped.isalnum() and escaped != "_":
+                piece = escaped
+        elif c == "[":
+            # skip the character class
+            if pattern[i:i + 1] == "^":
+                i += 1
+            if pattern[i:i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif c in "*?{":
+            # the last character is optional
+            current = current[:-1]
+            if c == "{":
+                end = pattern.find("}", i)
+                i = end + 1 if end != -1 else len(pattern)
+        elif c not in _special_regex_chars:
+            piece = c
+        if piece is None:
+            if current:
+                literals.append(current)
+            current = ""
+        else:
+            current += piece
+    if current:
+        literals.append(current)
+    return literals
+
+
+# returns the lines of the file that match regex (a compiled bytes pattern): [(line number, line), ...]
+# If b_lower is true, regex is matched against the lower cased text (much faster than an IGNORECASE regex).
+def search_file(filename, regex, limit, b_lower=False):
+    results = []
+    try:
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return results
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (IOError, OSError, ValueError) as e:
+        print("couldn't search ", filename, ": ", e)
+        return results
+    try:
+        line_number = 1
+        position = 0
+        line_end = -1
+        for m in regex.finditer(data[:].lower() if b_lower else data):
+            start = m.start()
+            # one result per line
+            if start <= line_end:
+                continue
+            line_number += data[position:start].count(b"\n")
+            position = start
+            line_start = data.rfind(b"\n", 0, start) + 1
+            line_end = data.find(b"\n", start)
+            if line_end == -1:
+                line_end = len(data)
+            results.append((line_number, data[line_start:line_end].decode('utf-8', 'replace').rstrip("\r")))
+            if len(results) >= limit:
+                break
+    finally:
+        data.close()
+    return results
+
+
+class TextIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # filename -> (mtime, file id)
+        self._files = {}
+        # file id -> filename, None for ids that aren't used
+        self._names = []
+        self._free_ids = []
+        # ids of changed or removed files, their bits are still set in the trigrams
+        self._stale_ids = []
+        # trigram -> the ids of the files that contain it as bits
+        self._postings = {}
+        # the saved index that wasn't read yet
+        self._unread_path = None
+        self.b_changed = False
+
+    # reads the saved index, if it wasn't read yet
+    def _read(self):
+        path, self._unread_path = self._unread_path, None
+        if path is None:
+            return
+        try:
+            with open(path, 'rb') as f:
+                version, files, postings = pickle.load(f)
+        except Exception as e:
+            print("couldn't load ", path, ": ", e)
+            return
+        if version != TEXT_INDEX_VERSION:
+            return
+        self._files = files
+        self._postings = postings
+        num_ids = max([file_id for mtime, file_id in files.values()] + [-1]) + 1
+        self._names = [None] * num_ids
+        for filename, (mtime, file_id) in files.items():
+            self._names[file_id] = filename
+        self._free_ids = [i for i in range(num_ids) if self._names[i] is None]
+
+    # ==============================
+    # File index interface (see FileIndexerThread)
+    # ==============================
+
+    def is_up_to_date(self, filename, mtime):
+        with self._lock:
+            self._read()
+            entry = self._files.get(filename)
+        return entry is not None and entry[0] == mtime
+
+    def files(self):
+        with self._lock:
+            self._read()
+            return list(self._files.keys())
+
+    def update_file(self, filename, mtime, text):
+        grams = trigrams(text)
+        with self._lock:
+            self._read()
+            self._remove_file(filename)
+            if self._free_ids:
+                file_id = self._free_ids.pop()
+                self._names[file_id] = filename
+            else:
+                file_id = len(self._names)
+                self._names.append(filename)
+            self._files[filename] = (mtime, file_id)
+            bit = 1 << file_id
+            postings = self._postings
+            for gram in grams:
+                postings[gram] = postings.get(gram, 0) | bit
+            self.b_changed = True
+
+    def remove_file(self, filename):
+        with self._lock:
+            self._read()
+            if filename in self._files:
+                self._remove_file(filename)
+                self.b_changed = True
+
+    # the id of the file becomes stale, it's reused once its bits are cleared
+    def _remove_file(self, filename):
+        entry = self._files.pop(filename, None)
+        if entry is None:
+            return
+        self._names[entry[1]] = None
+        self._stale_ids.append(entry[1])
+        if len(self._stale_ids) >= _MAX_STALE_IDS:
+            self._clear_stale_ids()
+
+    # clears the bits of the stale ids in all trigrams
+    def _clear_stale_ids(self):
+        if not self._stale_ids:
+            return
+        keep = ~sum([1 << file_id for file_id in set(self._stale_ids)])
+        postings = self._postings
+        for gram, files in list(postings.items()):
+            files &= keep
+            if files:
+                postings[gram] = files
+            else:
+                del postings[gram]
+        self._free_ids += self._stale_ids
+        self._stale_ids = []
+
+    def save(self, path):
+        USCache.save_index(self, path, self._snapshot)
+
+    def _snapshot(self):
+        self._read()
+        self._clear_stale_ids()
+        return pickle.dumps((TEXT_INDEX_VERSION, self._files, self._postings), 2)
+
+    # the index is read from path when it's first used. Returns False if there is no saved index.
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        with self._lock:
+            self.__init__()
+            self._unread_path = path
+        return True
+
+    # ==============================
+    # Queries
+    # ==============================
+
+    # returns (the files that might contain the literals, number of indexed files).
+    # All files are candidates if the literals are too short to narrow them down.
+    def candidates(self, literals):
+        grams = set()
+        for literal in literals:
+            grams |= query_trigrams(literal)
+        with self._lock:
+            self._read()
+            names = self._names
+            num_files = len(self._files)
+            if not grams:
+                return sorted([name for name in names if name is not None]), num_files
+            # the rarest trigrams first, they leave the fewest candidates
+            postings = sorted([self._postings.get(gram, 0) for gram in grams], key=_count_bits)
+            files = postings[0]
+            for other in postings[1:]:
+                if not files:
+                    break
+                files &= other
+            candidates = []
+            bits = bin(files)[:1:-1]
+            i = bits.find("1")
+            while i != -1:
+                if names[i] is not None:
+                    candidates.append(names[i])
+                i = bits.find("1", i + 1)
+        candidates.sort()
+        return candidates, num_files
+
+
+# searches the indexed files in the background and sends the results in batches.
+#   query:      the text to search, or a regular expression if b_regex is true (case insensitive)
+#   on_results: called on the main thread with [(filename, [(line number, line), ...]), ...]
+#   on_done:    called on the main thread with (number of matches, number of files, number of candidates, number of indexed files, seconds)
+class TextSearchThread(threading.Thread):
+    def __init__(self, index, query, b_regex, on_results, on_done, max_results=2000):
+        self.index = index
+        self.query = query
+        self.b_regex = b_regex
+        self.on_results = on_results
+        self.on_done = on_done
+        self.max_results = max_results
+        self.b_cancelled = False
+        threading.Thread.__init__(self)
+
+    # returns the compiled bytes pattern of the query. Raises re.error for an invalid regular expression.
+    # Text is searched in the lower cased files, so it doesn't need to ignore the case.
+    def regex(self):
+        pattern = self.query if self.b_regex else re.escape(self.query.lower())
+        if not isinstance(pattern, bytes):
+            pattern = pattern.encode('utf-8')
+        return re.compile(pattern, re.IGNORECASE | re.MULTILINE if self.b_regex else re.MULTILINE)
+
+    def run(self):
+        start = time.time()
+        regex = self.regex()
+        candidates, num_files = self.index.candidates(required_literals(self.query) if self.b_regex else [self.query])
+        num_matches = 0
+        num_matched_files = 0
+        batch = []
+        for filename in candidates:
+            if self.b_cancelled:
+                return
+            lines = search_file(filename, regex, self.max_results - num_matches, not self.b_regex)
+            if not lines:
+                continue
+            num_matches += len(lines)
+            num_matched_files += 1
+            batch.append((filename, lines))
+            if len(batch) >= _BATCH_FILES:
+                self.send(batch)
+                batch = []
+            if num_matches >= self.max_results:
+                break
+        if batch:
+            self.send(batch)
+        duration = time.time() - start
+        sublime.set_timeout(lambda: self.on_done(num_matches, num_matched_files, len(candidates), num_files, duration), 0)
+
+    def send(self, batch):
+        sublime.set_timeout(lambda: self.on_results(batch), 0)
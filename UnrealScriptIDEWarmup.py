@@ -0,0 +1,139 @@
+#-----------------------------------------------------------------------------------
+# UnrealScriptIDE Warm-up
+#-----------------------------------------------------------------------------------
+#
+#   Learns which classes are used in a session (their members were needed for completions, go to declaration, ...)
+#   and loads or parses the most used ones in the background right after startup, before they're needed.
+#   Every class has a score: the scores of older sessions decay, so the profile follows what you're working on.
+#   The profile is saved next to the classes cache.
+#
+# (c) Florian Zinggeler
+#-----------------------------------------------------------------------------------
+import sublime
+import os
+import pickle
+import threading
+import time
+
+ST3 = int(sublime.version()) > 3000
+
+if ST3:
+    import UnrealScriptIDE.UnrealScriptIDECache as USCache
+else:
+    import UnrealScriptIDECache as USCache
+
+PROFILE_FILE_NAME = 'warmup_profile.obj'
+# increase this if the format of the saved profile changes
+PROFILE_VERSION = 1
+# the score of a class is multiplied with this at the start of every session
+DECAY = 0.8
+# classes with a lower score are forgotten
+MIN_SCORE = 0.05
+# the classes every session needs, used as long as nothing was learned yet
+DEFAULT_CLASSES = ["Object", "Actor", "HiddenFunctions"]
+
+
+class WarmupProfile:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # class name (lower case) -> decayed score of the previous sessions
+        self._scores = {}
+        # classes used in this session
+        self._used = set()
+        # classes prefetched in this session
+        self._prefetched = set()
+        self.b_changed = False
+
+    # records that the members of a class were needed
+    def touch(self, class_name):
+        name = class_name.lower()
+        if name not in self._used:
+            with self._lock:
+                self._used.add(name)
+                self.b_changed = True
+
+    # returns the names of the num most used classes
+    def top(self, num):
+        with self._lock:
+            if not self._scores:
+                return [c.lower() for c in DEFAULT_CLASSES][:num]
+            names = sorted(self._scores, key=lambda name: (-self._scores[name], name))
+        return names[:num]
+
+    def prefetched(self, class_name):
+        with self._lock:
+            self._prefetched.add(class_name.lower())
+
+    # (number of prefetched classes that were used, number of prefetched classes)
+    def hits(self):
+        with self._lock:
+            return len(self._prefetched & self._used), len(self._prefetched)
+
+    # the scores including this session
+    def scores(self):
+        with self._lock:
+            return self._session_scores()
+
+    def _session_scores(self):
+        scores = dict(self._scores)
+        for name in self._used:
+            scores[name] = scores.get(name, 0.0) + 1.0
+        return scores
+
+    def save(self, path):
+        USCache.save_index(self, path, lambda: pickle.dumps((PROFILE_VERSION, self._session_scores()), 2))
+
+    # loads the scores of the previous sessions and lets them decay
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                version, scores = pickle.load(f)
+        except Exception as e:
+            print("couldn't load ", path, ": ", e)
+            return False
+        if version != PROFILE_VERSION:
+            return False
+        with self._lock:
+            self._scores = {}
+            for name, score in scores.items():
+                if score * DECAY >= MIN_SCORE:
+                    self._scores[name] = score * DECAY
+        return True
+
+
+# loads (or parses) the classes of the profile in the background, the most used first, until the time budget is used up.
+#   collector:      the main instance, used to find the classes and to parse them
+#   num_classes:    how many classes of the profile are prefetched
+#   budget:         in seconds
+class WarmupThread(threading.Thread):
+    def __init__(self, collector, profile, num_classes, budget, parse_file):
+        self.collector = collector
+        self.profile = profile
+        self.num_classes = num_classes
+        self.budget = budget
+        # parses a file in this thread: parse_file(file name)
+        self.parse_file = parse_file
+        self.num_loaded = 0
+        self.num_parsed = 0
+        self.duration = 0.0
+        threading.Thread.__init__(self)
+
+    def run(self):
+        start = time.time()
+        for name in self.profile.top(self.num_classes):
+            if time.time() - start > self.budget:
+                break
+            my_class = self.collector.get_class(name)
+            if my_class is None:
+                continue
+            if my_class.has_parsed():
+                # out of the cache, doesn't count as used
+                my_class.load_members(False)
+                self.num_loaded += 1
+            else:
+                self.parse_file(my_class.file_name())
+                self.num_parsed += 1
+            self.profile.prefetched(name)
+        self.duration = time.time() - start